@@ -1,8 +1,15 @@
+from typing import Optional
+
+import numpy as np
 import pandas as pd
-from pydantic import BaseModel, computed_field
+from pydantic import BaseModel, PrivateAttr
+
+from districtsystem.basemodel import CachedModel, cached_computed_field
+from districtsystem.daily import DailyAggregator
+from districtsystem.schedule import CompiledSchedule
 
 
-class CUP(BaseModel):
+class CUP(CachedModel):
     timeStamp: pd.DataFrame
     hotTank_schedule: pd.DataFrame
     coldTank_schedule: pd.DataFrame
@@ -26,125 +33,83 @@ class CUP(BaseModel):
     boiler_HWflow_gpm: pd.Series = None
     chiller_CHWSflow_gpm: pd.Series = None
 
+    _schedules: dict = PrivateAttr(default_factory=dict)
+    _daily: Optional[tuple] = PrivateAttr(default=None)
+
     class Config:
         arbitrary_types_allowed = True
 
-    def is_on(self, tank_schedule, month, hour):
-        # loc is used to get the valu at the month and hour of the schedule using "labels- row or col name"
-        value = tank_schedule.loc[tank_schedule["Month"] == month, hour]
-        return value.iloc[0] == 1
-
-    @computed_field(return_type=pd.Series)
-    @property
+    def clear_cache(self) -> None:
+        # the compiled schedules and the day grouping are keyed on the frame objects, which an in-place edit
+        # keeps, so they go with the memoized values
+        super().clear_cache()
+        self._schedules = {}
+        self._daily = None
+
+    def compiled_schedule(self, tank_schedule: pd.DataFrame) -> CompiledSchedule:
+        # compiled once per schedule frame, reused by every flag/total lookup
+        cached = self._schedules.get(id(tank_schedule))
+        if cached is None or cached[0] is not tank_schedule:
+            cached = (tank_schedule, CompiledSchedule.from_frame(tank_schedule))
+            self._schedules[id(tank_schedule)] = cached
+        return cached[1]
+
+    def timeAxis(self) -> tuple[np.ndarray, np.ndarray]:
+        dates = self.timeStamp["Date and Time"].dt
+        return dates.month.to_numpy(), dates.hour.to_numpy()
+
+    @cached_computed_field(return_type=pd.Series)
     def HW_charging(self) -> pd.Series:
-        result = []
-        for ts in self.timeStamp["Date and Time"]:
-            month = ts.month
-            hour = ts.hour
-            # print("ts",month, hour)
-            result.append(self.is_on(self.hotTank_schedule, month, hour))
-        # print(df)
-        return pd.Series(result)
-
-    @computed_field
-    @property
-    def CHW_charging(self) -> pd.Series:
-        result = []
-        for ts in self.timeStamp["Date and Time"]:
-            month = ts.month
-            hour = ts.hour
+        month, hour = self.timeAxis()
+        return pd.Series(self.compiled_schedule(self.hotTank_schedule).charging(month, hour))
 
-            result.append(self.is_on(self.coldTank_schedule, month, hour))
-        # print(df)
-        return pd.Series(result)
+    @cached_computed_field
+    def CHW_charging(self) -> pd.Series:
+        month, hour = self.timeAxis()
+        return pd.Series(self.compiled_schedule(self.coldTank_schedule).charging(month, hour))
 
-    @computed_field
-    @property
+    @cached_computed_field
     def shiftCount(self) -> pd.Series:
         value = self.timeStamp["Date and Time"].dt.dayofyear - 1
         return value
 
-    def predictedDayLoad(self, shiftCount, load) -> pd.Series:
-        data = {"shiftCount": shiftCount, "load": load}
-        df = pd.DataFrame(data)
-
-        # initiate empty series to store results
-        result_series = pd.Series(index=shiftCount.index)
+    def daily(self) -> DailyAggregator:
+        # day grouping of the time axis, built once per timeStamp frame
+        if self._daily is None or self._daily[0] is not self.timeStamp:
+            self._daily = (self.timeStamp, DailyAggregator.from_days(self.shiftCount))
+        return self._daily[1]
 
-        for value in shiftCount.unique():
-            # filter to every shiftcount value
-            filtered_df = df[df["shiftCount"] == value]
-            summed_value = filtered_df["load"].sum()
+    def predictedDayLoad(self, load, shiftCharging=None) -> pd.Series:
+        # whole-day total (or total over the charging hours) broadcast back to every hour of the day
+        mask = None if shiftCharging is None else shiftCharging.to_numpy(dtype=bool)
+        return pd.Series(self.daily().day_sum(load, mask), index=self.shiftCount.index)
 
-            result_series[shiftCount == value] = summed_value
-        return result_series
-
-    @computed_field
-    @property
+    @cached_computed_field
     def predictedDay_heating(self) -> pd.Series:
-        x = self.predictedDayLoad(self.shiftCount, self.totalHeating_load)
-        return x
+        return self.predictedDayLoad(self.totalHeating_load)
 
-    @computed_field
-    @property
+    @cached_computed_field
     def predictedDay_cooling(self) -> pd.Series:
-        x = self.predictedDayLoad(self.shiftCount, self.totalCooling_load)
-        return x
-
-    def predictedDayLoad_shift(self, shiftCharging, shiftCount, load) -> pd.Series:
-        data = {"shiftCharging": shiftCharging, "shiftCount": shiftCount, "load": load}
-        df = pd.DataFrame(data)
+        return self.predictedDayLoad(self.totalCooling_load)
 
-        # initiate empty series to store results
-        result_series = pd.Series(index=shiftCount.index)
-
-        # this is working but write better code to not use loop to assign value to every value
-        for value in shiftCount.unique():
-            filtered_df = df[(df["shiftCount"] == value) & (df["shiftCharging"] is True)]
-            summed_value = filtered_df["load"].sum()
-            result_series[shiftCount == value] = summed_value
-
-        return result_series
-
-    @computed_field
-    @property
+    @cached_computed_field
     def predictedDay_heating_shift(self) -> pd.Series:
-        x = self.predictedDayLoad_shift(self.HW_charging, self.shiftCount, self.totalHeating_load)
-        return x
+        return self.predictedDayLoad(self.totalHeating_load, self.HW_charging)
 
-    @computed_field
-    @property
+    @cached_computed_field
     def predictedDay_cooling_shift(self) -> pd.Series:
-        x = self.predictedDayLoad_shift(self.CHW_charging, self.shiftCount, self.totalCooling_load)
-        return x
-
-    # checks total hours the tank is on
-    def total_on(self, tank_schedule, month) -> pd.Series:
-        # loc is used to get the valu at the month and hour of the schedule using "labels- row or col name"
-        value = tank_schedule.loc[tank_schedule["Month"] == month, "Total"]
-        return value.iloc[0]
+        return self.predictedDayLoad(self.totalCooling_load, self.CHW_charging)
 
-    @computed_field
-    @property
+    # total hours the tank is on in each timestamp's month
+    @cached_computed_field
     def HL_totalShiftHours(self) -> pd.Series:
-        result = []
-        for ts in self.timeStamp["Date and Time"]:
-            month = ts.month
+        month, _ = self.timeAxis()
+        return list(self.compiled_schedule(self.hotTank_schedule).shift_hours(month))
 
-            result.append(self.total_on(self.hotTank_schedule, month))
-        # print(df)
-        return result
-
-    @computed_field
-    @property
+    @cached_computed_field
     def CL_totalShiftHours(self) -> pd.Series:
-        result = []
-        for ts in self.timeStamp["Date and Time"]:
-            month = ts.month
-
-            result.append(self.total_on(self.coldTank_schedule, month))
-        # print(df)
-        return result
+        month, _ = self.timeAxis()
+        return list(self.compiled_schedule(self.coldTank_schedule).shift_hours(month))
 
     ################# result to df -- compute one #############
     def compute_CUP(self) -> pd.DataFrame:
@@ -167,8 +132,7 @@ class CUP(BaseModel):
     #################### CUP calc- second half #############################
 
     # =((K3-I3)*L3+(K3-I3)*W3)*500-((K3-P3)*Q3+(K3-U3)*V3+(K3-Z3)*AA3)*500
-    @computed_field
-    @property
+    @cached_computed_field
     def cooling_shortfall(self) -> pd.Series:
         return (
             (self.districtCHWRT - self.CHW_districtSTP) * self.districtCHWSflow
@@ -181,8 +145,7 @@ class CUP(BaseModel):
 
     # =((H3-J3)*M3+(H3-J3)*T3)*500-((N3-J3)*O3+(R3-J3)*S3+(X3-J3)*Y3)*500
 
-    @computed_field
-    @property
+    @cached_computed_field
     def heating_shortfall(self) -> pd.Series:
         # return (((self.HW_districtSTP-self.districtHWRT)*self.districtHWSflow+(self.HW_districtSTP-self.districtHWRT)*self.TES_H_flowinto)*500-((self.HW_districtSTP-self.districtHWRT)*
         #         self.HP_HW_gpm+(self.TES_H_tempOut-self.districtHWRT) *self.TES_H_flowOut+(self.HW_districtSTP-self.districtHWRT)*self.boiler_HWflow_gpm)*500)                                                                                                       )
@@ -197,18 +160,15 @@ class CUP(BaseModel):
         ) * 500
         return first_term - second_term
 
-    @computed_field
-    @property
+    @cached_computed_field
     def CUP_HWRflow(self) -> pd.Series:
         return self.districtHWSflow + self.TES_H_flowinto
 
-    @computed_field
-    @property
+    @cached_computed_field
     def CUP_CHWRflow(self) -> pd.Series:
         return self.districtCHWSflow + self.TES_C_flowinto
 
-    @computed_field
-    @property
+    @cached_computed_field
     def CUP_HWRtemp(self) -> pd.Series:
         try:
             result = (
@@ -218,8 +178,7 @@ class CUP(BaseModel):
             result = self.districtHWRT
         return result
 
-    @computed_field
-    @property
+    @cached_computed_field
     def CUP_CHWRtemp(self) -> pd.Series:
         try:
             result = (
@@ -229,8 +188,7 @@ class CUP(BaseModel):
             result = self.districtCHWRT
         return result
 
-    @computed_field
-    @property
+    @cached_computed_field
     def CUP_HWST(self) -> pd.Series:
         try:
             result = (
@@ -242,8 +200,7 @@ class CUP(BaseModel):
             result = self.HW_districtSTP
         return result
 
-    @computed_field
-    @property
+    @cached_computed_field
     def CUP_CHWST(self) -> pd.Series:
         # =IFERROR((P3*Q3+U3*V3+Z3*AA3)/AN3,I3)
         try:
@@ -256,8 +213,7 @@ class CUP(BaseModel):
             result = self.CHW_districtSTP
         return result
 
-    @computed_field(return_type=pd.Series)
-    @property
+    @cached_computed_field(return_type=pd.Series)
     def max_diff(self: BaseModel) -> pd.Series:
         return self.CUP_CHWRtemp - self.districtCHWRT
 
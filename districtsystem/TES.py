@@ -1,11 +1,447 @@
+from typing import Literal, Optional
+
 import numpy as np
 import pandas as pd
-from pydantic import BaseModel, computed_field
+from pydantic import BaseModel, PrivateAttr
 
+from districtsystem.basemodel import CachedModel, cached_computed_field, memoized_property
 from districtsystem.CUP import CUP
 
+# tank status is carried as an integer code inside the stepping loops and only labelled in the output frames
+HOLD, CHARGE, DISCHARGE = 0, 1, 2
+STATUS_LABELS = np.array(["Hold", "Charge", "Discharge"], dtype=object)
+
+
+def _after_losses(capacity, tankVol, wallLoss, thermocloneLoss):
+    # array version of TES.tempAfterLosses
+    condition = (capacity >= 0.75) | (capacity <= 0.25)
+    return np.where(
+        condition,
+        tankVol - (tankVol * wallLoss / 100),
+        tankVol - (tankVol * (wallLoss + thermocloneLoss) / 100),
+    )
+
+
+def _py_min(a, b):
+    # same result as the builtin min(a, b): a is kept unless b is strictly smaller (NaN included)
+    return np.where(b < a, b, a)
+
+
+def _step_hot_tank(plan: dict, tank: dict, state: tuple, start: int, stop: int) -> dict:
+    """Advance the hot tank from hour `start` to hour `stop` (exclusive).
+
+    `state` is the (capacity, Th volume, Tc volume, Th temp, Tc temp) of the tank at the end of
+    hour `start - 1`. Tank parameters and state are scalars for a single run or `(n_configs,)`
+    vectors for a sweep. Returns one preallocated (hours, ...) array per output column.
+    """
+    capacity, th, tc, th_F, tc_F = state
+    tankVol = tank["tankVol"]
+    wallLoss = tank["wallLoss"]
+    thermocloneLoss = tank["thermocloneLoss"]
+    thermoclineDischarge = tank["thermoclineDischarge"]
+    chargeLimit = tank["tankVol"] * tank["stopCharging"]
+    maxFlow = tank["maxFlow"]
+    maxFlow_int = np.trunc(maxFlow)
+
+    charging = plan["charging"]
+    overload = plan["overload"]
+    rateLimit_load = plan["rateLimit_load"]
+    rateLimit_shift = plan["rateLimit_shift"]
+    load = plan["load"]
+    districtHWRT = plan["districtHWRT"]
+    HW_districtSTP = plan["HW_districtSTP"]
+
+    shape = (stop - start, *np.shape(capacity))
+    out = {name: np.empty(shape) for name in HOT_KERNEL_COLUMNS}
+    out["status"] = np.empty(shape, dtype=np.int8)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        for k, i in enumerate(range(start, stop)):
+            supply = _after_losses(capacity, th, wallLoss, thermocloneLoss)
+            ret = _after_losses(capacity, tc, wallLoss, thermocloneLoss)
+            thermocline = tankVol - supply - ret
+
+            hold = (charging[i] & ((supply + thermocline) * thermoclineDischarge >= chargeLimit)) | overload[i]
+            charge = charging[i] & ~hold
+            discharge = ~charging[i] & ~hold
+            status = np.where(hold, HOLD, np.where(charge, CHARGE, DISCHARGE))
+
+            chargeRate = _py_min(
+                _py_min(rateLimit_load[i], rateLimit_shift[i]),
+                np.trunc((ret + thermocline * thermoclineDischarge) / 60),
+            )
+            chargeRate = np.where(charge, _py_min(chargeRate, maxFlow_int), 0.0)
+
+            flow = load[i] / 500 / (th_F - districtHWRT[i])
+            flowOut = np.where(discharge, _py_min(_py_min(flow, maxFlow), supply / 60), 0.0)
+
+            out["capacityHr"][k] = capacity
+            out["temp_th"][k] = th_F
+            out["temp_tc"][k] = tc_F
+
+            th = supply + chargeRate * 60 - np.where(flowOut * 60 > supply, supply, flowOut * 60)
+            tc = ret + flowOut * 60 - np.where(chargeRate * 60 > ret, ret, chargeRate * 60)
+            capacity = th / tankVol
+            th_F = np.where(
+                chargeRate == 0,
+                (th_F * supply + HW_districtSTP[i] * th_F * 60) / (supply + th_F * 60),
+                th_F,
+            )
+            tc_F = np.where(
+                flowOut > 0,
+                (tc_F * ret + districtHWRT[i] * flowOut * 60) / (ret + flowOut * 60),
+                tc_F,
+            )
+
+            out["afterLoss_supply"][k] = supply
+            out["afterLoss_return"][k] = ret
+            out["thermocline"][k] = thermocline
+            out["status"][k] = status
+            out["chargeRate"][k] = chargeRate
+            out["flowInto"][k] = chargeRate
+            out["flow"][k] = flow
+            out["flowOut"][k] = flowOut
+            out["th"][k] = th
+            out["tc"][k] = tc
+            out["capacity"][k] = capacity
+            out["th_F"][k] = th_F
+            out["tc_F"][k] = tc_F
+
+    return out
+
+
+HOT_KERNEL_COLUMNS = [
+    "capacityHr",
+    "afterLoss_supply",
+    "afterLoss_return",
+    "thermocline",
+    "chargeRate",
+    "flowInto",
+    "temp_th",
+    "flow",
+    "flowOut",
+    "th_F",
+    "th",
+    "tc",
+    "capacity",
+    "temp_tc",
+    "tc_F",
+]
+
+
+def _step_cold_tank(plan: dict, tank: dict, state: tuple, start: int, stop: int) -> dict:
+    """Advance the cold tank from hour `start` to hour `stop` (exclusive).
+
+    Same conventions as `_step_hot_tank`; `plan` comes from `TES.TES_C_plan`.
+    """
+    capacity, th, tc, th_F, tc_F = state
+    tankVol = tank["tankVol"]
+    wallLoss = tank["wallLoss"]
+    thermocloneLoss = tank["thermocloneLoss"]
+    thermoclineDischarge = tank["thermoclineDischarge"]
+    chargeLimit = tank["tankVol"] * tank["stopCharging"]
+    maxFlow = tank["maxFlow"]
+    lowerTankTemp = tank["lowerTankTemp"]
+
+    lossCapacity = plan["lossCapacity"]
+    chargeWindow = plan["chargeWindow"]
+    possRecCHW = plan["possRecCHW"]
+    HP_C_flow = plan["HP_C_flow"]
+    TES_C_flow = plan["TES_C_flow"]
+    rateLimit_shift = plan["rateLimit_shift"]
+    HP_CHWST = plan["HP_CHWST"]
+    districtCHWRT = plan["districtCHWRT"]
+
+    shape = (stop - start, *np.shape(capacity))
+    out = {name: np.empty(shape) for name in COLD_KERNEL_COLUMNS}
+    out["status"] = np.empty(shape, dtype=np.int8)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        for k, i in enumerate(range(start, stop)):
+            # the first hour uses the tank's own capacity, later hours the hot tank capacity of that hour
+            hourCapacity = capacity if i == 0 else lossCapacity[i]
+            supply = _after_losses(hourCapacity, th, wallLoss, thermocloneLoss)
+            ret = _after_losses(hourCapacity, tc, wallLoss, thermocloneLoss)
+            thermocline = tankVol - supply - ret
+
+            chargeable = (possRecCHW[i] > HP_C_flow[i]) | chargeWindow[i]
+            charge = chargeable & (ret + thermocline * thermoclineDischarge <= chargeLimit)
+            discharge = ~chargeable
+            status = np.where(charge, CHARGE, np.where(chargeable, HOLD, DISCHARGE))
+
+            chargeValue = (supply + thermocline * thermoclineDischarge) / 60
+            if chargeWindow[i]:
+                # coldMaxflow does not cap the charge window rate, as in the original spreadsheet port
+                chargeRate = np.minimum(np.maximum(rateLimit_shift[i], possRecCHW[i]), chargeValue)
+            else:
+                chargeRate = np.minimum(possRecCHW[i] - np.minimum(HP_C_flow[i], chargeValue), maxFlow)
+            chargeRate = np.where(charge, chargeRate, 0.0)
+
+            flowOut = np.where(discharge, _py_min(_py_min(TES_C_flow[i], maxFlow), ret / 60), 0.0)
+
+            out["capacityHr"][k] = capacity
+            out["temp_th"][k] = th_F
 
-class TES(BaseModel):
+            th = supply - (np.where(chargeRate * 60 > supply, supply, chargeRate * 60) + flowOut * 60)
+            tc = ret + chargeRate * 60 - np.where(flowOut * 60 > ret, ret, flowOut * 60)
+            tc_F = np.where(
+                chargeRate > 0,
+                (lowerTankTemp * ret + (HP_CHWST[i] * chargeRate * 60)) / (ret + chargeRate * 60),
+                lowerTankTemp,
+            )
+            capacity = np.where(np.abs(tc_F - lowerTankTemp) <= 1e-6, tc / tankVol, 0.0)
+            th_F = np.where(
+                chargeRate < 0,
+                (th_F * supply - districtCHWRT[i] * chargeRate * 60) / (supply - chargeRate * 60),
+                th_F,
+            )
+
+            out["afterLoss_supply"][k] = supply
+            out["afterLoss_return"][k] = ret
+            out["thermocline"][k] = thermocline
+            out["status"][k] = status
+            out["chargeRate"][k] = chargeRate
+            out["flowOut"][k] = flowOut
+            out["th"][k] = th
+            out["tc"][k] = tc
+            out["tc_F"][k] = tc_F
+            out["capacity"][k] = capacity
+            out["th_F"][k] = th_F
+
+    return out
+
+
+COLD_KERNEL_COLUMNS = [
+    "capacityHr",
+    "afterLoss_supply",
+    "afterLoss_return",
+    "thermocline",
+    "chargeRate",
+    "temp_th",
+    "flowOut",
+    "th",
+    "tc",
+    "tc_F",
+    "capacity",
+    "th_F",
+]
+
+
+HOT_SWEEP_COLUMNS = [*HOT_KERNEL_COLUMNS, "status"]
+COLD_SWEEP_COLUMNS = [*COLD_KERNEL_COLUMNS, "status"]
+
+# scalar tank inputs read by the stepping kernels, SWEEP_PARAMETERS can be varied by TES.TES_sweep
+TANK_PARAMETERS = [
+    "HW_upperTankVol",
+    "HW_lowerTankVol",
+    "HW_TankVol",
+    "HW_wallLoss",
+    "HW_ThermocloneLoss",
+    "HW_upperTankTemp",
+    "HW_lowerTankTemp",
+    "hotMaxflow",
+    "CHW_upperTankVol",
+    "CHW_lowerTankVol",
+    "CHW_TankVol",
+    "CHW_wallLoss",
+    "CHW_ThermocloneLoss",
+    "CHW_upperTankTemp",
+    "CHW_lowerTankTemp",
+    "coldMaxflow",
+    "thermoclineDischarge",
+    "stopCharging",
+]
+SWEEP_PARAMETERS = [name for name in TANK_PARAMETERS if not name.endswith("TankTemp")]
+
+
+class SweepParameterError(ValueError):
+    def __init__(self, names):
+        super().__init__(f"Cannot sweep {names}, expected any of {SWEEP_PARAMETERS}")
+
+
+# result columns holding the end-of-hour state of each tank
+STATE_COLUMNS = {
+    "hot": {
+        "capacity": "TES Hot Capacity (%)",
+        "th": "TES Hot Th (Gal)",
+        "tc": "TES Hot Tc (Gal)",
+        "th_temp": "TES Hot Th (°F)",
+        "tc_temp": "TES Hot Tc (°F)",
+        "status": "TES Hot Status",
+    },
+    "cold": {
+        "capacity": "TES Cold Capacity (%)",
+        "th": "TES Cold Th (Gal)",
+        "tc": "TES Cold Tc (Gal)",
+        "th_temp": "TES Cold Th (°F)",
+        "tc_temp": "TES Cold Tc (°F)",
+        "status": "TES Cold Status",
+    },
+}
+
+
+class TankStateError(ValueError):
+    def __init__(self, state_tank, tank):
+        super().__init__(f"A {state_tank} tank snapshot cannot start the {tank} tank")
+
+
+class TankState(BaseModel):
+    """Snapshot of one tank at the end of `hour`.
+
+    Passing it to `TES.TES_H_calculate` or `TES.TES_C_calculate` resumes the simulation at
+    `hour + 1`; `carry_over` turns the last hour of a year into the initial state of the next one.
+    The model serializes with `model_dump_json` / `model_validate_json`.
+    """
+
+    tank: Literal["hot", "cold"]
+    hour: int
+    capacity: float
+    th: float
+    tc: float
+    th_temp: float
+    tc_temp: float
+    status: Optional[str] = None
+
+    @classmethod
+    def from_frame(cls, frame: pd.DataFrame, hour: int) -> "TankState":
+        # capture the state at `hour` from a TES_H_calculate or TES_C_calculate frame
+        tank = "hot" if "TES Hot Status" in frame.columns else "cold"
+        values = {name: frame.at[hour, column] for name, column in STATE_COLUMNS[tank].items()}
+        return cls(tank=tank, hour=hour, **values)
+
+    def carry_over(self) -> "TankState":
+        return self.model_copy(update={"hour": -1})
+
+    def resume(self, tank: str) -> tuple:
+        if tank != self.tank:
+            raise TankStateError(self.tank, tank)
+        return (self.capacity, self.th, self.tc, self.th_temp, self.tc_temp), self.hour + 1
+
+
+def _first_difference(previous: dict, plan: dict, stop: int) -> int:
+    # first hour at which two plans differ (NaN compares equal to NaN), `stop` if they are identical
+    first = stop
+    for name, value in plan.items():
+        old = previous.get(name)
+        if value is None or old is None or np.shape(value) != np.shape(old):
+            if value is None and old is None:
+                continue
+            return 0
+        changed = value != old
+        if value.dtype.kind == "f":
+            changed &= ~(np.isnan(value) & np.isnan(old))
+        hours = np.flatnonzero(changed.reshape(len(value), -1).any(axis=1))
+        if len(hours):
+            first = min(first, hours[0])
+    return int(first)
+
+
+def _hot_tank_setup(p: dict) -> tuple:
+    tank = {
+        "tankVol": p["HW_TankVol"],
+        "wallLoss": p["HW_wallLoss"],
+        "thermocloneLoss": p["HW_ThermocloneLoss"],
+        "thermoclineDischarge": p["thermoclineDischarge"],
+        "stopCharging": p["stopCharging"],
+        "maxFlow": p["hotMaxflow"],
+    }
+    # the tank at the end of "hour -1" is the initial condition
+    state = (
+        p["HW_upperTankVol"] / p["HW_TankVol"],
+        p["HW_upperTankVol"],
+        p["HW_lowerTankVol"],
+        p["HW_upperTankTemp"],
+        p["HW_lowerTankTemp"],
+    )
+    return tank, state
+
+
+def _cold_tank_setup(p: dict) -> tuple:
+    tank = {
+        "tankVol": p["CHW_TankVol"],
+        "wallLoss": p["CHW_wallLoss"],
+        "thermocloneLoss": p["CHW_ThermocloneLoss"],
+        "thermoclineDischarge": p["thermoclineDischarge"],
+        "stopCharging": p["stopCharging"],
+        "maxFlow": p["coldMaxflow"],
+        "lowerTankTemp": p["CHW_lowerTankTemp"],
+    }
+    state = (
+        p["CHW_lowerTankVol"] / p["CHW_TankVol"],
+        p["CHW_upperTankVol"],
+        p["CHW_lowerTankVol"],
+        p["CHW_upperTankTemp"],
+        p["CHW_lowerTankTemp"],
+    )
+    return tank, state
+
+
+def _cold_charge_window(cup: pd.DataFrame) -> np.ndarray:
+    # cold-tank charging hours of the days whose predicted heating does not exceed the predicted cooling
+    value1 = cup["Predicted Day's Heating Load (Btu/h)"]
+    value2 = cup["Predicted Day's Cooling Load (Btu/h)"]
+    return np.where(cup["Cold Load Shift Charging"], np.where(value1 > value2, False, True), False)
+
+
+def _stack(result: dict, columns: list) -> np.ndarray:
+    # (hours, configs) arrays per column -> configs x hours x columns
+    return np.moveaxis(np.stack([result[name] for name in columns], axis=-1), 1, 0)
+
+
+def _hot_frame(result: dict, districtHWRT: pd.Series, start: int = 0) -> pd.DataFrame:
+    index = list(range(start, start + len(result["capacity"])))
+    return pd.DataFrame(
+        {
+            "TES Hot Capacity hr-1 (%)": result["capacityHr"],
+            "TES Hot Th after losses (Gal)_supply temp": result["afterLoss_supply"],
+            "TES Hot Tc after losses (Gal)_return temp": result["afterLoss_return"],
+            "TES Hot Thermocline (Gal)": result["thermocline"],
+            "TES Hot Status": STATUS_LABELS[result["status"]],
+            "Hot Load-Shift Charge Rate (gpm)": result["chargeRate"],
+            "Flow into TES Hot Th (gpm)": result["flowInto"],
+            "TES Hot Th Previous Hour (°F)": result["temp_th"],
+            "TES Flow to meet Campus Heating (gpm)": result["flow"],
+            "Flow out of TES Hot Th (gpm)": result["flowOut"],
+            "TES Hot Th (°F)": result["th_F"],
+            "TES Hot Th (Gal)": result["th"],
+            "TES Hot Tc (Gal)": result["tc"],
+            "TES Hot Capacity (%)": result["capacity"],
+            "districtHWRT": districtHWRT,
+            "TES Hot Tc Previous Hour(°F)": result["temp_tc"],
+            "TES Hot Tc (°F)": result["tc_F"],
+        },
+        index=index,
+    )
+
+
+def _cold_frame(result: dict, plan: dict, lowerTankTemp: float, start: int = 0) -> pd.DataFrame:
+    index = list(range(start, start + len(result["capacity"])))
+    return pd.DataFrame(
+        {
+            "TES Cold Capacity hr-1 (%)": result["capacityHr"],
+            "TES Cold Th after losses (Gal)_supply temp": result["afterLoss_supply"],
+            "TES Cold Tc after losses (Gal)_return temp": result["afterLoss_return"],
+            "TES Cold Thermocline (Gal)": result["thermocline"],
+            "TES Cold Charge Window Adjustment": plan["chargeWindow"][start:],
+            "TES Cold Status": STATUS_LABELS[result["status"]],
+            "Cold Load-Shift Charge Rate (gpm)": result["chargeRate"],
+            "TES Cold Tc Previous Hour (°F)": np.full(len(index), lowerTankTemp),
+            "TES Flow to meet Campus Heating (gpm)": plan["TES_C_flow"][start:],
+            "HP Flow to meet Campus Cooling (gpm)": plan["HP_C_flow"][start:],
+            "Flow into TES Cold Tc (gpm)": result["chargeRate"],
+            "Flow out of TES Cold Tc (gpm)": result["flowOut"],
+            "TES Cold Th (Gal)": result["th"],
+            "TES Cold Tc (Gal)": result["tc"],
+            "TES Cold Tc (°F)": result["tc_F"],
+            "TES Cold Capacity (%)": result["capacity"],
+            "TES Cold Th (°F)": result["th_F"],
+            "TES Cold Th Previous Hour (°F)": result["temp_th"],
+        },
+        index=index,
+    )
+
+
+class TES(CachedModel):
     #
     # heatingLoad : pd.Series
     HW_upperTankVol: float
@@ -48,11 +484,14 @@ class TES(BaseModel):
 
     conversion_galToLbs: float
 
+    # inputs and trajectory of the last hot/cold run, reused when only later hours change
+    _hotRun: Optional[dict] = PrivateAttr(default=None)
+    _coldRun: Optional[dict] = PrivateAttr(default=None)
+
     class Config:
         arbitrary_types_allowed = True
 
-    @computed_field
-    @property
+    @cached_computed_field
     def first_hotCapacityHr(self) -> pd.Series:
         # Calculate the value of interest (self.HW_upperTankVol / self.HW_TankVol)
         value = self.HW_upperTankVol / self.HW_TankVol
@@ -78,8 +517,7 @@ class TES(BaseModel):
         # Return the resulting Series as a MySeries instance
         return pd.Series(result_series)
 
-    @computed_field
-    @property
+    @cached_computed_field
     def first_hotThafterLoss_supply(self) -> pd.Series:
         result = self.tempAfterLosses(
             self.first_hotCapacityHr,
@@ -89,17 +527,7 @@ class TES(BaseModel):
         )
         return result[0]
 
-    def rest_hotThafterLoss_supply(self, index, hotCapacityHr, TES_H_th) -> pd.Series:
-        result = self.tempAfterLosses(
-            hotCapacityHr[index],
-            TES_H_th[index - 1],
-            self.HW_wallLoss,
-            self.HW_ThermocloneLoss,
-        )
-        return result[0]
-
-    @computed_field
-    @property
+    @cached_computed_field
     def first_hotThafterLoss_return(self) -> pd.Series:
         result = self.tempAfterLosses(
             self.first_hotCapacityHr,
@@ -109,218 +537,36 @@ class TES(BaseModel):
         )
         return result[0]
 
-    def rest_hotThafterLoss_return(self, index, hotCapacityHr, TES_H_tc) -> pd.Series:
-        result = self.tempAfterLosses(
-            hotCapacityHr[index],
-            TES_H_tc[index - 1],
-            self.HW_wallLoss,
-            self.HW_ThermocloneLoss,
-        )
-        return result[0]
-
-    def hotThermocline(self, index, hotThafterLoss_supply, hotThafterLoss_return) -> pd.Series:
-        result = self.HW_TankVol - hotThafterLoss_supply[index] - hotThafterLoss_return[index]
-        return result
-
-    def hotStatus(self, index, hotThafterLoss_supply, hotThermocline):
-        # Apply conditions using pandas logical operations without direct if statements
-        condition_hold = self.CUP_output_df["Hot Load Shift Charging"][index] & (
-            (hotThafterLoss_supply[index] + hotThermocline[index]) * self.thermoclineDischarge
-            >= self.HW_TankVol * self.stopCharging
-        ) | (self.totalHeating_load[index] > self.HP_heatingCapacity)
-        condition_charge = self.CUP_output_df["Hot Load Shift Charging"][index] & ~condition_hold
-        condition_discharge = ~self.CUP_output_df["Hot Load Shift Charging"][index]
-
-        # Assign corresponding values based on conditions
-        value = np.select(
-            [condition_hold, condition_charge, condition_discharge],
-            ["Hold", "Charge", "Discharge"],
-            default=None,  # Default value if none of the conditions are met
-        )
-
-        return value
-
-    def hotLoadShiftChargeRate(self, index, hotStatus, hotThermocline, hotThafterLoss_return) -> pd.Series:
-        mask_OG = pd.Series((hotStatus[index] == "Discharge") | (hotStatus[index] == "Hold"))
-
-        HW_STP = self.HW_districtSTP[index] - self.districtHWRT[index]
-        value1 = float((self.HP_heatingCapacity - self.totalHeating_load[index]) / 500 / HW_STP)
-
-        ##value2
-        predictedHeatingMinusShift = (
-            self.CUP_output_df["Predicted Day's Heating Load (Btu/h)"].values[index]
-            - self.CUP_output_df["Predicted Heating Load in Load Shift Window (Btu/h)"].values[index]
-        )
-        mask = self.CUP_output_df["Hot Load Shift Hours"].values[index] != 0
-
-        # Compute the value for value2
-        computed_value = (
-            predictedHeatingMinusShift / 500 / HW_STP / self.CUP_output_df["Hot Load Shift Hours"].values[index]
-        )
-        value2 = computed_value.astype(float) if mask else 0
-
-        ##value 3
-        value3 = int((hotThafterLoss_return[index] + hotThermocline[index] * self.thermoclineDischarge) / 60)
-
-        ##value 4
-        value4 = int(self.hotMaxflow)
-        # print("v1",value1)
-        # print("v2",value2)
-
-        # print("v3",value3)
-        # print(mask_OG)
-        # print("cc",pd.Series([0]))
-
-        result_series = pd.Series([0])
-        # result_series = pd.Series([0]*8760)
-        result_series[mask_OG] = 0
-        # Filter and compute minimum across valid rows
-        # valid_values = [value[~mask_OG] for value in [value1, value2, value3, value4]]
-        # result_series[~mask_OG] = np.minimum.reduce(valid_values)
-
-        # valid_values = [value1, value2, value3, value4]
-        min_value = min(value1, value2, value3, value4)
-        result_series[~mask_OG] = min_value
-
-        # valid_series = [value[~mask_OG] for value in valid_values if isinstance(value, pd.Series)]
-        # print(valid_series)
-        # if valid_series:
-        #     min_values = np.minimum(valid_values)
-        #     # Ensure `min_values` has a compatible dtype with `result_series`
-        #     # min_values = min_values.astype(result_series.dtype)
-        #     result_series[~mask_OG] = min_values
-
-        return result_series[0]
-
-    def TES_H_flowInto(self, index, hotStatus, hotLoadShiftChargeRate) -> pd.Series:
-        return np.where(hotStatus[index] == "Charge", hotLoadShiftChargeRate[index], 0)
-
-    def first_TES_H_temp(self) -> float:
-        return self.HW_upperTankTemp
-
-    def TES_H_flow(self, index, TES_H_temp) -> pd.Series:
-        # print("xxx",self.totalHeating_load,"xxx",self.H_tempTES,"xxx",self.districtHWRT)
-        return self.totalHeating_load[index] / 500 / (TES_H_temp[index] - self.districtHWRT[index]).astype(float)
-
-    def TES_H_flowOut(self, index, TES_H_flow, hotThafterLoss_supply, hotStatus) -> pd.Series:
-        minimum = min(
-            TES_H_flow[index],
-            self.hotMaxflow,
-            (hotThafterLoss_supply[index] / 60).astype(float),
-        )
-        return np.where(hotStatus[index] == "Discharge", minimum, 0).astype(float)
-
-    def TES_H_th(self, index, hotThafterLoss_supply, TES_H_flowInto, TES_H_flowOut) -> pd.Series:
-        value1 = hotThafterLoss_supply[index] + TES_H_flowInto[index] * 60
-        value2 = np.where(
-            TES_H_flowOut[index] * 60 > hotThafterLoss_supply[index],
-            hotThafterLoss_supply[index],
-            TES_H_flowOut[index] * 60,
-        )
-        return value1 - value2
-
-    def TES_H_tc(self, index, hotThafterLoss_return, TES_H_flowInto, TES_H_flowOut) -> pd.Series:
-        value1 = hotThafterLoss_return[index] + TES_H_flowOut[index] * 60
-        value2 = np.where(
-            TES_H_flowInto[index] * 60 > hotThafterLoss_return[index],
-            hotThafterLoss_return[index],
-            TES_H_flowInto[index] * 60,
-        )
-        return value1 - value2
-
-    def TES_H_capacity(self, index, TES_H_th) -> pd.Series:
-        try:
-            result = TES_H_th[index] / self.HW_TankVol
-        except ValueError:
-            result = 0
-        return result
-
-    def TES_H_Th_F(self, index, TES_H_flowInto, TES_H_temp, hotThafterLoss_supply) -> pd.Series:
-        if TES_H_flowInto[index] == 0:
-            x = TES_H_temp[index] * hotThafterLoss_supply[index] + self.HW_districtSTP[index] * TES_H_temp[index] * 60
-            y = hotThafterLoss_supply[index] + TES_H_temp[index] * 60
-            return x / y
-        else:
-            return TES_H_temp[index]
-
-    def TES_H_tc_F(self, index, TES_H_flowOut, TES_H_temp_tc, hotThafterLoss_return) -> pd.Series:
-        if TES_H_flowOut[index] > 0:
-            return (
-                TES_H_temp_tc[index] * hotThafterLoss_return[index]
-                + self.districtHWRT[index] * TES_H_flowOut[index] * 60
-            ) / (hotThafterLoss_return[index] + TES_H_flowOut[index] * 60)
-        else:
-            return TES_H_temp_tc[index]
-
-    def TES_H_calculate(self) -> pd.DataFrame:
-        hotCapacityHr = pd.Series(self.first_hotCapacityHr)
-        hotThafterLoss_supply = pd.Series(self.first_hotThafterLoss_supply)
-        hotThafterLoss_return = pd.Series(self.first_hotThafterLoss_return)
-        hotThermocline = pd.Series(self.hotThermocline(0, hotThafterLoss_supply, hotThafterLoss_return))
-        hotStatus = pd.Series(self.hotStatus(0, hotThafterLoss_supply, hotThermocline))
-        hotLoadShiftChargeRate = pd.Series(
-            self.hotLoadShiftChargeRate(0, hotStatus, hotThermocline, hotThafterLoss_return)
-        )
-        TES_H_flowInto = pd.Series(self.TES_H_flowInto(0, hotStatus, hotLoadShiftChargeRate))
-        TES_H_temp = pd.Series(self.first_TES_H_temp())
-        TES_H_flow = pd.Series(self.TES_H_flow(0, TES_H_temp))
-        TES_H_flowOut = pd.Series(self.TES_H_flowOut(0, TES_H_flow, hotThafterLoss_supply, hotStatus))
-        TES_H_th = pd.Series(self.TES_H_th(0, hotThafterLoss_supply, TES_H_flowInto, TES_H_flowOut))
-        TES_H_tc = pd.Series(self.TES_H_tc(0, hotThafterLoss_return, TES_H_flowInto, TES_H_flowOut))
-        TES_H_capacity = pd.Series(self.TES_H_capacity(0, TES_H_th))
-        TES_H_Th_F = pd.Series(self.TES_H_Th_F(0, TES_H_flowInto, TES_H_temp, hotThafterLoss_supply))
-        TES_H_temp_tc = pd.Series(self.HW_lowerTankTemp)
-        # print("TES_H_temp_tc",TES_H_temp_tc,TES_H_flowOut,hotThafterLoss_return)
-        TES_H_tc_F = pd.Series(self.TES_H_tc_F(0, TES_H_flowOut, TES_H_temp_tc, hotThafterLoss_return))
-
-        for index in range(1, 8760):
-            # new formula from second value
-            hotCapacityHr[index] = TES_H_capacity[index - 1]
-            hotThafterLoss_supply[index] = self.rest_hotThafterLoss_supply(index, hotCapacityHr, TES_H_th)
-            hotThafterLoss_return[index] = self.rest_hotThafterLoss_return(index, hotCapacityHr, TES_H_tc)
-            hotThermocline[index] = self.hotThermocline(index, hotThafterLoss_supply, hotThafterLoss_return)
-            hotStatus[index] = self.hotStatus(index, hotThafterLoss_supply, hotThermocline)
-            hotLoadShiftChargeRate[index] = self.hotLoadShiftChargeRate(
-                index, hotStatus, hotThermocline, hotThafterLoss_return
-            )
-            TES_H_flowInto[index] = self.TES_H_flowInto(index, hotStatus, hotLoadShiftChargeRate)
-            TES_H_temp[index] = TES_H_Th_F[index - 1]
-            TES_H_flow[index] = self.TES_H_flow(index, TES_H_temp)
-            TES_H_flowOut[index] = self.TES_H_flowOut(index, TES_H_flow, hotThafterLoss_supply, hotStatus)
-            TES_H_th[index] = self.TES_H_th(index, hotThafterLoss_supply, TES_H_flowInto, TES_H_flowOut)
-            TES_H_tc[index] = self.TES_H_tc(index, hotThafterLoss_return, TES_H_flowInto, TES_H_flowOut)
-            TES_H_capacity[index] = self.TES_H_capacity(index, TES_H_th)
-            TES_H_Th_F[index] = self.TES_H_Th_F(index, TES_H_flowInto, TES_H_temp, hotThafterLoss_supply)
-            TES_H_temp_tc[index] = TES_H_tc_F[index - 1]
-            TES_H_tc_F[index] = self.TES_H_tc_F(index, TES_H_flowOut, TES_H_temp_tc, hotThafterLoss_return)
-
-        df3 = pd.DataFrame(
-            {
-                "TES Hot Capacity hr-1 (%)": hotCapacityHr,
-                "TES Hot Th after losses (Gal)_supply temp": hotThafterLoss_supply,
-                "TES Hot Tc after losses (Gal)_return temp": hotThafterLoss_return,
-                "TES Hot Thermocline (Gal)": hotThermocline,
-                "TES Hot Status": hotStatus,
-                "Hot Load-Shift Charge Rate (gpm)": hotLoadShiftChargeRate,
-                "Flow into TES Hot Th (gpm)": TES_H_flowInto,
-                "TES Hot Th Previous Hour (°F)": TES_H_temp,
-                "TES Flow to meet Campus Heating (gpm)": TES_H_flow,
-                "Flow out of TES Hot Th (gpm)": TES_H_flowOut,
-                "TES Hot Th (°F)": TES_H_Th_F,
-                "TES Hot Th (Gal)": TES_H_th,
-                "TES Hot Tc (Gal)": TES_H_tc,
-                "TES Hot Capacity (%)": TES_H_capacity,
-                "districtHWRT": self.districtHWRT,
-                "TES Hot Tc Previous Hour(°F)": TES_H_temp_tc,
-                "TES Hot Tc (°F)": TES_H_tc_F,
-                # "TES Cold Th after losses (Gal)_supply temp": self.coldThafterLoss_supply,
-                # "TES Cold Tc after losses (Gal)_return temp":self.coldThafterLoss_return,
-                # "TES Cold Thermocline (Gal)": self.coldThermocline,
-            },
-            index=list(range(8760)),
-        )
-
-        return df3
+    def TES_H_plan(self) -> dict:
+        # hour-invariant inputs of the hot tank loop, computed once for the whole horizon
+        cup = self.CUP_output_df
+        load = self.totalHeating_load.to_numpy(dtype=float)
+        HW_STP = self.HW_districtSTP.to_numpy(dtype=float) - self.districtHWRT.to_numpy(dtype=float)
+        predictedHeatingMinusShift = cup["Predicted Day's Heating Load (Btu/h)"].to_numpy(dtype=float) - cup[
+            "Predicted Heating Load in Load Shift Window (Btu/h)"
+        ].to_numpy(dtype=float)
+        shiftHours = cup["Hot Load Shift Hours"].to_numpy()
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return {
+                "charging": cup["Hot Load Shift Charging"].to_numpy(dtype=bool),
+                "overload": load > self.HP_heatingCapacity,
+                "rateLimit_load": (self.HP_heatingCapacity - load) / 500 / HW_STP,
+                "rateLimit_shift": np.where(shiftHours != 0, predictedHeatingMinusShift / 500 / HW_STP / shiftHours, 0),
+                "load": load,
+                "districtHWRT": self.districtHWRT.to_numpy(dtype=float),
+                "HW_districtSTP": self.HW_districtSTP.to_numpy(dtype=float),
+            }
+
+    def TES_H_calculate(self, initial: Optional[TankState] = None) -> pd.DataFrame:
+        # `initial` resumes the run after the hour of a TankState snapshot, the frame then starts at that hour + 1
+        plan = self.TES_H_plan()
+        tank, state = _hot_tank_setup(self._tank_parameters())
+        start = 0
+        if initial is not None:
+            state, start = initial.resume("hot")
+        result = self._run_tank(_step_hot_tank, "_hotRun", plan, tank, state, start, len(plan["load"]))
+        return _hot_frame(result, self.districtHWRT, start)
 
     # def compute_2(self):
     #     # return self.hotStatus
@@ -338,8 +584,7 @@ class TES(BaseModel):
 
     ################################## COLD TANK #####################################
 
-    @computed_field
-    @property
+    @cached_computed_field
     def first_coldCapacityHr(self) -> float:
         # Calculate the value of interest (self.HW_upperTankVol / self.HW_TankVol)
         value = self.CHW_lowerTankVol / self.CHW_TankVol
@@ -352,8 +597,7 @@ class TES(BaseModel):
 
         return series[0]
 
-    @computed_field
-    @property
+    @cached_computed_field
     def first_coldThafterLoss_supply(self) -> float:
         result = self.tempAfterLosses(
             self.first_coldCapacityHr,
@@ -363,17 +607,7 @@ class TES(BaseModel):
         )
         return result[0]
 
-    def rest_coldThafterLoss_supply(self, index, TES_C_th) -> float:
-        result = self.tempAfterLosses(
-            self.TES_hotCapacityHr[index],
-            TES_C_th[index - 1],
-            self.CHW_wallLoss,
-            self.CHW_ThermocloneLoss,
-        )
-        return result[0]
-
-    @computed_field
-    @property
+    @cached_computed_field
     def first_coldThafterLoss_return(self) -> float:
         result = self.tempAfterLosses(
             self.first_coldCapacityHr,
@@ -383,30 +617,7 @@ class TES(BaseModel):
         )
         return result[0]
 
-    def rest_coldThafterLoss_return(self, index, TES_C_tc) -> float:
-        result = self.tempAfterLosses(
-            self.TES_hotCapacityHr[index],
-            TES_C_tc[index - 1],
-            self.CHW_wallLoss,
-            self.CHW_ThermocloneLoss,
-        )
-        return result[0]
-
-    def coldThermocline(self, index, coldThafterLoss_supply, coldThafterLoss_return) -> pd.Series:
-        # print("check TH",self.CHW_TankVol,coldThafterLoss_supply[index],coldThafterLoss_return[index] )
-        result = self.CHW_TankVol - coldThafterLoss_supply[index] - coldThafterLoss_return[index]
-        return result
-
-    def first_TES_C_temp(self) -> float:
-        return self.CHW_lowerTankTemp
-
-    def TES_C_flow(self, index, TES_C_temp) -> pd.Series:
-        # print("self.totalCooling_load",self.totalCooling_load)
-        # print("ccdd0",self.districtCHWRT,"kk",self.HP_CHWST)
-        return self.totalCooling_load[index] / 500 / (self.districtCHWRT[index] - TES_C_temp[index]).astype(float)
-
-    @computed_field
-    @property
+    @cached_computed_field
     def coldCharge_window(self) -> pd.Series:
         # if self.CUP_output_df["Cold Load Shift Charging"]:
         #     if self.CUP_output_df["Predicted Day's Heating Load (Btu/h)"]>self.CUP_output_df["Predicted Day's Cooling Load (Btu/h)"]:
@@ -415,253 +626,127 @@ class TES(BaseModel):
         #         result_series = False
         # else:
         #     result_series = False
-        value1 = self.CUP_output_df["Predicted Day's Heating Load (Btu/h)"]
-        value2 = self.CUP_output_df["Predicted Day's Cooling Load (Btu/h)"]
-        result_series = np.where(
-            self.CUP_output_df["Cold Load Shift Charging"],
-            np.where(value1 > value2, False, True),
-            False,
+        result_series = pd.Series(
+            _cold_charge_window(self.CUP_output_df), index=self.CUP_output_df["Cold Load Shift Charging"].index
         )
-        result_series = pd.Series(result_series, index=self.CUP_output_df["Cold Load Shift Charging"].index)
         # print("coldchargewindow",result_series)
         return result_series
 
-    def HP_C_flow(self, index) -> pd.Series:
-        return self.totalCooling_load[index] / 500 / (self.districtCHWRT[index] - self.HP_CHWST[index]).astype(float)
-
-    # def TES_H_flowInto(self,index,hotStatus,hotLoadShiftChargeRate):
-    #     return np.where(hotStatus[index]== "Charge", hotLoadShiftChargeRate[index],0)
-
-    def coldStatus(
-        self,
-        index,
-        HP_C_flow,
-        coldThafterLoss_return,
-        coldThermocline,
-        coldCharge_window,
-    ) -> pd.Series:
-        # define to conditions and then np.where is used to assign values across based on the index of the row
-        condition1 = self.HP_possRecCHW[index] > HP_C_flow[index] or coldCharge_window[index]
-        condition2 = (
-            coldThafterLoss_return[index] + coldThermocline[index] * self.thermoclineDischarge
-            <= self.CHW_TankVol * self.stopCharging
-        )
-
-        result = np.where(condition1, np.where(condition2, "Charge", "Hold"), "Discharge")
-
-        return result
-
-    def coldLoadShiftChargeRate(
-        self,
-        index,
-        coldStatus,
-        coldCharge_window,
-        coldThermocline,
-        coldThafterLoss_supply,
-    ) -> pd.Series:
-        cond1 = (coldStatus[index] == "Discharge") | (coldStatus[index] == "Hold")
-        cond2 = coldCharge_window[index]
-        value1 = (
-            self.CUP_output_df["Predicted Day's Cooling Load (Btu/h)"][index]
-            - self.CUP_output_df["Predicted Cooling Load in Load Shift Window (Btu/h)"][index]
-        )
-        value2 = (
-            value1
-            / 500
-            / (self.districtCHWRT[index] - self.HP_CHWST[index])
-            / self.CUP_output_df["Cold Load Shift Hours"][index]
-        )
-
-        max_value = np.where(self.CUP_output_df["Cold Load Shift Hours"][index] == 0, 0, value2)
-        charge_value = (coldThafterLoss_supply[index] + coldThermocline[index] * self.thermoclineDischarge) / 60
-        min_value = np.minimum(
-            self.totalCooling_load[index] / 500 / (self.districtCHWRT[index] - self.HP_CHWST[index]),
-            charge_value,
-        )
-        # Check type and shape of key variables
-        # print(f"Type of charge_value: {type(charge_value)}, Shape: {charge_value.shape},",charge_value)
-        # print(f"Type of min_value: {type(min_value)}, Shape: {min_value.shape}",min_value)
-        # print(f"check yhid too : {type(self.HP_possRecCHW[index]),self.HP_possRecCHW[index]} and {type(self.coldMaxflow),self.coldMaxflow}")
-        result = np.where(
-            cond1,
-            0,
-            np.where(
-                cond2,
-                np.minimum(
-                    np.maximum(max_value, self.HP_possRecCHW[index]),
-                    charge_value,
-                    np.array(self.coldMaxflow),
+    def TES_C_plan(self) -> dict:
+        # hour-invariant inputs of the cold tank loop, computed once for the whole horizon
+        cup = self.CUP_output_df
+        load = self.totalCooling_load.to_numpy(dtype=float)
+        districtCHWRT = self.districtCHWRT.to_numpy(dtype=float)
+        HP_CHWST = self.HP_CHWST.to_numpy(dtype=float)
+        predictedCooling = cup["Predicted Day's Cooling Load (Btu/h)"].to_numpy(dtype=float)
+        predictedCoolingShift = cup["Predicted Cooling Load in Load Shift Window (Btu/h)"].to_numpy(dtype=float)
+        shiftHours = cup["Cold Load Shift Hours"].to_numpy()
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return {
+                "lossCapacity": None
+                if self.TES_hotCapacityHr is None
+                else self.TES_hotCapacityHr.to_numpy(dtype=float),
+                # read from the frame rather than the cached coldCharge_window, so a frame edited in place
+                # is diffed against the last run
+                "chargeWindow": _cold_charge_window(cup).astype(bool),
+                "possRecCHW": self.HP_possRecCHW.to_numpy(dtype=float),
+                "HP_C_flow": load / 500 / (districtCHWRT - HP_CHWST),
+                "TES_C_flow": load / 500 / (districtCHWRT - self.CHW_lowerTankTemp),
+                "rateLimit_shift": np.where(
+                    shiftHours == 0,
+                    0,
+                    (predictedCooling - predictedCoolingShift) / 500 / (districtCHWRT - HP_CHWST) / shiftHours,
                 ),
-                np.minimum(self.HP_possRecCHW[index] - min_value, self.coldMaxflow),
-            ),
-        )
-        # print("cond", cond1, cond2)
-        # print(result)
-        return result
-
-    def TES_C_flowInto(self, index, coldStatus, coldLoadShiftChargeRate) -> pd.Series:
-        return np.where(coldStatus[index] == "Charge", coldLoadShiftChargeRate[index], 0)
-
-    # def TES_H_flow(self,index,TES_H_temp):
-    #     # print("xxx",self.totalHeating_load,"xxx",self.H_tempTES,"xxx",self.districtHWRT)
-    #     return self.totalHeating_load[index]/500/(TES_H_temp[index]-self.districtHWRT[index]).astype(float)
-
-    def TES_C_flowOut(self, index, TES_C_flow, coldThafterLoss_return, coldStatus) -> pd.Series:
-        minimum = min(
-            TES_C_flow[index],
-            self.coldMaxflow,
-            (coldThafterLoss_return[index] / 60).astype(float),
-        )
-        return np.where(coldStatus[index] == "Discharge", minimum, 0).astype(float)
-
-    def TES_C_th(self, index, coldThafterLoss_supply, TES_C_flowInto, TES_C_flowOut) -> pd.Series:
-        # print(TES_C_flowInto[index],coldThafterLoss_supply[index],coldThafterLoss_supply[index],TES_C_flowInto[index]),TES_C_flowOut)
-        value1 = (
-            np.where(
-                TES_C_flowInto[index] * 60 > coldThafterLoss_supply[index],
-                coldThafterLoss_supply[index],
-                TES_C_flowInto[index] * 60,
-            )
-            + TES_C_flowOut[index] * 60
-        )
-        return coldThafterLoss_supply[index] - value1
-
-    def TES_C_tc(self, index, coldThafterLoss_return, TES_C_flowInto, TES_C_flowOut) -> pd.Series:
-        # print(type(TES_C_flowInto))
-        value1 = coldThafterLoss_return[index] + TES_C_flowInto[index] * 60
-        value2 = np.where(
-            TES_C_flowOut[index] * 60 > coldThafterLoss_return[index],
-            coldThafterLoss_return[index],
-            TES_C_flowOut[index] * 60,
-        )
-        return value1 - value2
-
-    def TES_C_tc_F(self, index, TES_C_flowInto, TES_C_temp, coldThafterLoss_return) -> pd.Series:
-        if TES_C_flowInto[index] > 0:
-            return (
-                TES_C_temp[index] * coldThafterLoss_return[index] + (self.HP_CHWST[index] * TES_C_flowInto[index] * 60)
-            ) / (coldThafterLoss_return[index] + TES_C_flowInto[index] * 60)
+                "HP_CHWST": HP_CHWST,
+                "districtCHWRT": districtCHWRT,
+            }
+
+    def TES_C_calculate(self, initial: Optional[TankState] = None) -> pd.DataFrame:
+        plan = self.TES_C_plan()
+        tank, state = _cold_tank_setup(self._tank_parameters())
+        start = 0
+        if initial is not None:
+            state, start = initial.resume("cold")
+        result = self._run_tank(_step_cold_tank, "_coldRun", plan, tank, state, start, len(plan["possRecCHW"]))
+        return _cold_frame(result, plan, self.CHW_lowerTankTemp, start)
+
+    def _run_tank(self, step, runName: str, plan: dict, tank: dict, state: tuple, start: int, stop: int) -> dict:
+        # resimulate from the first hour whose inputs differ from the previous run, keeping the stored
+        # trajectory before it
+        previous = getattr(self, runName)
+        resume = start
+        if (
+            previous is not None
+            and previous["start"] == start
+            and previous["tank"] == tank
+            and previous["state"] == state
+        ):
+            resume = max(start, _first_difference(previous["plan"], plan, stop))
+
+        if resume == start:
+            result = step(plan, tank, state, start, stop)
         else:
-            return TES_C_temp[index]
-
-    def TES_C_capacity(self, index, TES_C_tc_F, TES_C_tc) -> pd.Series:
-        # print("trial",TES_C_tc_F[index],self.CHW_lowerTankTemp,TES_C_tc[index],self.CHW_TankVol)
-        try:
-            epsilon = 1e-6  # Adjust epsilon based on your tolerance requirement
-            if abs(TES_C_tc_F[index] - self.CHW_lowerTankTemp) <= epsilon:
-                # if TES_C_tc_F[index] <= self.CHW_lowerTankTemp:
-                result = TES_C_tc[index] / self.CHW_TankVol
-            else:
-                result = 0
-        except ValueError:
-            result = 0
+            kept = previous["result"]
+            k = resume - start
+            resumeState = tuple(kept[name][k - 1] for name in ("capacity", "th", "tc", "th_F", "tc_F"))
+            tail = step(plan, tank, resumeState, resume, stop)
+            result = {name: np.concatenate([kept[name][:k], tail[name]]) for name in kept}
+
+        # plan arrays can be views of the input series, keep a copy to diff the next run against
+        plan = {name: None if value is None else np.array(value) for name, value in plan.items()}
+        setattr(self, runName, {"start": start, "tank": tank, "state": state, "plan": plan, "result": result})
         return result
 
-    def TES_C_th_F(self, index, TES_C_flowInto, TES_C_previousHour_th, coldThafterLoss_supply) -> pd.Series:
-        if TES_C_flowInto[index] < 0:
-            value1 = TES_C_previousHour_th[index] * coldThafterLoss_supply[index] - (
-                self.districtCHWRT * TES_C_flowInto[index] * 60
-            )
-            value2 = coldThafterLoss_supply[index] - TES_C_flowInto[index] * 60
-            return value1 / value2
-        else:
-            return TES_C_previousHour_th[index]
-
-    def TES_C_calculate(self) -> pd.DataFrame:
-        coldCapacityHr = pd.Series(self.first_coldCapacityHr)
-        coldThafterLoss_supply = pd.Series(self.first_coldThafterLoss_supply)
-        coldThafterLoss_return = pd.Series(self.first_coldThafterLoss_return)
-        coldThermocline = pd.Series(self.coldThermocline(0, coldThafterLoss_supply, coldThafterLoss_return))
-        TES_C_temp = pd.Series(self.first_TES_C_temp())
-        TES_C_flow = pd.Series(self.TES_C_flow(0, TES_C_temp))
-        HP_C_flow = pd.Series(self.HP_C_flow(0))
-        coldCharge_window = self.coldCharge_window
-
-        coldStatus = pd.Series(
-            self.coldStatus(0, HP_C_flow, coldThafterLoss_return, coldThermocline, coldCharge_window)
-        )
-        coldLoadShiftChargeRate = pd.Series(
-            self.coldLoadShiftChargeRate(
-                0,
-                coldStatus,
-                coldCharge_window,
-                coldThermocline,
-                coldThafterLoss_supply,
-            )
+    def _tank_parameters(self, overrides: Optional[dict] = None) -> dict:
+        parameters = {name: getattr(self, name) for name in TANK_PARAMETERS}
+        parameters.update(overrides or {})
+        return parameters
+
+    def TES_sweep(self, **parameters) -> "TESSweep":
+        """Simulate several tank configurations together in one time loop.
+
+        Each keyword is one of `SWEEP_PARAMETERS` and takes an array with one value per
+        configuration (scalars are broadcast); parameters that are not given keep the instance
+        value. The cold tank is only simulated when `HP_possRecCHW` and `HP_CHWST` are set, its
+        losses follow the hot tank capacity of the same configuration.
+
+        Returns:
+            TESSweep: the parameters of each configuration and the results stacked as
+            configs x hours x columns.
+        """
+        unknown = sorted(set(parameters).difference(SWEEP_PARAMETERS))
+        if unknown:
+            raise SweepParameterError(unknown)
+        names = list(parameters)
+        values = np.broadcast_arrays(*(np.atleast_1d(np.asarray(parameters[name], dtype=float)) for name in names))
+        n_configs = len(values[0]) if values else 1
+        tankParameters = {
+            name: np.full(n_configs, value, dtype=float) for name, value in self._tank_parameters().items()
+        }
+        tankParameters.update(zip(names, values))
+
+        hotPlan = self.TES_H_plan()
+        hours = len(hotPlan["load"])
+        tank, state = _hot_tank_setup(tankParameters)
+        hot = _step_hot_tank(hotPlan, tank, state, 0, hours)
+
+        cold = None
+        coldPlan = None
+        if self.HP_possRecCHW is not None and self.HP_CHWST is not None:
+            coldPlan = {**self.TES_C_plan(), "lossCapacity": hot["capacityHr"]}
+            tank, state = _cold_tank_setup(tankParameters)
+            cold = _stack(_step_cold_tank(coldPlan, tank, state, 0, hours), COLD_SWEEP_COLUMNS)
+
+        return TESSweep(
+            parameters=pd.DataFrame({name: tankParameters[name] for name in SWEEP_PARAMETERS}),
+            hot=_stack(hot, HOT_SWEEP_COLUMNS),
+            cold=cold,
+            districtHWRT=self.districtHWRT,
+            coldPlan=coldPlan,
+            CHW_lowerTankTemp=self.CHW_lowerTankTemp,
         )
 
-        TES_C_flowInto = pd.Series(self.TES_C_flowInto(0, coldStatus, coldLoadShiftChargeRate))
-        TES_C_flowOut = pd.Series(self.TES_C_flowOut(0, TES_C_flow, coldThafterLoss_return, coldStatus))
-
-        TES_C_th = pd.Series(self.TES_C_th(0, coldThafterLoss_supply, TES_C_flowInto, TES_C_flowOut))
-        TES_C_tc = pd.Series(self.TES_C_tc(0, coldThafterLoss_return, TES_C_flowInto, TES_C_flowOut))
-        TES_C_tc_F = pd.Series(self.TES_C_tc_F(0, TES_C_flowInto, TES_C_temp, coldThafterLoss_return))
-        TES_C_capacity = pd.Series(self.TES_C_capacity(0, TES_C_tc_F, TES_C_tc))
-        TES_C_previousHour_th = pd.Series(self.CHW_upperTankTemp)
-        TES_C_th_F = pd.Series(self.TES_C_th_F(0, TES_C_flowInto, TES_C_previousHour_th, coldThafterLoss_supply))
-
-        for index in range(1, 8760):
-            # new formula from second value
-            coldCapacityHr[index] = TES_C_capacity[index - 1]
-            coldThafterLoss_supply[index] = self.rest_coldThafterLoss_supply(index, TES_C_th)
-            coldThafterLoss_return[index] = self.rest_coldThafterLoss_return(index, TES_C_tc)
-            coldThermocline[index] = self.coldThermocline(index, coldThafterLoss_supply, coldThafterLoss_return)
-            TES_C_temp[index] = self.first_TES_C_temp()
-            TES_C_flow[index] = self.TES_C_flow(index, TES_C_temp)
-            HP_C_flow[index] = self.HP_C_flow(index)
-            coldCharge_window = self.coldCharge_window
-
-            coldStatus[index] = self.coldStatus(
-                index,
-                HP_C_flow,
-                coldThafterLoss_return,
-                coldThermocline,
-                coldCharge_window,
-            )
-
-            coldLoadShiftChargeRate[index] = self.coldLoadShiftChargeRate(
-                index,
-                coldStatus,
-                coldCharge_window,
-                coldThermocline,
-                coldThafterLoss_supply,
-            )
-
-            TES_C_flowInto[index] = self.TES_C_flowInto(index, coldStatus, coldLoadShiftChargeRate)
-            TES_C_flowOut[index] = self.TES_C_flowOut(index, TES_C_flow, coldThafterLoss_return, coldStatus)
-            TES_C_th[index] = self.TES_C_th(index, coldThafterLoss_supply, TES_C_flowInto, TES_C_flowOut)
-            TES_C_tc[index] = self.TES_C_tc(index, coldThafterLoss_return, TES_C_flowInto, TES_C_flowOut)
-            TES_C_tc_F[index] = self.TES_C_tc_F(index, TES_C_flowInto, TES_C_temp, coldThafterLoss_return)
-            TES_C_capacity[index] = self.TES_C_capacity(index, TES_C_tc_F, TES_C_tc)
-            TES_C_previousHour_th[index] = TES_C_th_F[index - 1]
-            TES_C_th_F[index] = self.TES_C_th_F(index, TES_C_flowInto, TES_C_previousHour_th, coldThafterLoss_supply)
-
-        df4 = pd.DataFrame(
-            {
-                "TES Cold Capacity hr-1 (%)": coldCapacityHr,
-                "TES Cold Th after losses (Gal)_supply temp": coldThafterLoss_supply,
-                "TES Cold Tc after losses (Gal)_return temp": coldThafterLoss_return,
-                "TES Cold Thermocline (Gal)": coldThermocline,
-                "TES Cold Charge Window Adjustment": coldCharge_window,
-                "TES Cold Status": coldStatus,
-                "Cold Load-Shift Charge Rate (gpm)": coldLoadShiftChargeRate,
-                "TES Cold Tc Previous Hour (°F)": TES_C_temp,
-                "TES Flow to meet Campus Heating (gpm)": TES_C_flow,
-                "HP Flow to meet Campus Cooling (gpm)": HP_C_flow,
-                "Flow into TES Cold Tc (gpm)": TES_C_flowInto,
-                "Flow out of TES Cold Tc (gpm)": TES_C_flowOut,
-                "TES Cold Th (Gal)": TES_C_th,
-                "TES Cold Tc (Gal)": TES_C_tc,
-                "TES Cold Tc (°F)": TES_C_tc_F,
-                "TES Cold Capacity (%)": TES_C_capacity,
-                "TES Cold Th (°F)": TES_C_th_F,
-                "TES Cold Th Previous Hour (°F)": TES_C_previousHour_th,
-            },
-            index=list(range(8760)),
-        )
-
-        return df4
-
     ############################### hot and cold output df####################################
 
     # @computed_field
@@ -676,32 +761,25 @@ class TES(BaseModel):
     #     cold_output_df = self.TES_C_calculate()
     #     return cold_output_df
 
-    @property
+    @memoized_property
     def hot_df(self) -> pd.DataFrame:
-        if not hasattr(self, "_cached_hot_df"):
-            self._cached_hot_df = self.TES_H_calculate()
-        return self._cached_hot_df
+        return self.TES_H_calculate()
 
-    @property
+    @memoized_property
     def cold_df(self) -> pd.DataFrame:
-        if not hasattr(self, "_cached_cold_df"):
-            self._cached_cold_df = self.TES_C_calculate()
-        return self._cached_cold_df
+        return self.TES_C_calculate()
 
     ################################## Remaining columns ########################################
 
-    @computed_field
-    @property
+    @cached_computed_field
     def hot_binaryStatus(self) -> pd.Series:
         return np.where(self.hot_df["TES Hot Status"] == "Discharge", 1, 0)
 
-    @computed_field
-    @property
+    @cached_computed_field
     def cold_binaryStatus(self) -> pd.Series:
         return np.where(self.cold_df["TES Cold Status"] == "Discharge", 1, 0)
 
-    @computed_field
-    @property
+    @cached_computed_field
     def H_tempOut(self) -> pd.Series:
         # Convert input lists to NumPy arrays for vectorized operations
         AL = np.array(self.hot_df["TES Hot Status"])
@@ -755,8 +833,7 @@ class TES(BaseModel):
 
         return result
 
-    @computed_field
-    @property
+    @cached_computed_field
     def H_energyOut(self) -> pd.Series:
         # =(O3-P3)*500*AR3-(AT3-P3)*500*AS3
         value1 = self.HW_districtSTP - self.districtHWRT
@@ -767,8 +844,7 @@ class TES(BaseModel):
         )
         return result_series
 
-    @computed_field
-    @property
+    @cached_computed_field
     def C_tempOut(self) -> pd.Series:
         # Convert input lists to NumPy arrays for vectorized operations
         AO = np.array(self.cold_df["TES Cold Status"])
@@ -824,33 +900,28 @@ class TES(BaseModel):
 
         return result
 
-    @computed_field
-    @property
+    @cached_computed_field
     def C_energyOut(self) -> pd.Series:
         value1 = (self.districtCHWRT - self.HP_CHWST) * 500 * self.cold_df["Flow into TES Cold Tc (gpm)"]
         value2 = (self.districtCHWRT - self.C_tempOut) * 500 * self.cold_df["Flow out of TES Cold Tc (gpm)"]
         return value1 - value2
 
-    @computed_field
-    @property
+    @cached_computed_field
     def TES_H_thermocline(self) -> pd.Series:
         return self.HW_TankVol - self.hot_df["TES Hot Th (Gal)"] - self.hot_df["TES Hot Tc (Gal)"]
 
-    @computed_field
-    @property
+    @cached_computed_field
     def TES_H_capacityKbtu(self) -> pd.Series:
         # =('Input Fields'!$G$39*BB3*(AZ3-P3)/1000)
         value = self.hot_df["TES Hot Th (Gal)"] * (self.hot_df["TES Hot Th (°F)"] - self.districtHWRT)
         return self.conversion_galToLbs * value / 1000
 
-    @computed_field
-    @property
+    @cached_computed_field
     def TES_C_capacityKbtu(self) -> pd.Series:
         value = self.cold_df["TES Cold Tc (Gal)"] * (self.districtCHWRT - self.cold_df["TES Cold Tc (°F)"])
         return self.conversion_galToLbs * value / 1000
 
-    @computed_field
-    @property
+    @cached_computed_field
     def check(self) -> pd.Series:
         return (
             self.hot_df["Flow into TES Hot Th (gpm)"] * self.hot_df["Flow out of TES Hot Th (gpm)"]
@@ -876,3 +947,31 @@ class TES(BaseModel):
         )
 
         return df5
+
+
+class TESSweep(BaseModel):
+    # result of TES.TES_sweep, row i of `parameters` is configuration i of `hot` and `cold`
+    parameters: pd.DataFrame
+    hot: np.ndarray
+    cold: Optional[np.ndarray] = None
+    districtHWRT: pd.Series
+    coldPlan: Optional[dict] = None
+    CHW_lowerTankTemp: float
+
+    class Config:
+        arbitrary_types_allowed = True
+
+    @staticmethod
+    def _unstack(stacked: np.ndarray, columns: list, config: int) -> dict:
+        result = {name: stacked[config, :, k] for k, name in enumerate(columns)}
+        result["status"] = result["status"].astype(np.int8)
+        return result
+
+    def hot_frame(self, config: int) -> pd.DataFrame:
+        # same layout as TES.TES_H_calculate for one configuration
+        return _hot_frame(self._unstack(self.hot, HOT_SWEEP_COLUMNS, config), self.districtHWRT)
+
+    def cold_frame(self, config: int) -> pd.DataFrame:
+        # same layout as TES.TES_C_calculate for one configuration
+        result = self._unstack(self.cold, COLD_SWEEP_COLUMNS, config)
+        return _cold_frame(result, self.coldPlan, self.CHW_lowerTankTemp)
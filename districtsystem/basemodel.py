@@ -1,7 +1,62 @@
+import functools
 import uuid
 
-from pydantic import UUID4, BaseModel, Field
+from pydantic import UUID4, BaseModel, Field, PrivateAttr, computed_field
 
 
 class BaseEquipment(BaseModel):
     bldg_id: UUID4 = Field(default_factory=uuid.uuid4, description="The unique id of the equipment")
+
+
+class CachedModel(BaseModel):
+    # properties declared with memoized_property or cached_computed_field are evaluated once per instance;
+    # assigning any field drops every cached value, so values derived from the old inputs never leak
+    # (a field edited in place is not seen, call clear_cache() afterwards); a subclass keeping other state
+    # derived from its fields drops it in an overridden clear_cache()
+    _cache: dict = PrivateAttr(default_factory=dict)
+    _cacheStats: dict = PrivateAttr(default_factory=dict)  # property -> [hits, misses]
+
+    def __setattr__(self, name, value):
+        super().__setattr__(name, value)
+        if name in type(self).model_fields:
+            self.clear_cache()
+
+    def model_copy(self, *, update=None, deep=False):
+        copied = super().model_copy(update=update, deep=deep)
+        # a plain copy keeps the values computed so far, replaced fields start from an empty cache
+        copied._cache = {} if update else dict(self._cache)
+        copied._cacheStats = {}
+        return copied
+
+    def clear_cache(self) -> None:
+        self._cache.clear()
+
+    @property
+    def cache_info(self) -> dict:
+        # hits and misses of each cached property since the instance was created
+        return {name: {"hits": hits, "misses": misses} for name, (hits, misses) in self._cacheStats.items()}
+
+
+def memoized_property(func) -> property:
+    # a property of a CachedModel computed on first access and reused until a field is assigned
+    name = func.__name__
+
+    @functools.wraps(func)
+    def getter(self):
+        stats = self._cacheStats.setdefault(name, [0, 0])
+        if name in self._cache:
+            stats[0] += 1
+            return self._cache[name]
+        stats[1] += 1
+        value = func(self)
+        self._cache[name] = value
+        return value
+
+    return property(getter)
+
+
+def cached_computed_field(func=None, **kwargs):
+    # @computed_field @property, memoized per instance; still part of model_dump
+    if func is None:
+        return lambda f: computed_field(memoized_property(f), **kwargs)
+    return computed_field(memoized_property(func))
@@ -0,0 +1,195 @@
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from districtsystem.basemodel import CachedModel, cached_computed_field, memoized_property
+from districtsystem.building_staticInputs import BuildingParameters
+
+
+class BuildingFleet(CachedModel):
+    # every Building formula for B buildings at once: loads are buildings x hours arrays, per-building
+    # scalars are length-B vectors and the shared parameters broadcast over the buildings axis
+    parameters: BuildingParameters
+    caan_no: np.ndarray
+    coolingLoad: np.ndarray
+    heatingLoad: np.ndarray
+    DHWLoad: np.ndarray
+    timeStamp: pd.Series
+    CHW_maxLoad: np.ndarray
+    DHW_maxLoad: np.ndarray
+    DHW_loadMinApproach: np.ndarray
+
+    class Config:
+        arbitrary_types_allowed = True
+
+    @classmethod
+    def from_loads(
+        cls,
+        loads: pd.DataFrame,
+        parameters: BuildingParameters,
+        timeStamp: pd.Series,
+        building: str = "Building ID CAAN",
+        cooling: str = "Current New CUP Cooling Load (kBtu)",
+        heating: str = "Current New CUP Heating Load (kBtu)",
+        DHW: str = "Current New CUP Hot Water Load (kBtu)",
+    ) -> "BuildingFleet":
+        # long kBtu loads (one block of hours per building) as the building notebook reads them
+        caan, rows = pd.factorize(loads[building])
+        # position of each row within its building's block
+        order = np.argsort(caan, kind="stable")
+        counts = np.bincount(caan)
+        hour = np.empty(len(caan), dtype=int)
+        hour[order] = np.arange(len(caan)) - np.repeat(np.cumsum(counts) - counts, counts)
+
+        def matrix(column):
+            values = np.full((len(rows), hour.max() + 1), np.nan)
+            values[caan, hour] = loads[column].to_numpy() * 1000
+            return values
+
+        coolingLoad, heatingLoad, DHWLoad = matrix(cooling), matrix(heating), matrix(DHW)
+        DHW_maxLoad = pd.DataFrame(DHWLoad).max(axis=1).to_numpy()
+        # a building without DHW has no max load rather than a zero one
+        DHW_maxLoad[DHW_maxLoad == 0] = np.nan
+        return cls(
+            parameters=parameters,
+            caan_no=np.asarray(rows),
+            coolingLoad=coolingLoad,
+            heatingLoad=heatingLoad,
+            DHWLoad=DHWLoad,
+            timeStamp=timeStamp,
+            CHW_maxLoad=pd.DataFrame(coolingLoad).max(axis=1).to_numpy(),
+            DHW_maxLoad=DHW_maxLoad,
+            DHW_loadMinApproach=DHW_maxLoad * 0.26,
+        )
+
+    def _perBuilding(self, values: np.ndarray) -> np.ndarray:
+        return np.asarray(values, dtype=float)[:, np.newaxis]
+
+    @cached_computed_field
+    def loopHWST(self) -> np.ndarray:
+        return (self.parameters.HW_LoopSTP + self.parameters.HW_supplyLosses).to_numpy()
+
+    @cached_computed_field
+    def loopCHWST(self) -> np.ndarray:
+        return (self.parameters.CHW_LoopSTP + self.parameters.CHW_supplyLosses).to_numpy()
+
+    @cached_computed_field
+    def CHWRT(self) -> np.ndarray:
+        slope = (self.parameters.CHW_deltaT_Max - self.parameters.CHW_deltaT_Min) / self._perBuilding(self.CHW_maxLoad)
+        return (self.loopCHWST + slope * self.coolingLoad) + self.parameters.CHW_deltaT_Min
+
+    @cached_computed_field
+    def CHWRflow(self) -> np.ndarray:
+        return self.coolingLoad / 500 / (self.CHWRT - self.loopCHWST)
+
+    @cached_computed_field
+    def min_index(self) -> np.ndarray:
+        # supply temperature row nearest each hour's building HHW setpoint, the same for every building
+        diff = self.parameters.HHW_BldgSTP.values[:, np.newaxis] - self.parameters.HHW_supply_Temps.values
+        return np.argmin(np.abs(diff), axis=1)
+
+    @cached_computed_field
+    def HHWRT(self) -> Optional[np.ndarray]:
+        try:
+            delta = self.parameters.HHW_return_Temps[self.min_index].values
+        except IndexError:
+            return None
+        return self.parameters.HHW_BldgSTP.to_numpy() - delta
+
+    @cached_computed_field
+    def HHWRflow(self) -> np.ndarray:
+        return self.heatingLoad / 500 / (self.parameters.HHW_BldgSTP.to_numpy() - self.HHWRT)
+
+    @cached_computed_field
+    def DHWtemp(self) -> np.ndarray:
+        return self.parameters.DHWSetpoint[self.parameters.DHW_indices].to_numpy()
+
+    @cached_computed_field
+    def DHWRT(self) -> np.ndarray:
+        maxApproach, minApproach = self.parameters.DHWmaxApproach, self.parameters.DHWminApproach
+        DHW_maxLoad = self._perBuilding(self.DHW_maxLoad)
+        span = (maxApproach - minApproach) / (1 - self._perBuilding(self.DHW_loadMinApproach) / DHW_maxLoad)
+        return self.DHWtemp + np.maximum(minApproach, span * self.DHWLoad / DHW_maxLoad + maxApproach - span)
+
+    @cached_computed_field
+    def DHWRflow(self) -> np.ndarray:
+        return self.DHWLoad / 500 / (self.loopHWST - self.DHWRT)
+
+    @memoized_property
+    def hotWaterBalance(self) -> dict:
+        # heating-hot-water and DHW mixing at the building, evaluated once for every downstream output
+        HHWRT, HHWRflow, DHWRflow = self.HHWRT, self.HHWRflow, self.DHWRflow
+        numerator = HHWRflow * (self.parameters.HHW_BldgSTP.to_numpy() - HHWRT)
+        denominator = np.broadcast_to(self.loopHWST - HHWRT, numerator.shape)
+        # Series.div(fill_value=0): a NaN on one side only counts as 0, NaN on both stays NaN
+        numerator_nan, denominator_nan = np.isnan(numerator), np.isnan(denominator)
+        numerator = np.where(numerator_nan & ~denominator_nan, 0.0, numerator)
+        denominator = np.where(denominator_nan & ~numerator_nan, 0.0, denominator)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            districtHWSflow = DHWRflow + numerator / denominator
+        bypassHHWS = HHWRflow - (districtHWSflow - DHWRflow)
+        HWRflow = HHWRflow - bypassHHWS + DHWRflow
+
+        value_1 = HHWRT * (HHWRflow - bypassHHWS) + DHWRflow * self.DHWRT
+        dhwrt = (value_1 / np.where(districtHWSflow == 0, np.nan, districtHWSflow)) + self.parameters.HW_returnLosses
+        tolerance = 1e-6
+        return {
+            "districtHWSflow": districtHWSflow,
+            "bypassHHWS": bypassHHWS,
+            "HWRflow": HWRflow,
+            "districtHWRT": np.where(np.isnan(dhwrt), 0.0, dhwrt),
+            "HWSequalHWR": abs(districtHWSflow - HWRflow) < tolerance,
+        }
+
+    @cached_computed_field
+    def districtHWSflow(self) -> np.ndarray:
+        return self.hotWaterBalance["districtHWSflow"]
+
+    @cached_computed_field
+    def bypassHHWS(self) -> np.ndarray:
+        return self.hotWaterBalance["bypassHHWS"]
+
+    @cached_computed_field
+    def HWRflow(self) -> np.ndarray:
+        return self.hotWaterBalance["HWRflow"]
+
+    @cached_computed_field
+    def districtHWRT(self) -> np.ndarray:
+        return self.hotWaterBalance["districtHWRT"]
+
+    @cached_computed_field
+    def HWSequalHWR(self) -> np.ndarray:
+        return self.hotWaterBalance["HWSequalHWR"]
+
+    def compute(self) -> pd.DataFrame:
+        # the long frame of every Building.compute() concatenated in fleet order
+        buildings, hours = self.coolingLoad.shape
+        balance = self.hotWaterBalance
+
+        def long(values):
+            return np.broadcast_to(values, (buildings, hours)).ravel()
+
+        df = pd.DataFrame({
+            "caan_no": np.repeat(self.caan_no, hours),
+            "Time Stamp": np.tile(self.timeStamp.to_numpy(), buildings),
+            "Space Heating Load (Btu/h)": long(self.heatingLoad),
+            "DHW Load (Btu/h)": long(self.DHWLoad),
+            "Cooling Load (Btu/h)": long(self.coolingLoad),
+            "Loop HWST @ Building (°F)": long(self.loopHWST),
+            "Loop CHWST @ Building (°F)": long(self.loopCHWST),
+            "CHWRT (°F)": long(self.CHWRT),
+            "CHWR Flow (gpm)": long(self.CHWRflow),
+            "Building HHWRT (°F)": long(self.HHWRT),
+            "HHWRflow": long(self.HHWRflow),
+            "Building Domestic Water Temp (°F)": long(self.DHWtemp),
+            "Building DHWRT (°F)": long(self.DHWRT),
+            "Building DHWR Flow (gpm)": long(self.DHWRflow),
+            "District HWS Flow (gpm)": long(balance["districtHWSflow"]),
+            "Bypassed Return to HHWS (gpm)": long(balance["bypassHHWS"]),
+            "District HWR Flow (gpm)": long(balance["HWRflow"]),
+            "District HWRT (°F)": long(balance["districtHWRT"]),
+            "Check Building HWS = HWR": long(balance["HWSequalHWR"]),
+        })
+
+        return df
@@ -0,0 +1,162 @@
+import contextlib
+import glob
+import json
+import os
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from pydantic import BaseModel
+
+# per-sqft simulation results the loads and usage calculation reads from every building CSV
+LOAD_COLUMNS = (
+    "cooling.load.kBtu_per_sqft",
+    "heating.load.kBtu_per_sqft",
+    "equipment.elec.kBtu_per_sqft",
+    "lighting.elec.kBtu_per_sqft",
+    "fans.elec.kBtu_per_sqft",
+    "pumps.elec.kBtu_per_sqft",
+)
+
+
+class BuildingLoadsLengthError(ValueError):
+    def __init__(self, path, rows, hours):
+        super().__init__(f"{path} has {rows} rows, the other building loads have {hours}")
+
+
+def file_key(path) -> Optional[list]:
+    # a cached building is reused while its CSV keeps the same size and modification time
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+class BuildingLoadStore(BaseModel):
+    # the per-building simulation CSVs (in_{Simulation_id}.csv) of `folder`, parsed concurrently by at most
+    # max_workers threads and kept as one columnar (columns x buildings x hours) cache next to them;
+    # buildings whose CSV is unchanged are memory-mapped from the cache instead of being parsed again.
+    # The cache is an index (.json) naming the values file (.<generation>.npy) it describes
+    folder: str
+    columns: Tuple[str, ...] = LOAD_COLUMNS
+    dtype: str = "float32"
+    max_workers: int = 8
+    cache_name: str = ".building_loads_cache"
+
+    def csv_path(self, simulation_id: str) -> str:
+        return os.path.join(self.folder, f"in_{simulation_id}.csv")
+
+    @property
+    def index_path(self) -> str:
+        # the columns, the values file and the row of every building in it
+        return os.path.join(self.folder, f"{self.cache_name}.json")
+
+    def read_cache(self) -> Tuple[dict, Optional[np.ndarray]]:
+        try:
+            with open(self.index_path) as f:
+                index = json.load(f)
+            values = np.load(os.path.join(self.folder, index["values"]), mmap_mode="r")
+        except (FileNotFoundError, KeyError, ValueError):
+            return {}, None
+        # a cache written for other columns or another dtype is not reused
+        if (
+            index.get("columns") != list(self.columns)
+            or values.dtype != np.dtype(self.dtype)
+            or values.shape[:2] != (len(self.columns), len(index["files"]))
+        ):
+            return {}, None
+        return index["files"], values
+
+    def read_csv(self, path: str) -> Optional[np.ndarray]:
+        try:
+            df = pd.read_csv(path, usecols=list(self.columns), dtype=self.dtype)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"Error occurred while processing file {path}: {e!s}")
+            return None
+        return df[list(self.columns)].to_numpy().T
+
+    def write_cache(self, files: dict, values: np.ndarray) -> np.ndarray:
+        # the values go to a new file of their own generation and only then is the index naming them swapped
+        # in: an interrupted run leaves the previous index with its values, and no values file still
+        # memory-mapped by a reader is ever replaced
+        values_name = f"{self.cache_name}.{uuid.uuid4().hex}.npy"
+        np.save(os.path.join(self.folder, values_name), values)
+        with open(f"{self.index_path}.tmp", "w") as f:
+            json.dump({"columns": list(self.columns), "values": values_name, "files": files}, f)
+        os.replace(f"{self.index_path}.tmp", self.index_path)
+        self.remove_values(keep=values_name)
+        return np.load(os.path.join(self.folder, values_name), mmap_mode="r")
+
+    def remove_values(self, keep: str) -> None:
+        # values files of earlier generations or interrupted runs; one still mapped (on Windows) is removed
+        # by a later write
+        pattern = os.path.join(glob.escape(self.folder), f"{glob.escape(self.cache_name)}.*.npy")
+        for path in glob.glob(pattern):
+            if os.path.basename(path) != keep:
+                with contextlib.suppress(OSError):
+                    os.remove(path)
+
+    def update_cache(self, keys: dict) -> Tuple[dict, Optional[np.ndarray]]:
+        # {path: key} of the CSVs wanted, the ones missing from the cache or changed since are parsed again
+        files, values = self.read_cache()
+        stale = [path for path, key in keys.items() if key is not None and files.get(path, {}).get("key") != key]
+        if not stale:
+            return files, values
+        with ThreadPoolExecutor(max_workers=max(1, min(self.max_workers, len(stale)))) as pool:
+            parsed = dict(zip(stale, pool.map(self.read_csv, stale)))
+        parsed = {path: loads for path, loads in parsed.items() if loads is not None}
+        if not parsed:
+            return files, values
+
+        # cached buildings whose CSV is unchanged, then the ones just parsed
+        kept = {path: entry for path, entry in files.items() if path not in parsed and file_key(path) == entry["key"]}
+        hours = values.shape[2] if kept else next(iter(parsed.values())).shape[1]
+        for path, loads in parsed.items():
+            if loads.shape[1] != hours:
+                raise BuildingLoadsLengthError(path, loads.shape[1], hours)
+        merged = np.empty((len(self.columns), len(kept) + len(parsed), hours), dtype=self.dtype)
+        files = {}
+        for row, (path, entry) in enumerate(kept.items()):
+            merged[:, row] = values[:, entry["row"]]
+            files[path] = {"key": entry["key"], "row": row}
+        for row, (path, loads) in enumerate(parsed.items(), start=len(kept)):
+            merged[:, row] = loads
+            files[path] = {"key": keys[path], "row": row}
+        # release the map of the previous values so their file can be removed
+        del values
+        return files, self.write_cache(files, merged)
+
+    def cached(self, simulation_ids) -> Tuple[list, Optional[np.ndarray]]:
+        # cache row of each simulation id (None when its CSV is missing or unreadable) and the cached values
+        paths = [self.csv_path(simulation_id) for simulation_id in simulation_ids]
+        keys = {path: file_key(path) for path in paths}
+        files, values = self.update_cache(keys)
+        rows = [files[path]["row"] if path in files and files[path]["key"] == keys[path] else None for path in paths]
+        return rows, values
+
+    def array(self, simulation_ids) -> np.ndarray:
+        # (buildings x hours x columns) float64 loads in the order of simulation_ids, NaN for a missing or
+        # unreadable CSV
+        rows, values = self.cached(simulation_ids)
+        hours = 0 if values is None else values.shape[2]
+        loads = np.full((len(rows), hours, len(self.columns)), np.nan)
+        found = [i for i, row in enumerate(rows) if row is not None]
+        if found:
+            loads[found] = values[:, [rows[i] for i in found]].transpose(1, 2, 0)
+        return loads
+
+    def load(self, simulation_ids) -> dict:
+        # {simulation id: per-sqft loads of its CSV}, ids whose CSV is missing or unreadable are left out;
+        # the columns are float64 so the arithmetic downstream is done as before
+        simulation_ids = list(simulation_ids)
+        rows, values = self.cached(simulation_ids)
+        return {
+            simulation_id: pd.DataFrame({column: values[i, row].astype(float) for i, column in enumerate(self.columns)})
+            for simulation_id, row in zip(simulation_ids, rows)
+            if row is not None
+        }
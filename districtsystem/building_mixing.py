@@ -1,88 +1,184 @@
+from typing import Optional
+
 import numpy as np
 import pandas as pd
-from pydantic import BaseModel, computed_field
+from pydantic import BaseModel, PrivateAttr
 
+from districtsystem.basemodel import CachedModel, cached_computed_field, memoized_property
 from districtsystem.building_staticInputs import BuildingParameters
 
 
-class building_mixing(BaseModel):
+class building_mixing(CachedModel):
     df: pd.DataFrame
     parameters: BuildingParameters
 
     class Config:
         arbitrary_types_allowed = True
 
-    @computed_field
-    @property
+    @memoized_property
+    def hourIndex(self) -> tuple:
+        # one integer hour index for every aggregation: rows sorted by hour (stable, so each hour keeps
+        # the frame's row order) and the start of each hour's block; rows without a time stamp are dropped
+        # returns (time stamps, sort permutation, hour starts, rows per hour)
+        codes, timeStamps = pd.factorize(self.df["Time Stamp"], sort=True)
+        order = np.argsort(codes, kind="stable")
+        counts = np.bincount(codes[codes >= 0], minlength=len(timeStamps))
+        order = order[len(codes) - counts.sum() :]
+        return timeStamps.rename("Time Stamp"), order, np.cumsum(counts) - counts, counts
+
+    @memoized_property
+    def hourlySums(self) -> dict:
+        # every mixing term summed by hour in one pass, compensated like pandas' groupby sum
+        _, order, starts, counts = self.hourIndex
+        terms = mixing_terms(self.df)
+        values = np.stack(list(terms.values()))[:, order]
+        total = np.zeros((len(terms), len(starts)))
+        compensation = np.zeros_like(total)
+        count = np.zeros(total.shape, dtype=int)
+        for rank in range(counts.max(initial=0)):
+            hours = counts > rank
+            rows = values[:, starts[hours] + rank]
+            total[:, hours], compensation[:, hours], valid = compensated_add(
+                total[:, hours], compensation[:, hours], rows
+            )
+            count[:, hours] += valid
+        sums = {name: total[i] for i, name in enumerate(terms)}
+        with np.errstate(divide="ignore", invalid="ignore"):
+            sums["Average CHWRT (°F)"] = np.where(count[-1] == 0, np.nan, total[-1] / count[-1])
+        return sums
+
+    def _byHour(self, values: np.ndarray, name: Optional[str] = None) -> pd.Series:
+        return pd.Series(values, index=self.hourIndex[0], name=name)
+
+    @cached_computed_field
     def totalSpaceHeating_load(self) -> pd.Series:
-        return self.df.groupby("Time Stamp")["Space Heating Load (Btu/h)"].sum()
+        name = "Space Heating Load (Btu/h)"
+        return self._byHour(self.hourlySums[name], name)
 
-    @computed_field
-    @property
+    @cached_computed_field
     def totalDHW_load(self) -> pd.Series:
-        return self.df.groupby("Time Stamp")["DHW Load (Btu/h)"].sum()
+        name = "DHW Load (Btu/h)"
+        return self._byHour(self.hourlySums[name], name)
 
-    @computed_field
-    @property
+    @cached_computed_field
     def districtHWSflow(self) -> pd.Series:
-        return self.df.groupby("Time Stamp")["District HWS Flow (gpm)"].sum()
+        name = "District HWS Flow (gpm)"
+        return self._byHour(self.hourlySums[name], name)
 
-    @computed_field
-    @property
+    @cached_computed_field
     def districtHWRT(self) -> pd.Series:
-        # check for 0 in flow
-        districtHWSflow_is_zero = self.districtHWSflow == 0
-        # else the following calc is applied
-        bldgHWRTxHWSflow = self.df["District HWRT (°F)"] * self.df["District HWS Flow (gpm)"]
-        districtHWRT = (bldgHWRTxHWSflow.groupby(self.df["Time Stamp"]).sum()) / self.districtHWSflow
-        return pd.Series(np.where(districtHWSflow_is_zero, 0, districtHWRT))
-
-    @computed_field
-    @property
+        return self.compute()["District HWRT (°F)"].rename(None)
+
+    @cached_computed_field
     def districtCHWSflow(self) -> pd.Series:
-        return self.df.groupby("Time Stamp")["CHWR Flow (gpm)"].sum()
+        name = "CHWR Flow (gpm)"
+        return self._byHour(self.hourlySums[name], name)
 
-    @computed_field
-    @property
+    @cached_computed_field
     def districtCHWRT(self) -> pd.Series:
-        # check for 0 in flow
-        districtHWSflow_is_zero = self.districtCHWSflow == 0
-        # calculate average CHWRT
-        averageCHWRT = self.df.groupby("Time Stamp")["CHWRT (°F)"].mean()
-        # else the following calc is applied
-        bldgCHWRTxCHWSflow = self.df["CHWRT (°F)"] * self.df["CHWR Flow (gpm)"]
-        districtCHWRT = (bldgCHWRTxCHWSflow.groupby(self.df["Time Stamp"]).sum()) / self.districtCHWSflow
-        result = np.where(districtHWSflow_is_zero, averageCHWRT, districtCHWRT)
-        return pd.Series(result, index=districtCHWRT.index)
-
-    @computed_field
-    @property
+        return self._byHour(self.compute()["District CHWRT (°F)"].to_numpy())
+
+    @cached_computed_field
     def totalHeating_load(self) -> pd.Series:
-        districtHWSflow = self.districtHWSflow.reset_index(drop=True)
-        districtHWRT = self.districtHWRT.reset_index(drop=True)
-        print("ck", self.districtHWSflow, self.parameters.HW_LoopSTP, self.districtHWRT)
-        return districtHWSflow * 500 * (self.parameters.HW_LoopSTP - districtHWRT)
+        return self.compute()["Total Heating Load (Btu/h)"].rename(None)
 
-    @computed_field
-    @property
+    @cached_computed_field
     def totalCooling_load(self) -> pd.Series:
-        districtCHWSflow = self.districtCHWSflow.reset_index(drop=True)
-        districtCHWRT = self.districtCHWRT.reset_index(drop=True)
-        return districtCHWSflow * (districtCHWRT - self.parameters.CHW_LoopSTP) * 500
-        # return self.districtCHWSflow*(self.districtCHWRT-self.parameters.CHW_LoopSTP)*500
+        return self.compute()["Total Cooling Load (Btu/h)"].rename(None)
+
+    def compute(self) -> pd.DataFrame:
+        sums = self.hourlySums
+        return mixing_frame(self.parameters, sums, sums["Average CHWRT (°F)"])
+
+
+def compensated_add(total: np.ndarray, compensation: np.ndarray, values: np.ndarray) -> tuple:
+    # one step of the Kahan summation behind pandas' groupby sum and mean, NaN values are skipped
+    valid = ~np.isnan(values)
+    y = values - compensation
+    t = total + y
+    error = (t - total) - y
+    # an infinite value leaves a NaN compensation, which must not poison the sum
+    error = np.where(np.isnan(error), 0.0, error)
+    return np.where(valid, t, total), np.where(valid, error, compensation), valid
+
+
+def mixing_terms(df: pd.DataFrame) -> dict:
+    # per-row terms of the long building frame that building_mixing sums by hour
+    return {
+        "Space Heating Load (Btu/h)": df["Space Heating Load (Btu/h)"].to_numpy(dtype=float),
+        "DHW Load (Btu/h)": df["DHW Load (Btu/h)"].to_numpy(dtype=float),
+        "District HWS Flow (gpm)": df["District HWS Flow (gpm)"].to_numpy(dtype=float),
+        "HWRT x HWS Flow": (df["District HWRT (°F)"] * df["District HWS Flow (gpm)"]).to_numpy(dtype=float),
+        "CHWR Flow (gpm)": df["CHWR Flow (gpm)"].to_numpy(dtype=float),
+        "CHWRT x CHWR Flow": (df["CHWRT (°F)"] * df["CHWR Flow (gpm)"]).to_numpy(dtype=float),
+        "CHWRT (°F)": df["CHWRT (°F)"].to_numpy(dtype=float),
+    }
+
+
+def mixing_frame(parameters: BuildingParameters, sums: dict, averageCHWRT: np.ndarray) -> pd.DataFrame:
+    # building_mixing.compute() from the hourly sums of mixing_terms
+    districtHWSflow = sums["District HWS Flow (gpm)"]
+    districtCHWSflow = sums["CHWR Flow (gpm)"]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        districtHWRT = np.where(districtHWSflow == 0, 0, sums["HWRT x HWS Flow"] / districtHWSflow)
+        districtCHWRT = np.where(districtCHWSflow == 0, averageCHWRT, sums["CHWRT x CHWR Flow"] / districtCHWSflow)
+    df = pd.DataFrame({
+        "Total Space Heating Load (Btu/h)": sums["Space Heating Load (Btu/h)"],
+        "Total DHW Load (Btu/h)": sums["DHW Load (Btu/h)"],
+        "District HWS Flow (gpm)": districtHWSflow,
+        "District HWRT (°F)": districtHWRT,
+        "District CHWS Flow (gpm)": districtCHWSflow,
+        "District CHWRT (°F)": districtCHWRT,
+        "Total Heating Load (Btu/h)": districtHWSflow * 500 * (parameters.HW_LoopSTP.to_numpy() - districtHWRT),
+        "Total Cooling Load (Btu/h)": districtCHWSflow * (districtCHWRT - parameters.CHW_LoopSTP.to_numpy()) * 500,
+    })
+
+    return df
+
+
+class MixingHoursError(ValueError):
+    def __init__(self):
+        super().__init__("Every building must cover the same unique time stamps, in the same order")
+
+
+class MixingAccumulator(BaseModel):
+    # building_mixing without the long frame: buildings are added one at a time into running hourly sums,
+    # compensated the way pandas' groupby sum and mean are, so compute() matches building_mixing exactly
+    parameters: BuildingParameters
+
+    _timeStamp: Optional[np.ndarray] = PrivateAttr(default=None)
+    _sums: dict = PrivateAttr(default_factory=dict)  # term -> [total, compensation, count]
+    _buildings: int = PrivateAttr(default=0)
+
+    class Config:
+        arbitrary_types_allowed = True
+
+    @property
+    def buildings(self) -> int:
+        return self._buildings
+
+    def add(self, building: pd.DataFrame) -> None:
+        # one Building.compute() frame, one row per hour
+        timeStamp = building["Time Stamp"].to_numpy()
+        if self._timeStamp is None:
+            if len(np.unique(timeStamp)) != len(timeStamp):
+                raise MixingHoursError()
+            self._timeStamp = timeStamp
+        elif not np.array_equal(timeStamp, self._timeStamp):
+            raise MixingHoursError()
+        for name, values in mixing_terms(building).items():
+            total, compensation, count = self._sums.setdefault(
+                name, [np.zeros(len(values)), np.zeros(len(values)), np.zeros(len(values), dtype=int)]
+            )
+            total, compensation, valid = compensated_add(total, compensation, values)
+            self._sums[name] = [total, compensation, count + valid]
+        self._buildings += 1
 
     def compute(self) -> pd.DataFrame:
-        df = pd.DataFrame(
-            {
-                "Total Space Heating Load (Btu/h)": self.totalSpaceHeating_load.reset_index(drop=True),
-                "Total DHW Load (Btu/h)": self.totalDHW_load.reset_index(drop=True),
-                "District HWS Flow (gpm)": self.districtHWSflow.reset_index(drop=True),
-                "District HWRT (°F)": self.districtHWRT.reset_index(drop=True),
-                "District CHWS Flow (gpm)": self.districtCHWSflow.reset_index(drop=True),
-                "District CHWRT (°F)": self.districtCHWRT.reset_index(drop=True),
-                "Total Heating Load (Btu/h)": self.totalHeating_load.reset_index(drop=True),
-                "Total Cooling Load (Btu/h)": self.totalCooling_load,
-            }
-        )
-
-        return df
+        # hours in time-stamp order, like the groupby
+        order = np.argsort(self._timeStamp, kind="stable")
+        sums = {name: total[order] for name, (total, _, _) in self._sums.items()}
+        total, _, count = self._sums["CHWRT (°F)"]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            averageCHWRT = np.where(count == 0, np.nan, total / count)[order]
+        return mixing_frame(self.parameters, sums, averageCHWRT)
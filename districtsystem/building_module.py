@@ -2,12 +2,36 @@ from typing import Optional
 
 import numpy as np
 import pandas as pd
-from pydantic import BaseModel, computed_field
 
+from districtsystem.basemodel import CachedModel, cached_computed_field
 from districtsystem.building_staticInputs import BuildingParameters
-
-
-class Building(BaseModel):
+from districtsystem.columns import project
+
+# Building.compute() columns and the field or property behind each
+BUILDING_COLUMNS = {
+    "caan_no": "caan_no",
+    "Time Stamp": "timeStamp",
+    "Space Heating Load (Btu/h)": "heatingLoad",
+    "DHW Load (Btu/h)": "DHWLoad",
+    "Cooling Load (Btu/h)": "coolingLoad",
+    "Loop HWST @ Building (°F)": "loopHWST",
+    "Loop CHWST @ Building (°F)": "loopCHWST",
+    "CHWRT (°F)": "CHWRT",
+    "CHWR Flow (gpm)": "CHWRflow",
+    "Building HHWRT (°F)": "HHWRT",
+    "HHWRflow": "HHWRflow",
+    "Building Domestic Water Temp (°F)": "DHWtemp",
+    "Building DHWRT (°F)": "DHWRT",
+    "Building DHWR Flow (gpm)": "DHWRflow",
+    "District HWS Flow (gpm)": "districtHWSflow",
+    "Bypassed Return to HHWS (gpm)": "bypassHHWS",
+    "District HWR Flow (gpm)": "HWRflow",
+    "District HWRT (°F)": "districtHWRT",
+    "Check Building HWS = HWR": "HWSequalHWR",
+}
+
+
+class Building(CachedModel):
     # adding changing inputs needed  for formulas
     parameters: BuildingParameters
     caan_no: int
@@ -23,31 +47,26 @@ class Building(BaseModel):
     class Config:
         arbitrary_types_allowed = True
 
-    @computed_field
-    @property
+    @cached_computed_field
     def loopHWST(self) -> pd.Series:
         return self.parameters.HW_LoopSTP + self.parameters.HW_supplyLosses
 
-    @computed_field
-    @property
+    @cached_computed_field
     def loopCHWST(self) -> pd.Series:
         return self.parameters.CHW_LoopSTP + self.parameters.CHW_supplyLosses
 
-    @computed_field
-    @property
+    @cached_computed_field
     def CHWRT(self) -> pd.Series:
         return (
             self.loopCHWST
             + ((self.parameters.CHW_deltaT_Max - self.parameters.CHW_deltaT_Min) / self.CHW_maxLoad) * self.coolingLoad
         ) + self.parameters.CHW_deltaT_Min
 
-    @computed_field
-    @property
+    @cached_computed_field
     def CHWRflow(self) -> pd.Series:
         return self.coolingLoad / 500 / (self.CHWRT - self.loopCHWST)
 
-    @computed_field
-    @property
+    @cached_computed_field
     def min_index(self) -> pd.Series:
         # Convert data_series and target_series to NumPy arrays for numerical operations
         data_values = self.parameters.HHW_supply_Temps.values
@@ -66,8 +85,7 @@ class Building(BaseModel):
         min_index = pd.Series(min_index)
         return min_index
 
-    @computed_field
-    @property
+    @cached_computed_field
     def HHWRT(self) -> Optional[pd.Series]:
         try:
             # Create a new Series with sequential index and values from self.delta
@@ -79,18 +97,15 @@ class Building(BaseModel):
         except IndexError:
             return None
 
-    @computed_field
-    @property
+    @cached_computed_field
     def HHWRflow(self) -> pd.Series:
         return self.heatingLoad / 500 / (self.parameters.HHW_BldgSTP - self.HHWRT)
 
-    @computed_field
-    @property
+    @cached_computed_field
     def DHWtemp(self) -> pd.Series:
         return self.parameters.DHWSetpoint[self.parameters.DHW_indices].reset_index(drop=True)
 
-    @computed_field
-    @property
+    @cached_computed_field
     def DHWRT(self) -> pd.Series:
         return self.DHWtemp + np.maximum(
             self.parameters.DHWminApproach,
@@ -103,13 +118,11 @@ class Building(BaseModel):
             / (1 - self.DHW_loadMinApproach / self.DHW_maxLoad),
         )
 
-    @computed_field
-    @property
+    @cached_computed_field
     def DHWRflow(self) -> pd.Series:
         return self.DHWLoad / 500 / (self.loopHWST - self.DHWRT)
 
-    @computed_field
-    @property
+    @cached_computed_field
     def districtHWSflow(self) -> pd.Series:
         # print(self.DHWRflow ,self.HHWRflow,self.parameters.HHW_BldgSTP,self.HHWRT,self.loopHWST-self.HHWRT)
         # return self.DHWRflow +(self.HHWRflow*(self.parameters.HHW_BldgSTP-self.HHWRT))/(self.loopHWST-self.HHWRT)
@@ -126,18 +139,15 @@ class Building(BaseModel):
 
         return result
 
-    @computed_field
-    @property
+    @cached_computed_field
     def bypassHHWS(self) -> pd.Series:
         return self.HHWRflow - (self.districtHWSflow - self.DHWRflow)
 
-    @computed_field
-    @property
+    @cached_computed_field
     def HWRflow(self) -> pd.Series:
         return self.HHWRflow - self.bypassHHWS + self.DHWRflow
 
-    @computed_field
-    @property
+    @cached_computed_field
     def districtHWRT(self) -> pd.Series:
         value_1 = self.HHWRT * (self.HHWRflow - self.bypassHHWS) + self.DHWRflow * self.DHWRT
         districtHWSflow = self.districtHWSflow.copy()
@@ -146,42 +156,19 @@ class Building(BaseModel):
         dhwrt.fillna(0, inplace=True)
         return dhwrt
 
-    @computed_field
-    @property
+    @cached_computed_field
     def HWSequalHWR(self) -> pd.Series:
         # Define tolerance for comparison
         tolerance = 1e-6
 
         return abs(self.districtHWSflow - self.HWRflow) < tolerance
 
-    def compute(self) -> pd.DataFrame:
+    def compute(self, columns: Optional[list] = None) -> pd.DataFrame:
         # Create a list of unique identifiers for each row (e.g., row numbers)
         index_list = range(len(self.loopHWST))  # Assuming you want to use row numbers
 
-        df = pd.DataFrame(
-            {
-                "caan_no": self.caan_no,
-                "Time Stamp": self.timeStamp,
-                "Space Heating Load (Btu/h)": self.heatingLoad,
-                "DHW Load (Btu/h)": self.DHWLoad,
-                "Cooling Load (Btu/h)": self.coolingLoad,
-                "Loop HWST @ Building (°F)": self.loopHWST,
-                "Loop CHWST @ Building (°F)": self.loopCHWST,
-                "CHWRT (°F)": self.CHWRT,
-                "CHWR Flow (gpm)": self.CHWRflow,
-                "Building HHWRT (°F)": self.HHWRT,
-                "HHWRflow": self.HHWRflow,
-                "Building Domestic Water Temp (°F)": self.DHWtemp,
-                "Building DHWRT (°F)": self.DHWRT,
-                "Building DHWR Flow (gpm)": self.DHWRflow,
-                "District HWS Flow (gpm)": self.districtHWSflow,
-                "Bypassed Return to HHWS (gpm)": self.bypassHHWS,
-                "District HWR Flow (gpm)": self.HWRflow,
-                "District HWRT (°F)": self.districtHWRT,
-                "Check Building HWS = HWR": self.HWSequalHWR,
-            },
-            index=index_list,
-        )
+        # only the properties behind `columns` (default: all of them) are evaluated
+        df = pd.DataFrame(project(self, BUILDING_COLUMNS, columns), index=index_list)
 
         # # Create the DataFrame with the index
         # df = pd.DataFrame(df_data, index=index_list)
@@ -0,0 +1,80 @@
+import numpy as np
+import pandas as pd
+
+from districtsystem.basemodel import CachedModel, memoized_property
+
+# registry attribute -> column of the building COP and process load sheet
+NUMERIC_COLUMNS = {
+    "area": "Area [sf]",
+    "coolCOP": "COOLCOP",
+    "heatCOP": "HEATCOP",
+    "e_process": "E_process (kBtu/sf)",
+    "g_process": "G_process",
+    "c_process": "C_process",
+    "s_process": "S_process",
+}
+
+
+class UnknownBuildingError(KeyError):
+    def __init__(self, key, kind):
+        super().__init__(f"No building with {kind} {key!r} in the building COP and process load sheet")
+
+
+class BuildingRegistry(CachedModel):
+    # the building COP and process load sheet as columns, one entry per sheet row; numeric attributes are
+    # float arrays and rows are looked up through the CAAN and Simulation_id indexes (the first row of a
+    # repeated key wins, as .loc[...].iloc[0] did)
+    caan: list
+    simulation_id: list
+    program: list
+    area: np.ndarray
+    coolCOP: np.ndarray
+    heatCOP: np.ndarray
+    e_process: np.ndarray
+    g_process: np.ndarray
+    c_process: np.ndarray
+    s_process: np.ndarray
+
+    class Config:
+        arbitrary_types_allowed = True
+
+    @classmethod
+    def from_frame(cls, buildingLoadData_df: pd.DataFrame) -> "BuildingRegistry":
+        return cls(
+            caan=buildingLoadData_df["CAAN"].tolist(),
+            simulation_id=buildingLoadData_df["Simulation_id"].tolist(),
+            program=buildingLoadData_df["Program"].tolist(),
+            **{name: buildingLoadData_df[column].to_numpy(dtype=float) for name, column in NUMERIC_COLUMNS.items()},
+        )
+
+    @memoized_property
+    def caan_index(self) -> dict:
+        index = {}
+        for row, caan_no in enumerate(self.caan):
+            index.setdefault(caan_no, row)
+        return index
+
+    @memoized_property
+    def simulation_index(self) -> dict:
+        index = {}
+        for row, simulation_id in enumerate(self.simulation_id):
+            index.setdefault(simulation_id, row)
+        return index
+
+    def simulation_of(self, caan_no) -> str:
+        try:
+            return self.simulation_id[self.caan_index[caan_no]]
+        except KeyError:
+            raise UnknownBuildingError(caan_no, "CAAN") from None
+
+    def row_of(self, simulation_id: str) -> int:
+        try:
+            return self.simulation_index[simulation_id]
+        except KeyError:
+            raise UnknownBuildingError(simulation_id, "Simulation_id") from None
+
+    def rows(self, caan_list) -> np.ndarray:
+        # sheet row holding the attributes of each CAAN, reached through its Simulation_id
+        return np.array(
+            [self.row_of(self.simulation_of(caan_no).replace("in_", "")) for caan_no in caan_list], dtype=int
+        )
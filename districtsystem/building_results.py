@@ -0,0 +1,48 @@
+from typing import Tuple
+
+import numpy as np
+import pandas as pd
+from pydantic import BaseModel
+
+
+class BuildingResults(BaseModel):
+    # hourly results of B buildings kept columnar: every column is one buildings x hours slab of a single
+    # preallocated (columns x buildings x hours) float array, written in place for all buildings at once
+    # (results[column] = matrix) or one building at a time (results[column][i] = hours), and turned into a
+    # frame once at the end; a column never written stays NaN
+    caan: list
+    timeStamp: pd.Series
+    columns: Tuple[str, ...]
+    values: np.ndarray
+
+    class Config:
+        arbitrary_types_allowed = True
+
+    @classmethod
+    def allocate(cls, caan, timeStamp: pd.Series, columns) -> "BuildingResults":
+        columns = tuple(columns)
+        return cls(
+            caan=list(caan),
+            timeStamp=timeStamp,
+            columns=columns,
+            values=np.full((len(columns), len(caan), len(timeStamp)), np.nan),
+        )
+
+    def __getitem__(self, column: str) -> np.ndarray:
+        return self.values[self.columns.index(column)]
+
+    def __setitem__(self, column: str, values) -> None:
+        self.values[self.columns.index(column)] = values
+
+    def long(self, building: str = "Building ID CAAN", time: str = "Timestamp") -> pd.DataFrame:
+        # one block of hours per building, in caan order, as concatenating the per-building frames gave;
+        # the result columns share the builder's memory instead of being copied into the frame
+        buildings, hours = self.values.shape[1:]
+        df = pd.DataFrame(self.values.reshape(len(self.columns), -1).T, columns=list(self.columns), copy=False)
+        df.insert(0, building, np.repeat(self.caan, hours))
+        df.insert(0, time, np.tile(self.timeStamp.to_numpy(), buildings))
+        return df
+
+    def wide(self, column: str) -> pd.DataFrame:
+        # hours x buildings frame of one column, indexed by time stamp with a column per CAAN
+        return pd.DataFrame(self[column].T, index=self.timeStamp.to_numpy(), columns=self.caan)
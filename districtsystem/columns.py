@@ -0,0 +1,22 @@
+from typing import Optional
+
+
+class UnknownColumnError(KeyError):
+    def __init__(self, names, available):
+        super().__init__(f"No output column {sorted(names)}, choose from {list(available)}")
+
+
+def select_columns(available, columns: Optional[list] = None) -> list:
+    # the requested output columns in the order asked for, every available column when None
+    if columns is None:
+        return list(available)
+    unknown = set(columns) - set(available)
+    if unknown:
+        raise UnknownColumnError(unknown, available)
+    return list(columns)
+
+
+def project(model, outputs: dict, columns: Optional[list] = None) -> dict:
+    # evaluate only the properties behind the requested columns; each property pulls in just the
+    # properties it depends on, so the rest of the model is never computed
+    return {label: getattr(model, outputs[label]) for label in select_columns(outputs, columns)}
@@ -0,0 +1,54 @@
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+from pydantic import BaseModel
+
+
+class DailyAggregator(BaseModel):
+    # groups an hourly axis by day label once; every sum afterwards is a gather + row sums
+    days: np.ndarray  # sorted unique day labels
+    inverse: np.ndarray  # hour -> position in days
+    order: np.ndarray  # stable sort of the hours by day
+
+    class Config:
+        arbitrary_types_allowed = True
+
+    @classmethod
+    def from_days(cls, day: pd.Series) -> "DailyAggregator":
+        days, inverse = np.unique(np.asarray(day), return_inverse=True)
+        order = np.argsort(inverse, kind="stable")
+        return cls(days=days, inverse=inverse, order=order)
+
+    @classmethod
+    def from_timestamps(cls, dates: pd.Series) -> "DailyAggregator":
+        return cls.from_days(dates.dt.dayofyear - 1)
+
+    def day_totals(self, load, mask: Optional[np.ndarray] = None) -> np.ndarray:
+        # NaN hours count as 0, like Series.sum(); masked-out hours are left out of the sum
+        values = np.asarray(load, dtype=float)
+        values = np.where(np.isnan(values), 0.0, values)
+        hours = self.order
+        if mask is not None:
+            hours = hours[np.asarray(mask, dtype=bool)[hours]]
+        values = values[hours]
+        counts = np.bincount(self.inverse[hours], minlength=len(self.days))
+        starts = np.cumsum(counts) - counts
+        # days of equal length are summed as rows of one 2-D gather, which keeps numpy's
+        # pairwise summation and so matches a per-day Series.sum() bit for bit
+        totals = np.zeros(len(self.days), dtype=float)
+        for length in np.unique(counts[counts > 0]):
+            rows = np.flatnonzero(counts == length)
+            totals[rows] = values[starts[rows, None] + np.arange(length)].sum(axis=1)
+        return totals
+
+    def day_sum(self, load, mask: Optional[np.ndarray] = None) -> np.ndarray:
+        return self.day_totals(load, mask)[self.inverse]
+
+    def lookahead(self, load, days: int, mask: Optional[np.ndarray] = None) -> np.ndarray:
+        # total of this day and the following days - 1 calendar days, missing days count as 0
+        totals = np.zeros(self.days[-1] - self.days[0] + days, dtype=float)
+        totals[self.days - self.days[0]] = self.day_totals(load, mask)
+        window = sliding_window_view(totals, days).sum(axis=1)
+        return window[self.days - self.days[0]][self.inverse]
@@ -1,9 +1,360 @@
+from enum import IntEnum
+from typing import Optional
+
 import numpy as np
 import pandas as pd
-from pydantic import BaseModel, computed_field
+from pydantic import BaseModel
+
+from districtsystem.basemodel import CachedModel, cached_computed_field, memoized_property
+from districtsystem.columns import project, select_columns
+
+
+def _nearest(values: np.ndarray, target: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    # the (at most two) entries of sorted unique `values` closest to each target, ties kept like
+    # the diff == min(diff) test of heatPump.min_diff; returns positions and which of them match
+    hi = np.searchsorted(values, target).clip(1, len(values)) if len(values) > 1 else np.zeros(len(target), int)
+    lo = (hi - 1).clip(0)
+    hi = hi.clip(0, len(values) - 1)
+    d_lo = np.abs(target - values[lo])
+    d_hi = np.where(hi != lo, np.abs(target - values[hi]), np.inf)
+    closest = np.minimum(d_lo, d_hi)
+    return lo, hi, d_lo == closest, (d_hi == closest) & (hi != lo)
+
+
+class HeatSink(IntEnum):
+    # column order of the heat-sink temperatures ranked by heatPump.HS_priority
+    OCEAN = 0
+    GROUND = 1
+    TOWER = 2
+    AIR = 3
+
+
+HEAT_SINKS = ("Ocean Source", "Ground Source", "Tower Source", "Air Source")  # labels by HeatSink
+
+
+class HeatUse(IntEnum):
+    # second axis of the HS-HS tensors: what the water sink/source is used for
+    HP_HEATING = 0  # heat extraction for heating-only heat pumps
+    HP_COOLING = 1  # heat rejection from cooling-only heat pumps
+    CHILLER = 2  # heat rejection from the chiller
+
+
+# water sinks serving each use, in the workbook's column order; the other slots stay NaN
+HSHS_USES = {
+    HeatUse.HP_HEATING: (HeatSink.GROUND, HeatSink.OCEAN),
+    HeatUse.HP_COOLING: (HeatSink.GROUND, HeatSink.OCEAN, HeatSink.TOWER),
+    HeatUse.CHILLER: (HeatSink.GROUND, HeatSink.OCEAN, HeatSink.TOWER),
+}
+WATER_SINKS = 3  # HeatSink.OCEAN, GROUND and TOWER
+
+# compute_HS_HS columns as (label, HS-HS tensor, sink, use)
+HSHS_COLUMNS = (
+    ("Ground Water Entering Temp (°F)_Heat Extraction", "entering", HeatSink.GROUND, HeatUse.HP_HEATING),
+    ("Ground Source Heat Extraction_HP Heating (gpm)", "gpm", HeatSink.GROUND, HeatUse.HP_HEATING),
+    ("Ground Source Heat Extraction_HP Heating (Btu/h)", "btuh", HeatSink.GROUND, HeatUse.HP_HEATING),
+    ("Ocean Water Entering Temp (°F) HP Heat Extraction", "entering", HeatSink.OCEAN, HeatUse.HP_HEATING),
+    ("Ocean Source Heat Extraction gpm", "gpm", HeatSink.OCEAN, HeatUse.HP_HEATING),
+    ("Ocean Source Heat Extraction btu/h", "btuh", HeatSink.OCEAN, HeatUse.HP_HEATING),
+    ("Ground Water Entering Temp (°F)_Heat Rejection", "entering", HeatSink.GROUND, HeatUse.HP_COOLING),
+    ("Ground Source Heat Rejection HP Cooling (gpm)", "gpm", HeatSink.GROUND, HeatUse.HP_COOLING),
+    ("Ground Source Heat Rejection HP Cooling (btuh)", "btuh", HeatSink.GROUND, HeatUse.HP_COOLING),
+    ("Ocean Water Entering Temp (°F)", "entering", HeatSink.OCEAN, HeatUse.HP_COOLING),
+    ("Ocean Source Heat Rejection_HP Cooling (gpm)", "gpm", HeatSink.OCEAN, HeatUse.HP_COOLING),
+    ("Ocean Source Heat Rejection_HP Cooling (btu/h)", "btuh", HeatSink.OCEAN, HeatUse.HP_COOLING),
+    ("Tower CWS Temp (°F) HP Heat Rejection", "entering", HeatSink.TOWER, HeatUse.HP_COOLING),
+    ("Tower CWR Flow (gpm) HP Heat Rejection", "gpm", HeatSink.TOWER, HeatUse.HP_COOLING),
+    ("Tower Source  HP Heat Rejection (Btu/h)", "btuh", HeatSink.TOWER, HeatUse.HP_COOLING),
+    ("Ground Source Heat Rejection Chiller (gpm)", "gpm", HeatSink.GROUND, HeatUse.CHILLER),
+    ("Ground Source Heat Rejection Chiller (Btu/h)", "btuh", HeatSink.GROUND, HeatUse.CHILLER),
+    ("Ocean Water Entering Temp (°F) Chiller Heat Rejection", "entering", HeatSink.OCEAN, HeatUse.CHILLER),
+    ("Ocean Water Heat Rejection Chillers (gpm)", "gpm", HeatSink.OCEAN, HeatUse.CHILLER),
+    ("Ocean Water Heat Rejection Chiller (Btu/h)", "btuh", HeatSink.OCEAN, HeatUse.CHILLER),
+    ("Tower CWS Temp (°F) Chiller Heat Rejection", "entering", HeatSink.TOWER, HeatUse.CHILLER),
+    ("Tower CWR Flow (gpm) Chiller Heat Rejection", "gpm", HeatSink.TOWER, HeatUse.CHILLER),
+    ("Tower Source Chiller Heat Rejection (Btu/h)", "btuh", HeatSink.TOWER, HeatUse.CHILLER),
+)
+# heatPump.compute() columns and the property behind each
+HP_COLUMNS = {
+    "HP CHWST (°F)": "CHWST",
+    "Max Unitary Heating Output (Btu/h)": "heatingOutput",
+    "Max Unitary Cooling Output (Btu/h)": "coolingOutput",
+    "Heat:Cool": "heatCoolRatio",
+    "Required Heating Output (Btu/h)": "reqHeatingOutput",
+    "HWSFLow": "districtHWSflow",
+    "self.HW_districtSTP": "HW_districtSTP",
+    "self.districtHWRT": "districtHWRT",
+    "Possible Recovered CHW (Btu/h)": "possRecoveredCHW",
+    "Possible Recovered CHW (gpm)": "possRecoveredCHWFLow",
+}
+# heatPump.compute2() columns
+HP_COLUMNS_2 = {
+    "Required Heating Output (gpm)": "reqHeatingOutput_gpm",
+    "Required Cooling Output (Btu/h)": "reqCoolingOutput",
+    "Required Cooling Output (gpm)": "reqCoolingOutput_gpm",
+    "Heat Pumps Heating+Cooling Capacity_(Cooling, Btu/h)": "HP_capacity_C",
+    "Heat Pumps Heating+Cooling Capacity_(Heating, Btu/h)": "HP_capacity_H",
+    "Total Heat Pump Heating Only Capacity": "HP_capacity_H_only",
+    "Ground Water Return Temp (°F)": "gr_returnTemp",
+    "Ambient Dry-bulb Temp (°F)": "dryBulb_temp",
+    "Ocean Water Temp (°F)": "oceanWaterTemp",
+    "Heat Pumps Heating Only Capacity_Water-Source (Btu/h)": "HP_capacity_H_only_WS",
+    "Heat Pumps Heating Only Capacity_Ground Source (Btu/h)": "HP_capacity_H_only_GS",
+    "Heat Pumps Heating Only Capacity_Ocean-Source (Btu/h)": "HP_capacity_H_only_OS",
+    "Heat Pumps Heating Only Capacity_Air-Source (Btu/h)": "HP_capacity_H_only_AS",
+    "Total Heat Pump Cooling Only Capacity": "HP_capacity_C_only",
+    "cooler_CWRT": "cooler_CWRT",
+    "Ground Water Return Temp (°F) For Water-Source Heat Rejection": "gr_returnTemp_HtRjt",
+    "Priority 1_Heat Sink": "HS_Priority1",
+    "Priority 2_Heat Sink": "HS_Priority2",
+    "Priority 3_Heat Sink": "HS_Priority3",
+    "Priority 4_Heat Sink": "HS_Priority4",
+    "Ground Source Max (Btu/h)": "GS_max",
+    "Ocean Source Max (Btu/h)": "OS_max",
+    "Tower Source Max (Btu/h)": "CT_max",
+    "Air Source Max (Btu/h)": "AS_max",
+    "Heat Pumps Cooling Only Capacity_Air-Source (Btu/h)": "HP_capacity_C_only_AS",
+    "Heat Pumps Cooling Only Capacity_Ground-Source (Btu/h)": "HP_capacity_C_only_GS",
+    "Heat Pumps Cooling Only Capacity_Ocean-Source (Btu/h)": "HP_capacity_C_only_OS",
+    "Heat Pumps Cooling Only Capacity_Tower-Source (Btu/h)": "HP_capacity_C_only_TS",
+    "Heat Pump Hot Water (gpm)": "HP_HW_gpm",
+    "To HW District (gpm)": "to_HW_district",
+    "Heat Pump Chilled Water (gpm)": "HP_CHW_gpm",
+    "To CHW District (gpm)": "to_CHW_district",
+}
+# heatPump.compute_chiller() columns
+CHILLER_COLUMNS = {
+    "Chiller Output (Btu/h)": "chiller_output",
+    "Chiller CHWS Flow (gpm)": "chiller_CHWSflow",
+    "Chiller_Heat Rejection-Ground Source (Btu/h)": "chiller_gr_hRjt",
+    "Chiller_Heat Rejection-Ocean Source (Btu/h)": "chiller_ocean_hRjt",
+    "Chiller_Heat Rejection-Tower Source (Btu/h)": "chiller_CT_hRjt",
+    "Chiller Lift (°F)": "chiller_lift",
+    "Chiller CWS Temp (°F)": "chiller_CWS_temp",
+}
+# heatPump.compute_cooler() columns
+COOLER_COLUMNS = {
+    "Cooling Tower Approach (°F)": "CTapproach",
+    "CWRT (°F)": "cooler_CWRT",
+    "CWS Flow (gpm)": "CT_CWSflow",
+}
+# heatPump.compute_boiler() columns
+BOILER_COLUMNS = {
+    "Boiler Output (Btu/h)": "boiler_output",
+    "Boiler HWS Flow (gpm)": "boiler_HWSflow",
+    "Energy Consumed (kWh)": "boiler_energy",
+}
+# compute_HS_HS columns that are not a slice of one HS-HS tensor
+HSHS_SHORTFALLS = ("Total WS Heat Extraction Shortfall (Btu/h)", "Total WS Heat Rejection Shortfall (Btu/h)")
+HSHS_CHECKS = ("CHECK:=Simultaneous Heat/Cool Only", "CHECK:Simultaneous Heat Only/Chiller")
+# sinks the chiller rejects to, in the column order of heatPump.chiller_hRjt; the ocean wins ties
+CHILLER_SINKS = (HeatSink.TOWER, HeatSink.GROUND, HeatSink.OCEAN)
+CHILLER_STRICT = tuple(sink != HeatSink.OCEAN for sink in CHILLER_SINKS)
+SINK_CAPACITY = {
+    HeatSink.OCEAN: "HP_ocean_capacity",
+    HeatSink.GROUND: "HP_grSource_capacity",
+    HeatSink.TOWER: "HP_CT_capacity",
+}
+
+
+def _py_min(a, b):
+    # Python's min(a, b): b only when strictly smaller, so NaN in b is never picked
+    return np.where(b < a, b, a)
+
+
+def _py_max0(a):
+    # Python's max(0, a)
+    return np.where(a > 0, a, 0.0)
+
+
+def dispatch_by_priority(order: np.ndarray, caps: np.ndarray, demand: np.ndarray, first_cap=None) -> np.ndarray:
+    # allocate `demand` (hours,) over sources in each hour's priority `order` (hours x sources, source
+    # index per rank), each capped by `caps` (hours x sources); a source gets what is left after the
+    # caps of the sources ranked before it, the top-ranked one min(first_cap, demand); leading axes
+    # of caps, demand and first_cap batch several plants over the same hours
+    order = np.broadcast_to(order, caps.shape)
+    ranked_caps = np.take_along_axis(caps, order, axis=-1)
+    remaining = np.empty_like(ranked_caps)
+    remaining[..., 0] = demand
+    for rank in range(1, order.shape[-1]):
+        remaining[..., rank] = remaining[..., rank - 1] - ranked_caps[..., rank - 1]
+    ranked = _py_min(ranked_caps, _py_max0(remaining))
+    ranked[..., 0] = _py_min(ranked_caps[..., 0] if first_cap is None else first_cap, demand)
+    allocation = np.empty_like(ranked)
+    np.put_along_axis(allocation, order, ranked, axis=-1)
+    return allocation
+
+
+def allocate_by_cost(temps: np.ndarray, caps, load, strict) -> np.ndarray:
+    # chiller heat rejection: split `load` (hours,) over sinks (hours x sinks `temps`), each capped by
+    # `caps` (sinks,); a sink gets min(cap, load less min(load, cap) of every cooler sink), floored at 0
+    # once two or more are deducted. A sink is ahead of another when cooler (`strict`) or no warmer;
+    # hours where that leaves an ordering undecided (ties, NaN) deduct all other sinks, in column order.
+    # load and caps may carry leading axes (load plants x hours, caps plants x 1 x sinks)
+    temps = np.asarray(temps, dtype=float)
+    load = np.asarray(load, dtype=float)[..., np.newaxis]
+    caps = np.asarray(caps, dtype=float)
+    strict = np.asarray(strict, dtype=bool)[:, np.newaxis]
+    own, other = temps[:, :, np.newaxis], temps[:, np.newaxis, :]
+    cooler = other < own  # [hour, sink, other sink]
+    ahead = np.where(strict, own < other, own <= other)
+    others = ~np.eye(temps.shape[1], dtype=bool)
+    decided = (cooler | ahead | ~others).all(axis=2)
+    deduct = np.where(decided[:, :, np.newaxis], cooler, True) & others
+
+    taken = np.minimum(load, caps)
+    residual = np.broadcast_to(load, taken.shape)
+    for sink in range(temps.shape[1]):
+        residual = np.where(deduct[:, :, sink], residual - taken[..., sink : sink + 1], residual)
+    allocation = np.where(deduct.any(axis=2), np.minimum(caps, residual), taken)
+    return np.where(deduct.sum(axis=2) > 1, np.maximum(0, allocation), allocation)
+
+
+def hshs_flows(capacity: np.ndarray, deltaT: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    # water flow (gpm) moving `capacity` (Btu/h) across `deltaT`, and the heat (Btu/h) that flow carries
+    gpm = water_flow(capacity, deltaT)
+    return gpm, gpm * 500 * deltaT
+
+
+def capacity_left(order: np.ndarray, caps: np.ndarray, source: int, capacity) -> np.ndarray:
+    # `capacity` minus the summed caps of the sources ranked before `source`, floored at 0
+    order = np.broadcast_to(order, caps.shape)
+    ranked_caps = np.take_along_axis(caps, order, axis=-1)
+    claimed = np.cumsum(ranked_caps, axis=-1)
+    rank = np.argmax(order == source, axis=-1)
+    before = np.take_along_axis(claimed, (rank - 1).clip(0)[..., np.newaxis], axis=-1)[..., 0]
+    return np.where(rank == 0, capacity, _py_max0(capacity - before))
+
+
+# capacity-dependent plant formulas, shared by heatPump (arrays over hours) and CapacitySweep (plants x hours,
+# capacities as plants x 1 columns); each returns the heatPump properties named in its comment
+
+
+def recoverable_cooling(heatDemand, heatCoolRatio0, heatingCapacity, coolingCapacity) -> tuple:
+    # reqHeatingOutput, possRecoveredCHW
+    reqHeatingOutput = np.minimum(heatDemand, heatingCapacity)
+    return reqHeatingOutput, np.minimum(reqHeatingOutput / heatCoolRatio0, coolingCapacity)
+
+
+def heat_recovery_capacity(
+    reqCoolingOutput, possRecoveredCHW, reqHeatingOutput, heatCoolRatio, heatingCapacity
+) -> tuple:
+    # HP_capacity_C, HP_capacity_H, HP_capacity_H_only
+    C = np.minimum(reqCoolingOutput, possRecoveredCHW)
+    H = heatCoolRatio * C
+    return C, H, np.minimum(reqHeatingOutput - H, heatingCapacity - H)
+
+
+def heating_only_split(
+    H_only, heatingCapacity, waterSource, airWaterSource, dryBulb, groundTemp, oceanTemp, groundCapacity, oceanCapacity
+) -> tuple:
+    # HP_capacity_H_only_WS, _GS, _OS, _AS: the air source goes first when the air is warmer than the ground
+    # and the ground warmer than the ocean, the warmer of ground and ocean goes first among the water sources
+    airFirst = (dryBulb > groundTemp) & (groundTemp > oceanTemp)
+    waterCap = heatingCapacity * (waterSource + airWaterSource)
+    airCap = heatingCapacity * airWaterSource
+    beyondAir = H_only - airCap
+    beyondAir = np.where(beyondAir < 0, 0, beyondAir)
+    WS = np.where(airFirst, np.minimum(beyondAir, waterCap), np.minimum(H_only, waterCap))
+    GS = np.where(
+        groundTemp > oceanTemp,
+        np.minimum(WS, groundCapacity),
+        np.minimum(WS - np.minimum(WS, oceanCapacity), groundCapacity),
+    )
+    OS = np.where(
+        groundTemp <= oceanTemp,
+        np.minimum(WS, oceanCapacity),
+        np.minimum(WS - np.minimum(WS, groundCapacity), oceanCapacity),
+    )
+    AS = np.where(airFirst, np.minimum(H_only, airCap), np.minimum(H_only - GS - OS, airCap))
+    return WS, GS, OS, AS
+
+
+def chiller_dispatch(reqCoolingOutput, HP_capacity_C, chillerCapacity, coolingCapacity) -> tuple:
+    # chiller_output, HP_capacity_C_only
+    chiller = np.minimum(reqCoolingOutput - HP_capacity_C, chillerCapacity)
+    return chiller, np.minimum(reqCoolingOutput - HP_capacity_C - chiller, coolingCapacity - HP_capacity_C)
+
+
+def chiller_lift_temps(chiller, chillerCapacity, maxLift, minLift, capacityMinLift, CHW_districtSTP) -> tuple:
+    # chiller_lift, chiller_CWS_temp: the lift falls linearly from maxLift towards full capacity, no lift
+    # when the chiller is off
+    slope = (maxLift - minLift) / (chillerCapacity - capacityMinLift)
+    lift = np.where(
+        chiller >= 1, np.maximum(maxLift, slope * chiller + (chillerCapacity - slope * chillerCapacity)), 0.0
+    )
+    return lift, np.where(lift == 0, 0, lift + CHW_districtSTP)
+
+
+def sink_max(coolingCapacity, sinkCapacity, chillerRejected) -> np.ndarray:
+    # GS_max, OS_max, CT_max: what the chiller left of a sink, up to the heat pump cooling capacity
+    return np.maximum(0, np.minimum(coolingCapacity, sinkCapacity - chillerRejected))
+
+
+def water_flow(btuh, deltaT) -> np.ndarray:
+    # gpm carrying `btuh` across `deltaT`
+    return btuh / 500 / deltaT
+
+
+def boiler_dispatch(boilerCapacity, districtHWSflow, to_HW_district, TES_H_flowOut, HW_deltaT, efficiency) -> tuple:
+    # boiler_output, boiler_HWSflow, boiler_energy: the boiler covers the district flow the heat pumps and
+    # the hot tank leave over
+    output = np.minimum(boilerCapacity, (districtHWSflow - to_HW_district - TES_H_flowOut) * 500 * HW_deltaT)
+    return output, water_flow(output, HW_deltaT), (output / efficiency) / 3412
+
+
+class HeatPumpMap(BaseModel):
+    # the performance-map rows grouped by (entering HW, entering CHW, leaving HW), so each hour's
+    # nearest-entering-temperature match is a searchsorted instead of an hours x rows comparison
+    enteringHW: np.ndarray  # sorted unique values
+    enteringCHW: np.ndarray
+    leavingHW: np.ndarray
+    rows: np.ndarray  # map rows ordered by key, ascending row within a key
+    keys: np.ndarray  # sorted key of each entry of rows
 
+    class Config:
+        arbitrary_types_allowed = True
 
-class heatPump(BaseModel):
+    @classmethod
+    def from_series(cls, HP_enteringHW: pd.Series, HP_enteringCHW: pd.Series, HP_leavingHW: pd.Series) -> "HeatPumpMap":
+        enteringHW, hw = np.unique(HP_enteringHW.to_numpy(), return_inverse=True)
+        enteringCHW, chw = np.unique(HP_enteringCHW.to_numpy(), return_inverse=True)
+        leavingHW, lhw = np.unique(HP_leavingHW.to_numpy(), return_inverse=True)
+        keys = (hw * len(enteringCHW) + chw) * len(leavingHW) + lhw
+        rows = np.argsort(keys, kind="stable")
+        return cls(
+            enteringHW=enteringHW,
+            enteringCHW=enteringCHW,
+            leavingHW=leavingHW,
+            rows=rows,
+            keys=keys[rows],
+        )
+
+    def match(self, districtHWRT: pd.Series, districtCHWRT: pd.Series, HW_districtSTP: pd.Series) -> np.ndarray:
+        # same result as heatPump's np.where(...)[1]: for each hour in turn, the ascending map rows whose
+        # entering HW and CHW are nearest to the district return temps and whose leaving HW equals the STP
+        hours = np.arange(len(districtHWRT))
+        hw_lo, hw_hi, hw_lo_ok, hw_hi_ok = _nearest(self.enteringHW, districtHWRT.to_numpy())
+        chw_lo, chw_hi, chw_lo_ok, chw_hi_ok = _nearest(self.enteringCHW, districtCHWRT.to_numpy())
+        stp = HW_districtSTP.to_numpy()
+        lhw = np.searchsorted(self.leavingHW, stp).clip(0, len(self.leavingHW) - 1)
+        lhw_ok = self.leavingHW[lhw] == stp
+
+        found_hours, found_rows = [], []
+        for hw, hw_ok in ((hw_lo, hw_lo_ok), (hw_hi, hw_hi_ok)):
+            for chw, chw_ok in ((chw_lo, chw_lo_ok), (chw_hi, chw_hi_ok)):
+                ok = hw_ok & chw_ok & lhw_ok
+                key = ((hw * len(self.enteringCHW) + chw) * len(self.leavingHW) + lhw)[ok]
+                start = np.searchsorted(self.keys, key, side="left")
+                count = np.searchsorted(self.keys, key, side="right") - start
+                offsets = np.arange(count.sum()) - np.repeat(np.cumsum(count) - count, count)
+                found_hours.append(np.repeat(hours[ok], count))
+                found_rows.append(self.rows[np.repeat(start, count) + offsets])
+        found_hours = np.concatenate(found_hours)
+        found_rows = np.concatenate(found_rows)
+        return found_rows[np.lexsort((found_rows, found_hours))]
+
+
+class heatPump(CachedModel):
     districtHWRT: pd.Series
     districtCHWRT: pd.Series
     districtHWSflow: pd.Series
@@ -65,118 +416,83 @@ class heatPump(BaseModel):
     class Config:
         arbitrary_types_allowed = True
 
-    def min_diff(self, data: pd.Series, target: pd.Series) -> int:
-        # Convert data_series and target_series to NumPy arrays for numerical operations
-        data_values = data.values
-        target_values = target.values
-        # data_values = self.HP_enteringHW.values
-        # target_values = self.districtHWRT.values
-
-        # Reshape self.data to (1, 4) to broadcast across self.target
-        data_values_reshaped = data_values.reshape(1, -1)  # Shape (1, 4)
-
-        # Subtract each element of data_values_reshaped from every element of self.target
-        diff = abs(target_values[:, np.newaxis] - data_values_reshaped)  # Broadcasting happens here
-        # diff now has shape (8760, 4), where each row contains the differences
-
-        # # Find the index of the minimum absolute difference for each element in self.target
-        # min_index = np.argmin(np.abs(diff), axis=1)
-        # # min_index now has shape (8760,) containing indices of minimum absolute differences
-        # min_index = pd.Series(min_index)
-        return (diff, np.min(diff, axis=1))
-
-    # the following three functions were giving wierd indices,check code
-    @computed_field
-    @property
+    @memoized_property
+    def performanceMap(self) -> HeatPumpMap:
+        return HeatPumpMap.from_series(self.HP_enteringHW, self.HP_enteringCHW, self.HP_leavingHW)
+
+    @memoized_property
+    def matching_indices(self) -> np.ndarray:
+        # map rows matched to each hour, shared by CHWST, heatingOutput and coolingOutput
+        return self.performanceMap.match(self.districtHWRT, self.districtCHWRT, self.HW_districtSTP)
+
+    @memoized_property
+    def groundMonthRows(self) -> np.ndarray:
+        # shared month match of the ground return, heat extraction and heat rejection schedules
+        return np.where(self.month_to_match[:, None] == self.gr_months.values)[1]
+
+    @cached_computed_field
     def CHWST(self) -> pd.Series:
-        diff_HW_HWRT, min_diff_HW_HWRT = self.min_diff(self.HP_enteringHW, self.districtHWRT)
-        diff_CHW_CHWRT, min_diff_CHW_CHWRT = self.min_diff(self.HP_enteringCHW, self.districtCHWRT)
-        # reshaped_HP_leavingHW = self.HP_leavingHW.values.reshape((1, self.HP_leavingHW.size))
-        # # Assuming self.HW_districtSTP is a pandas Series
-        # rereshaped_HP_leavingHW = np.tile(reshaped_HP_leavingHW, (8760, 1))
-        # reshape to convert single row to multiple rows to be able to broadcast
-        rereshaped_HP_leavingHW = self.HP_leavingHW.values[np.newaxis, :].repeat(8760, axis=0)
-        HW_districtSTP = self.HW_districtSTP.values
-        HW_districtSTP = self.HW_districtSTP.values.reshape((-1, 1))
-        matching_indices = np.where(
-            (diff_HW_HWRT == min_diff_HW_HWRT[:, np.newaxis])
-            & (diff_CHW_CHWRT == min_diff_CHW_CHWRT[:, np.newaxis])
-            & (rereshaped_HP_leavingHW == HW_districtSTP)
-        )[1]
+        matching_indices = self.matching_indices
         # Get the corresponding value from AE based on the matching index
         final_value = self.HP_leavingCHW[matching_indices] if matching_indices.size > 0 else None
         return final_value.reset_index(drop=True)
 
-    @computed_field
-    @property
+    @cached_computed_field
     def heatingOutput(self) -> pd.Series:
-        # get difference and min difference from the function
-        diff_HW_HWRT, min_diff_HW_HWRT = self.min_diff(self.HP_enteringHW, self.districtHWRT)
-        diff_CHW_CHWRT, min_diff_CHW_CHWRT = self.min_diff(self.HP_enteringCHW, self.districtCHWRT)
-        # reshape to first convert single row with values then to multiple rows to be able to broadcast
-        rereshaped_HP_leavingHW = self.HP_leavingHW.values[np.newaxis, :].repeat(8760, axis=0)
-        HW_districtSTP = self.HW_districtSTP.values.reshape((-1, 1))
-        matching_indices = np.where(
-            (diff_HW_HWRT == min_diff_HW_HWRT[:, np.newaxis])
-            & (diff_CHW_CHWRT == min_diff_CHW_CHWRT[:, np.newaxis])
-            & (rereshaped_HP_leavingHW == HW_districtSTP)
-        )[1]
+        matching_indices = self.matching_indices
         final_value = self.HP_maxHeating[matching_indices] if matching_indices.size > 0 else None
         return final_value.reset_index(drop=True)
 
-    @computed_field
-    @property
+    @cached_computed_field
     def coolingOutput(self) -> pd.Series:
-        diff_HW_HWRT, min_diff_HW_HWRT = self.min_diff(self.HP_enteringHW, self.districtHWRT)
-        diff_CHW_CHWRT, min_diff_CHW_CHWRT = self.min_diff(self.HP_enteringCHW, self.districtCHWRT)
-        # reshape to convert single row to multiple rows to be able to broadcast
-        rereshaped_HP_leavingHW = self.HP_leavingHW.values[np.newaxis, :].repeat(8760, axis=0)
-        HW_districtSTP = self.HW_districtSTP.values.reshape((-1, 1))
-        matching_indices = np.where(
-            (diff_HW_HWRT == min_diff_HW_HWRT[:, np.newaxis])
-            & (diff_CHW_CHWRT == min_diff_CHW_CHWRT[:, np.newaxis])
-            & (rereshaped_HP_leavingHW == HW_districtSTP)
-        )[1]
+        matching_indices = self.matching_indices
         final_value = self.HP_maxCooling[matching_indices] if matching_indices.size > 0 else None
         return final_value.reset_index(drop=True)
 
-    @computed_field
-    @property
+    @cached_computed_field
     def heatCoolRatio(self) -> pd.Series:
         # print("ppp",self.coolingOutput)
         return self.heatingOutput / self.coolingOutput
 
-    @computed_field
-    @property
-    def reqHeatingOutput(self) -> pd.Series:
-        value1 = (
-            (self.districtHWSflow + self.TES_H_shiftChargeRate - self.TES_H_flowOut)
-            * 500
-            * (self.HW_districtSTP - self.districtHWRT)
+    @memoized_property
+    def HW_deltaT(self) -> pd.Series:
+        return self.HW_districtSTP - self.districtHWRT
+
+    @memoized_property
+    def CHW_deltaT(self) -> pd.Series:
+        return self.districtCHWRT - self.CHWST
+
+    @memoized_property
+    def heatDemand(self) -> pd.Series:
+        # heating asked of the plant (district and hot-tank charging) before the heat pump capacity
+        return (self.districtHWSflow + self.TES_H_shiftChargeRate - self.TES_H_flowOut) * 500 * self.HW_deltaT
+
+    @memoized_property
+    def recoverableCooling(self) -> tuple:
+        return recoverable_cooling(
+            self.heatDemand.to_numpy(dtype=float),
+            self.heatCoolRatio[0],
+            self.HP_heatingCapacity,
+            self.HP_coolingCapacity,
         )
-        minimum = pd.Series(np.minimum(value1, self.HP_heatingCapacity))
-        # print("value1",value1,"self.HP_heatingCapacity",self.HP_heatingCapacity)
-        return minimum
 
-    @computed_field
-    @property
-    def possRecoveredCHW(self) -> pd.Series:
-        value1 = self.reqHeatingOutput / self.heatCoolRatio[0]
+    @cached_computed_field
+    def reqHeatingOutput(self) -> pd.Series:
+        return pd.Series(self.recoverableCooling[0])
 
-        return pd.Series(np.minimum(value1, self.HP_coolingCapacity))
+    @cached_computed_field
+    def possRecoveredCHW(self) -> pd.Series:
+        return pd.Series(self.recoverableCooling[1])
 
-    @computed_field
-    @property
+    @cached_computed_field
     def possRecoveredCHWFLow(self) -> pd.Series:
         return self.possRecoveredCHW / 500 / (self.districtCHWRT - self.CHWST)
 
-    @computed_field
-    @property
+    @cached_computed_field
     def reqHeatingOutput_gpm(self) -> pd.Series:
         return self.reqHeatingOutput / 500 / (self.HW_districtSTP - self.districtHWRT)
 
-    @computed_field
-    @property
+    @cached_computed_field
     def reqCoolingOutput(self) -> pd.Series:
         result_series = (
             (self.districtCHWSflow + self.TES_C_shiftChargeRate - self.TES_C_flowOut)
@@ -185,57 +501,49 @@ class heatPump(BaseModel):
         )
         return result_series
 
-    @computed_field
-    @property
+    @cached_computed_field
     def reqCoolingOutput_gpm(self) -> pd.Series:
         return self.reqCoolingOutput / 500 / (self.districtCHWRT - self.CHWST)
 
-    @computed_field
-    @property
+    @memoized_property
+    def heatRecoveryCapacity(self) -> tuple:
+        return heat_recovery_capacity(
+            self.reqCoolingOutput.to_numpy(dtype=float),
+            self.recoverableCooling[1],
+            self.recoverableCooling[0],
+            self.heatCoolRatio.to_numpy(dtype=float),
+            self.HP_heatingCapacity,
+        )
+
+    @cached_computed_field
     def HP_capacity_C(self) -> pd.Series:
-        return pd.Series(np.minimum(self.reqCoolingOutput, self.possRecoveredCHW))
+        return pd.Series(self.heatRecoveryCapacity[0])
 
-    @computed_field
-    @property
+    @cached_computed_field
     def HP_capacity_H(self) -> pd.Series:
-        return self.heatCoolRatio * self.HP_capacity_C
+        return pd.Series(self.heatRecoveryCapacity[1])
 
-    @computed_field
-    @property
+    @cached_computed_field
     def HP_capacity_H_only(self) -> pd.Series:
-        return pd.Series(
-            np.minimum(
-                self.reqHeatingOutput - self.HP_capacity_H,
-                self.HP_heatingCapacity - self.HP_capacity_H,
-            )
-        )
+        return pd.Series(self.heatRecoveryCapacity[2])
 
     ################# ground inputs ##########################
-    @computed_field
-    @property
+    @cached_computed_field
     def gr_returnTemp(self) -> pd.Series:
-        # Find the index where month matches
-        # print("mmm",self.month_to_match[:, None],self.gr_months.values,self.gr_months)
-        HW_indices = np.where(self.month_to_match[:, None] == self.gr_months.values)[1]
-        # print("llll",HW_indices)
+        HW_indices = self.groundMonthRows
         # Get the corresponding value from hotWaterSetpoint column
         return (self.grReturn_D_LWT[HW_indices] + 0.0001).reset_index(drop=True)
 
-    @computed_field
-    @property
+    @cached_computed_field
     def gr_returnTemp_HtRjt(self) -> pd.Series:
-        # Find the index where month matches
-        # print("mmm",self.month_to_match[:, None],self.gr_months.values,self.gr_months)
-        HW_indices = np.where(self.month_to_match[:, None] == self.gr_months.values)[1]
-        # print("llll",HW_indices)
+        HW_indices = self.groundMonthRows
         # Get the corresponding value from hotWaterSetpoint column
         gr_returnTemp_HtRjt = self.grReturn_HtRej_LWT[HW_indices].reset_index(drop=True)
 
         return gr_returnTemp_HtRjt
 
     ################# HP ##########################
-    @computed_field
-    @property
+    @cached_computed_field
     def oceanWaterTemp(self) -> pd.Series:
         # # # static_input_df = pd.DataFrame()
         # # # Extract day and month from the date
@@ -339,150 +647,47 @@ class heatPump(BaseModel):
         # return pd.Series(mapped_temps['x']),pd.Series(day_value).reset_index(drop=True),pd.Series(month_value).reset_index(drop=True),pd.Series(lookup_key).reset_index(drop=True)
         return self.ocean_df_WS_temporary
 
-    @computed_field
-    @property
-    def HP_capacity_H_only_WS(self) -> pd.Series:
-        # Calculate the first condition (G3 > H3) & (G3 > D3)
-        first_condition = (self.dryBulb_temp > self.gr_returnTemp) & (self.gr_returnTemp > self.oceanWaterTemp)
-
-        # Calculate the value when the first condition is True
-        max_value = (self.HP_capacity_H_only - self.HP_heatingCapacity * self.HP_airWaterSource).clip(lower=0)
-        first_result = pd.Series(
-            np.minimum(
-                max_value,
-                self.HP_heatingCapacity * (self.HP_waterSource + self.HP_airWaterSource),
-            )
+    @memoized_property
+    def heatingOnlySplit(self) -> tuple:
+        return heating_only_split(
+            self.heatRecoveryCapacity[2],
+            self.HP_heatingCapacity,
+            self.HP_waterSource,
+            self.HP_airWaterSource,
+            self.dryBulb_temp.to_numpy(dtype=float),
+            self.gr_returnTemp.to_numpy(dtype=float),
+            self.oceanWaterTemp.to_numpy(dtype=float),
+            self.HP_grSource_capacity,
+            self.HP_ocean_capacity,
         )
 
-        # Calculate the value when the first condition is False
-        second_result = pd.Series(
-            np.minimum(
-                self.HP_capacity_H_only,
-                self.HP_heatingCapacity * (self.HP_waterSource + self.HP_airWaterSource),
-            )
-        )
-
-        # Initialize result Series with the same index as self.HP_capacity_H_only
-        result = pd.Series(index=self.HP_capacity_H_only.index)
-
-        # Apply the condition using boolean indexing
-        result[first_condition] = first_result[first_condition]
-        result[~first_condition] = second_result[~first_condition]
-
-        # Return the result Series
-        return result
+    @cached_computed_field
+    def HP_capacity_H_only_WS(self) -> pd.Series:
+        return pd.Series(self.heatingOnlySplit[0])
 
-    @computed_field
-    @property
+    @cached_computed_field
     def HP_capacity_H_only_GS(self) -> pd.Series:
-        # Calculate the first condition H3 > D3
-        first_condition = self.gr_returnTemp > self.oceanWaterTemp
-
-        # Calculate MIN(AM3, GS_Cap)
-        min_AM3_GS_Cap = pd.Series(np.minimum(self.HP_capacity_H_only_WS, self.HP_grSource_capacity))
-
-        # Calculate MIN(AM3 - MIN(AM3, SW_Cap), GS_Cap)
-        min_AM3_SW_GS_Cap = pd.Series(
-            np.minimum(
-                self.HP_capacity_H_only_WS - pd.Series(np.minimum(self.HP_capacity_H_only_WS, self.HP_ocean_capacity)),
-                self.HP_grSource_capacity,
-            )
-        )
-
-        # min_AM3_SW_GS_Cap = min_AM3_SW_GS_Cap.where(min_AM3_SW_GS_Cap > 0, 0)  # Ensure non-negative result
-
-        # Apply the condition using boolean indexing
-        result = pd.Series(
-            index=self.HP_capacity_H_only_WS.index
-        )  # Initialize result Series with the same index as AM3
-        result[first_condition] = min_AM3_GS_Cap
-        result[~first_condition] = min_AM3_SW_GS_Cap
+        return pd.Series(self.heatingOnlySplit[1])
 
-        # Return the result Series
-        return result
-
-    # =IF(H3<=D3,MIN(AM3,SW_Cap),MIN(AM3-MIN(AM3,GS_Cap),SW_Cap))
-    @computed_field
-    @property
+    @cached_computed_field
     def HP_capacity_H_only_OS(self) -> pd.Series:
-        # Calculate the first condition (G3 > H3) & (G3 > D3)
-        first_condition = self.gr_returnTemp <= self.oceanWaterTemp
-
-        # Calculate MIN(AM3, GS_Cap)
-        min1 = pd.Series(np.minimum(self.HP_capacity_H_only_WS, self.HP_ocean_capacity))
-
-        # Calculate MIN(AM3 - MIN(AM3, SW_Cap), GS_Cap)
-        min2 = pd.Series(
-            np.minimum(
-                self.HP_capacity_H_only_WS
-                - pd.Series(np.minimum(self.HP_capacity_H_only_WS, self.HP_grSource_capacity)),
-                self.HP_ocean_capacity,
-            )
-        )
-
-        # min_AM3_SW_GS_Cap = min_AM3_SW_GS_Cap.where(min_AM3_SW_GS_Cap > 0, 0)  # Ensure non-negative result
+        return pd.Series(self.heatingOnlySplit[2])
 
-        # Apply the condition using boolean indexing
-        result = pd.Series(
-            index=self.HP_capacity_H_only_WS.index
-        )  # Initialize result Series with the same index as AM3
-        result[first_condition] = min1
-        result[~first_condition] = min2
-
-        # Return the result Series
-        return result
-
-    # =IF(AND(G3>H3,G3>D3),MIN(AK3,AS_WS_pct*HP_HT_Cap),MIN(AK3-AN3-AO3,HP_HT_Cap*AS_WS_pct))
-    @computed_field
-    @property
+    @cached_computed_field
     def HP_capacity_H_only_AS(self) -> pd.Series:
-        # Calculate the first condition H3 > D3
-        first_condition = (self.dryBulb_temp > self.gr_returnTemp) & (self.gr_returnTemp > self.oceanWaterTemp)
-
-        # Calculate MIN(AM3, GS_Cap)
-        minimum1 = pd.Series(
-            np.minimum(
-                self.HP_capacity_H_only,
-                self.HP_heatingCapacity * self.HP_airWaterSource,
-            )
-        )
-
-        # pd.concat([self.HP_capacity_H_only_WS, self.HP_grSource_capacity], axis=1).min(axis=1)
-
-        # Calculate MIN(AM3 - MIN(AM3, SW_Cap), GS_Cap)
-        minimum2 = pd.Series(
-            np.minimum(
-                self.HP_capacity_H_only - self.HP_capacity_H_only_GS - self.HP_capacity_H_only_OS,
-                self.HP_heatingCapacity * self.HP_airWaterSource,
-            )
-        )
-
-        # min_AM3_SW_GS_Cap = min_AM3_SW_GS_Cap.where(min_AM3_SW_GS_Cap > 0, 0)  # Ensure non-negative result
-
-        # Apply the condition using boolean indexing
-        result1 = pd.Series(
-            index=self.HP_capacity_H_only_WS.index, dtype=float
-        )  # Initialize result Series with the same index as AM3
-        result1[first_condition] = minimum1
-        result1[~first_condition] = minimum2
-
-        # Return the result Series
-        return result1
+        return pd.Series(self.heatingOnlySplit[3])
 
     ########## cooling tower ############
 
-    @computed_field
-    @property
+    @cached_computed_field
     def CTapproach(self) -> pd.Series:
         # print("self.CT_CUP_month.values",self.CT_CUP_month.values)
         HW_indices = np.where(self.month_to_match[:, None] == self.CT_CUP_month.values)[1]
         # print("HW_indices",HW_indices)
-        self.CT_CUP_value = self.CT_CUP_value.reset_index(drop=True)
         # Get the corresponding value from hotWaterSetpoint column
-        return self.CT_CUP_value[HW_indices].reset_index(drop=True)
+        return self.CT_CUP_value.reset_index(drop=True)[HW_indices].reset_index(drop=True)
 
-    @computed_field
-    @property
+    @cached_computed_field
     def cooler_CWRT(self) -> pd.Series:
         # Calculate the cooler_CWRT Series
         cooler_cwrt_series = self.wetBulb_temp + self.CTapproach
@@ -493,787 +698,432 @@ class heatPump(BaseModel):
         return cooler_cwrt_series
 
     #######chiller#################
-    @computed_field
-    @property
-    def chiller_output(self) -> pd.Series:
-        return pd.Series(np.minimum(self.reqCoolingOutput - self.HP_capacity_C, self.chiller_maxCapacity))
+    @memoized_property
+    def chillerDispatch(self) -> tuple:
+        return chiller_dispatch(
+            self.reqCoolingOutput.to_numpy(dtype=float),
+            self.heatRecoveryCapacity[0],
+            self.chiller_maxCapacity,
+            self.HP_coolingCapacity,
+        )
 
-    # read this later
-    @computed_field
-    @property
-    def chiller_gr_hRjt(self) -> pd.Series:
-        # Apply the logic using pandas operations
-        condition1 = (self.gr_returnTemp_HtRjt < self.oceanWaterTemp) & (self.gr_returnTemp_HtRjt < self.cooler_CWRT)
-        condition2 = (self.oceanWaterTemp < self.gr_returnTemp_HtRjt) & (self.gr_returnTemp_HtRjt < self.cooler_CWRT)
-        condition3 = (self.cooler_CWRT < self.gr_returnTemp_HtRjt) & (self.gr_returnTemp_HtRjt < self.oceanWaterTemp)
-
-        result = pd.Series(np.nan, index=self.gr_returnTemp_HtRjt.index)  # Initialize result Series with NaN
-        L3 = self.chiller_output
-        GS_Cap = self.HP_grSource_capacity
-        SW_Cap = self.HP_ocean_capacity
-        CT_Cap = self.HP_CT_capacity
-        # Apply logic using broadcasting and scalar values
-        result[condition1] = np.minimum(L3[condition1], GS_Cap)
-        result[condition2] = np.minimum(GS_Cap, L3[condition2] - np.minimum(L3[condition2], SW_Cap))
-        result[condition3] = np.minimum(GS_Cap, L3[condition3] - np.minimum(L3[condition3], CT_Cap))
-
-        # Compute values for other conditions (using scalar values)
-        minimum = np.minimum(
-            GS_Cap,
-            L3[~(condition1 | condition2 | condition3)]
-            - np.minimum(L3[~(condition1 | condition2 | condition3)], CT_Cap)
-            - np.minimum(L3[~(condition1 | condition2 | condition3)], SW_Cap),
+    @cached_computed_field
+    def chiller_output(self) -> pd.Series:
+        return pd.Series(self.chillerDispatch[0])
+
+    @memoized_property
+    def chillerSinkTemps(self) -> np.ndarray:
+        # hours x CHILLER_SINKS temperatures the chiller rejects heat against
+        temps = {
+            HeatSink.TOWER: self.cooler_CWRT,
+            HeatSink.GROUND: self.gr_returnTemp_HtRjt,
+            HeatSink.OCEAN: self.oceanWaterTemp,
+        }
+        return np.column_stack([temps[sink] for sink in CHILLER_SINKS])
+
+    @memoized_property
+    def chiller_hRjt(self) -> np.ndarray:
+        # hours x CHILLER_SINKS heat rejected by the chiller, coolest sink first
+        return allocate_by_cost(
+            self.chillerSinkTemps,
+            [getattr(self, SINK_CAPACITY[sink]) for sink in CHILLER_SINKS],
+            self.chiller_output,
+            CHILLER_STRICT,
         )
-        result[~(condition1 | condition2 | condition3)] = np.maximum(0, minimum)
 
-        return result
+    def chiller_hRjtTo(self, sink: HeatSink) -> pd.Series:
+        return pd.Series(self.chiller_hRjt[:, CHILLER_SINKS.index(sink)], index=self.gr_returnTemp_HtRjt.index)
 
-    @computed_field
-    @property
-    def chiller_ocean_hRjt(self) -> pd.Series:
-        # Initialize result Series with NaN
-
-        E3 = self.gr_returnTemp_HtRjt
-        F3 = self.oceanWaterTemp
-        D3 = self.cooler_CWRT
-        L3 = self.chiller_output
-        GS_Cap = self.HP_grSource_capacity
-        SW_Cap = self.HP_ocean_capacity
-        CT_Cap = self.HP_CT_capacity
-
-        result = pd.Series(np.nan, index=E3.index)
-        # Condition 1: F3 <= E3 and F3 <= D3
-        condition1 = (F3 <= E3) & (F3 <= D3)
-        result[condition1] = np.minimum(L3[condition1], SW_Cap)
-
-        # Condition 2: E3 < F3 and F3 <= D3
-        condition2 = (E3 < F3) & (F3 <= D3)
-        result[condition2] = np.minimum(SW_Cap, L3[condition2] - np.minimum(L3[condition2], GS_Cap))
-
-        # Condition 3: D3 < F3 and F3 <= E3
-        condition3 = (D3 < F3) & (F3 <= E3)
-        result[condition3] = np.minimum(SW_Cap, L3[condition3] - np.minimum(L3[condition3], CT_Cap))
-
-        # Other conditions
-        other_conditions = ~(condition1 | condition2 | condition3)
-        minimum_value = np.minimum(
-            SW_Cap,
-            L3[other_conditions] - np.minimum(L3[other_conditions], CT_Cap) - np.minimum(L3[other_conditions], GS_Cap),
-        )
-        result[other_conditions] = np.maximum(0, minimum_value)
+    @cached_computed_field
+    def chiller_gr_hRjt(self) -> pd.Series:
+        return self.chiller_hRjtTo(HeatSink.GROUND)
 
-        return result
+    @cached_computed_field
+    def chiller_ocean_hRjt(self) -> pd.Series:
+        return self.chiller_hRjtTo(HeatSink.OCEAN)
 
-    @computed_field
-    @property
+    @cached_computed_field
     def chiller_CT_hRjt(self) -> pd.Series:
-        E3 = self.gr_returnTemp_HtRjt
-        F3 = self.oceanWaterTemp
-        D3 = self.cooler_CWRT
-        L3 = self.chiller_output
-        GS_Cap = self.HP_grSource_capacity
-        SW_Cap = self.HP_ocean_capacity
-        CT_Cap = self.HP_CT_capacity
-        # Initialize result Series with NaN
-        result = pd.Series(np.nan, index=D3.index)
-
-        # Condition 1: D3 < F3 and D3 < E3
-        condition1 = (D3 < F3) & (D3 < E3)
-        result[condition1] = np.minimum(L3[condition1], CT_Cap)
-
-        # Condition 2: F3 < D3 and D3 < E3
-        condition2 = (F3 < D3) & (D3 < E3)
-        result[condition2] = np.minimum(CT_Cap, L3[condition2] - np.minimum(L3[condition2], SW_Cap))
-
-        # Condition 3: E3 < D3 and D3 < F3
-        condition3 = (E3 < D3) & (D3 < F3)
-        result[condition3] = np.minimum(CT_Cap, L3[condition3] - np.minimum(L3[condition3], GS_Cap))
-
-        # Other conditions
-        other_conditions = ~(condition1 | condition2 | condition3)
-        minimum_value = np.minimum(
-            CT_Cap,
-            L3[other_conditions] - np.minimum(L3[other_conditions], GS_Cap) - np.minimum(L3[other_conditions], SW_Cap),
-        )
-        result[other_conditions] = np.maximum(0, minimum_value)
-
-        return result
+        return self.chiller_hRjtTo(HeatSink.TOWER)
 
-    @computed_field
-    @property
+    @cached_computed_field
     def chiller_CHWSflow(self) -> pd.Series:
         return self.chiller_output / 500 / (self.districtCHWRT - self.CHW_districtSTP)
 
-    @computed_field
-    @property
-    def chiller_lift(self) -> pd.Series:
-        # Calculate the numerator term
-        numerator_term = (self.Electric_Chiller_maxLift_input - self.Electric_Chiller_minLift_input) / (
-            self.chiller_maxCapacity - self.Electric_Chiller_capacity_minLift_input
-        )
-
-        # Initialize an array to store the results
-        result = np.zeros_like(self.chiller_output)
-
-        # Apply the formula vectorized
-        mask = self.chiller_output >= 1  # Create a mask where L3 >= 1
-        result[mask] = np.maximum(
+    @memoized_property
+    def chillerLiftTemps(self) -> tuple:
+        return chiller_lift_temps(
+            self.chillerDispatch[0],
+            self.chiller_maxCapacity,
             self.Electric_Chiller_maxLift_input,
-            numerator_term * self.chiller_output[mask]
-            + (self.chiller_maxCapacity - numerator_term * self.chiller_maxCapacity),
+            self.Electric_Chiller_minLift_input,
+            self.Electric_Chiller_capacity_minLift_input,
+            self.CHW_districtSTP.to_numpy(dtype=float),
         )
 
-        # Add the result as a new column to the DataFrame
-        result_series = pd.Series(result)
-
-        return result_series
+    @cached_computed_field
+    def chiller_lift(self) -> pd.Series:
+        return pd.Series(self.chillerLiftTemps[0])
 
-    @computed_field
-    @property
+    @cached_computed_field
     def chiller_CWS_temp(self) -> pd.Series:
-        # Extract underlying numpy arrays from DataFrame columns
-        chiller_lift = self.chiller_lift.values
-        CHW_districtSTP = self.CHW_districtSTP.values
-
-        # Calculate chiller_CWS_temp using numpy vectorized operations
-        chiller_CWS_temp = np.where(chiller_lift == 0, 0, chiller_lift + CHW_districtSTP)
-
-        # Assign the result back to the DataFrame
-        return pd.Series(chiller_CWS_temp)
+        return pd.Series(self.chillerLiftTemps[1])
 
     ############### HP #################
-    @computed_field
-    @property
+    @cached_computed_field
     def HP_capacity_C_only(self) -> pd.Series:
         # =MIN(AE3-AJ3-Chillers!L3,'Input Fields'!$B$11-AJ3)
-        return pd.Series(
-            np.minimum(
-                self.reqCoolingOutput - self.HP_capacity_C - self.chiller_output,
-                self.HP_coolingCapacity - self.HP_capacity_C,
-            )
-        )
+        return pd.Series(self.chillerDispatch[1])
 
-    # Function to find the index corresponding to the second smallest value across multiple Series
-    def find_x_min_index_across_series(self, position) -> pd.Series:
-        series_list = [
+    @memoized_property
+    def HS_priority(self) -> np.ndarray:
+        # hours x 4 int8 HeatSink codes, coolest sink first; one argsort ranks all four at once
+        # (default sort kind, ties between sinks break the same way the labelled ranking always has)
+        temps = np.column_stack([
             self.oceanWaterTemp,
             self.gr_returnTemp_HtRjt,
             self.cooler_CWRT,
             self.dryBulb_temp,
-        ]
-
-        # Concatenate the Series into a DataFrame
-        df = pd.concat(series_list, axis=1)
+        ]).astype(float)
+        return np.argsort(temps, axis=1).astype(np.int8)
 
-        # Find the indices of the sorted values (ascending order)
-        sorted_indices = np.argsort(df.values, axis=1)
+    def HS_priorityLabels(self, rank: int) -> pd.Series:
+        return pd.Series(np.array(HEAT_SINKS, dtype=object)[self.HS_priority[:, rank]])
 
-        # Get the index of the second smallest value (sorted_indices[:, 1])
-        x_min_index = df.columns[sorted_indices[:, position]]
-
-        return x_min_index
-
-    @computed_field
-    @property
+    @cached_computed_field
     def HS_Priority1(self) -> pd.Series:
-        self.gr_returnTemp_HtRjt.rename("gr_returnTemp_HtRjt", inplace=True)
-        custom_names = {
-            "Ht Rej - LWT*": "Ground Source",
-            "cooler_CWRT": "Tower Source",
-            "Ocean Water Temp (°F) For Water-Source": "Ocean Source",
-            "Dry Bulb Temp (°F)": "Air Source",
-        }
-        # Call the function with the list of Series and map names to get custom names
-        min_index_across_series = self.find_x_min_index_across_series(0).map(custom_names)
-        return min_index_across_series
+        return self.HS_priorityLabels(0)
 
-    @computed_field
-    @property
+    @cached_computed_field
     def HS_Priority2(self) -> pd.Series:
-        custom_names = {
-            "Ht Rej - LWT*": "Ground Source",
-            "cooler_CWRT": "Tower Source",
-            "Ocean Water Temp (°F) For Water-Source": "Ocean Source",
-            "Dry Bulb Temp (°F)": "Air Source",
-        }
-        # Call the function with the list of Series and map names to get custom names
-        min_index_across_series = self.find_x_min_index_across_series(1).map(custom_names)
-        return min_index_across_series
+        return self.HS_priorityLabels(1)
 
-    @computed_field
-    @property
+    @cached_computed_field
     def HS_Priority3(self) -> pd.Series:
-        custom_names = {
-            "Ht Rej - LWT*": "Ground Source",
-            "cooler_CWRT": "Tower Source",
-            "Ocean Water Temp (°F) For Water-Source": "Ocean Source",
-            "Dry Bulb Temp (°F)": "Air Source",
-        }
-        # Call the function with the list of Series and map names to get custom names
-        min_index_across_series = self.find_x_min_index_across_series(2).map(custom_names)
-        return min_index_across_series
+        return self.HS_priorityLabels(2)
 
-    @computed_field
-    @property
+    @cached_computed_field
     def HS_Priority4(self) -> pd.Series:
-        custom_names = {
-            "Ht Rej - LWT*": "Ground Source",
-            "cooler_CWRT": "Tower Source",
-            "Ocean Water Temp (°F) For Water-Source": "Ocean Source",
-            "Dry Bulb Temp (°F)": "Air Source",
-        }
-        # Call the function with the list of Series and map names to get custom names
-        min_index_across_series = self.find_x_min_index_across_series(3).map(custom_names)
-        return min_index_across_series
+        return self.HS_priorityLabels(3)
 
-    @computed_field
-    @property
+    @cached_computed_field
     def GS_max(self) -> pd.Series:
-        # Apply element-wise operations on Series
-        min_value = pd.Series(
-            np.minimum(
-                self.HP_coolingCapacity,
-                self.HP_grSource_capacity - self.chiller_gr_hRjt,
-            )
-        )
-        max_value = np.maximum(0, min_value)
-        return max_value
+        return pd.Series(sink_max(self.HP_coolingCapacity, self.HP_grSource_capacity, self.chiller_gr_hRjt.to_numpy()))
 
-    @computed_field
-    @property
+    @cached_computed_field
     def OS_max(self) -> pd.Series:
         # =MAX(0,MIN(HP_CL_Cap,SW_Cap-Chillers!Q3))
-        # Apply element-wise operations on Series
-        min_value = pd.Series(
-            np.minimum(
-                self.HP_coolingCapacity,
-                self.HP_ocean_capacity - self.chiller_ocean_hRjt,
-            )
-        )
-        max_value = np.maximum(0, min_value)
-        return max_value
+        return pd.Series(sink_max(self.HP_coolingCapacity, self.HP_ocean_capacity, self.chiller_ocean_hRjt.to_numpy()))
 
-    @computed_field
-    @property
+    @cached_computed_field
     def CT_max(self) -> pd.Series:
-        # =MAX(0,MIN(HP_CL_Cap,SW_Cap-Chillers!Q3))
-        # Apply element-wise operations on Series
-        min_value = pd.Series(np.minimum(self.HP_coolingCapacity, self.HP_CT_capacity - self.chiller_CT_hRjt))
-        max_value = np.maximum(0, min_value)
-        return max_value
-
-    def calculate_AS_max(self, row, df) -> float:
-        # Check if AQ3 is "Air Source"
-        if row["p1"] == "Air Source":
-            return self.HP_coolingCapacity * self.HP_airWaterSource
-
-        # Calculate initial value
-        value = self.HP_coolingCapacity * self.HP_airWaterSource
-
-        # Calculate subtracted value based on conditions
-        if row["p2"] == "Air Source":
-            subtract_value = df.loc[row.name, row["p1"]]
-        elif row["p3"] == "Air Source":
-            subtract_value = df.loc[row.name, row["p1"]] + df.loc[row.name, row["p2"]]
-        elif row["p4"] == "Air Source":
-            subtract_value = df.loc[row.name, row["p1"]] + df.loc[row.name, row["p2"]] + df.loc[row.name, row["p3"]]
-        else:
-            subtract_value = 0
-
-        # Apply MAX(0, ...)
-        result = max(0, value - subtract_value)
-
-        return result
-
-    @computed_field
-    @property
+        return pd.Series(sink_max(self.HP_coolingCapacity, self.HP_CT_capacity, self.chiller_CT_hRjt.to_numpy()))
+
+    def sinkCaps(self, air=None) -> np.ndarray:
+        # hours x 4 cooling-only caps in HeatSink order
+        air = np.zeros(len(self.GS_max)) if air is None else air
+        return np.column_stack([self.OS_max, self.GS_max, self.CT_max, air]).astype(float)
+
+    @cached_computed_field
     def AS_max(self) -> pd.Series:
-        df = pd.DataFrame(
-            {
-                "Ground Source": self.GS_max,
-                "Tower Source": self.CT_max,
-                "Ocean Source": self.OS_max,
-                "p1": self.HS_Priority1,
-                "p2": self.HS_Priority2,
-                "p3": self.HS_Priority3,
-                "p4": self.HS_Priority4,
-            }
-        )
-        # Apply custom_formula to each row using apply along rows axis (axis=1)
-        df["Result"] = df.apply(lambda row: self.calculate_AS_max(row, df), axis=1)
-        return df["Result"]
-
-    # function to calulate source wise capacity- common fn for all four
-    def calculate_HP_capacity_C_only_source(self, row, df, source) -> float:
-        if row["p1"] == source:
-            return min(row["Air Source"], row["HP_coolingOnly"])
-
-        else:
-            if row["p2"] == source:
-                value_ap = row["HP_coolingOnly"]
-                index_aq = df.columns.get_loc(row["p1"])
-                value_aq = df.loc[row.name, df.columns[index_aq]]
-                # print("index_aq",index_aq,row.name)
-                return min(row[source], max(0, value_ap - value_aq))
-            if row["p3"] == source:
-                value_ap = row["HP_coolingOnly"]
-                index_aq = df.columns.get_loc(row["p1"])
-                value_aq = df.loc[row.name, df.columns[index_aq]]
-                index_ar = df.columns.get_loc(row["p2"])
-                value_ar = df.loc[row.name, df.columns[index_ar]]
-                return min(row[source], max(0, value_ap - value_aq - value_ar))
-            if row["p4"] == source:
-                value_ap = row["HP_coolingOnly"]
-                index_aq = df.columns.get_loc(row["p1"])
-                value_aq = df.loc[row.name, df.columns[index_aq]]
-                index_ar = df.columns.get_loc(row["p2"])
-                value_ar = df.loc[row.name, df.columns[index_ar]]
-                index_as = df.columns.get_loc(row["p3"])
-                value_as = df.loc[row.name, df.columns[index_as]]
-                return min(row[source], max(0, value_ap - value_aq - value_ar - value_as))
-
-    @computed_field
-    @property
-    def HP_capacity_C_only_AS(self) -> pd.Series:
-        df = pd.DataFrame(
-            {
-                "Ground Source": self.GS_max,
-                "Tower Source": self.CT_max,
-                "Ocean Source": self.OS_max,
-                "Air Source": self.AS_max,
-                "p1": self.HS_Priority1,
-                "p2": self.HS_Priority2,
-                "p3": self.HS_Priority3,
-                "p4": self.HS_Priority4,
-                "HP_coolingOnly": self.HP_capacity_C_only,
-            }
+        # air source gets its share of the cooling capacity less the caps of the sinks ranked above it
+        capacity = self.HP_coolingCapacity * self.HP_airWaterSource
+        left = capacity_left(self.HS_priority, self.sinkCaps(), HeatSink.AIR, capacity)
+        return pd.Series(left)
+
+    @memoized_property
+    def HP_capacity_C_only_sources(self) -> pd.DataFrame:
+        # cooling-only capacity by sink, all four from one dispatch; the top-ranked sink is
+        # capped by the air-source max whichever it is, as in the workbook
+        AS_max = self.AS_max.to_numpy(dtype=float)
+        allocation = dispatch_by_priority(
+            self.HS_priority,
+            self.sinkCaps(AS_max),
+            self.HP_capacity_C_only.to_numpy(dtype=float),
+            first_cap=AS_max,
         )
+        return pd.DataFrame(allocation, columns=list(HEAT_SINKS))
 
-        # print("value",self.HP_coolingCapacity,self.HP_airWaterSource,self.HP_coolingCapacity * self.HP_airWaterSource)
-        df["Result"] = df.apply(
-            lambda row: self.calculate_HP_capacity_C_only_source(row, df, "Air Source"),
-            axis=1,
-        )
-        return df["Result"]
+    @cached_computed_field
+    def HP_capacity_C_only_AS(self) -> pd.Series:
+        return self.HP_capacity_C_only_sources["Air Source"]
 
-    @computed_field
-    @property
+    @cached_computed_field
     def HP_capacity_C_only_GS(self) -> pd.Series:
-        df = pd.DataFrame(
-            {
-                "Ground Source": self.GS_max,
-                "Tower Source": self.CT_max,
-                "Ocean Source": self.OS_max,
-                "Air Source": self.AS_max,
-                "p1": self.HS_Priority1,
-                "p2": self.HS_Priority2,
-                "p3": self.HS_Priority3,
-                "p4": self.HS_Priority4,
-                "HP_coolingOnly": self.HP_capacity_C_only,
-            }
-        )
+        return self.HP_capacity_C_only_sources["Ground Source"]
 
-        df["Result"] = df.apply(
-            lambda row: self.calculate_HP_capacity_C_only_source(row, df, "Ground Source"),
-            axis=1,
-        )
-        return df["Result"]
-
-    @computed_field
-    @property
+    @cached_computed_field
     def HP_capacity_C_only_OS(self) -> pd.Series:
-        df = pd.DataFrame(
-            {
-                "Ground Source": self.GS_max,
-                "Tower Source": self.CT_max,
-                "Ocean Source": self.OS_max,
-                "Air Source": self.AS_max,
-                "p1": self.HS_Priority1,
-                "p2": self.HS_Priority2,
-                "p3": self.HS_Priority3,
-                "p4": self.HS_Priority4,
-                "HP_coolingOnly": self.HP_capacity_C_only,
-            }
-        )
-
-        df["Result"] = df.apply(
-            lambda row: self.calculate_HP_capacity_C_only_source(row, df, "Ocean Source"),
-            axis=1,
-        )
-        return df["Result"]
+        return self.HP_capacity_C_only_sources["Ocean Source"]
 
-    @computed_field
-    @property
+    @cached_computed_field
     def HP_capacity_C_only_TS(self) -> pd.Series:
-        df = pd.DataFrame(
-            {
-                "Ground Source": self.GS_max,
-                "Tower Source": self.CT_max,
-                "Ocean Source": self.OS_max,
-                "Air Source": self.AS_max,
-                "p1": self.HS_Priority1,
-                "p2": self.HS_Priority2,
-                "p3": self.HS_Priority3,
-                "p4": self.HS_Priority4,
-                "HP_coolingOnly": self.HP_capacity_C_only,
-            }
-        )
-
-        df["Result"] = df.apply(
-            lambda row: self.calculate_HP_capacity_C_only_source(row, df, "Tower Source"),
-            axis=1,
-        )
-        return df["Result"]
+        return self.HP_capacity_C_only_sources["Tower Source"]
 
-    @computed_field
-    @property
+    @cached_computed_field
     def HP_HW_gpm(self) -> pd.Series:
-        return (self.HP_capacity_H + self.HP_capacity_H_only) / 500 / (self.HW_districtSTP - self.districtHWRT)
+        return water_flow(self.HP_capacity_H + self.HP_capacity_H_only, self.HW_deltaT)
 
-    @computed_field
-    @property
+    @cached_computed_field
     def to_HW_district(self) -> pd.Series:
         return self.HP_HW_gpm - self.TES_H_shiftChargeRate
 
-    @computed_field
-    @property
+    @cached_computed_field
     def HP_CHW_gpm(self) -> pd.Series:
-        return (self.HP_capacity_C + self.HP_capacity_C_only) / 500 / (self.districtCHWRT - self.CHWST)
+        return water_flow(self.HP_capacity_C + self.HP_capacity_C_only, self.CHW_deltaT)
 
-    @computed_field
-    @property
+    @cached_computed_field
     def to_CHW_district(self) -> pd.Series:
         return self.HP_CHW_gpm - self.TES_C_shiftChargeRate
 
     ##########cooling tower###########
 
-    @computed_field
-    @property
+    @memoized_property
+    def CT_deltaT(self) -> pd.Series:
+        return self.cooler_CWRT - self.wetBulb_temp
+
+    @cached_computed_field
     def CT_CWSflow(self) -> pd.Series:
-        return (self.chiller_CT_hRjt + self.HP_capacity_C_only_TS) / 500 / (self.cooler_CWRT - self.wetBulb_temp)
+        return water_flow(self.chiller_CT_hRjt + self.HP_capacity_C_only_TS, self.CT_deltaT)
 
     ############### boiler ####################
 
-    @computed_field
-    @property
-    def boiler_output(self) -> pd.Series:
-        result = np.minimum(
+    @memoized_property
+    def boilerDispatch(self) -> tuple:
+        return boiler_dispatch(
             self.boiler_maxCapacity_input,
-            (self.districtHWSflow - self.to_HW_district - self.TES_H_flowOut)
-            * 500
-            * (self.HW_districtSTP - self.districtHWRT),
+            self.districtHWSflow.to_numpy(dtype=float),
+            self.to_HW_district.to_numpy(dtype=float),
+            self.TES_H_flowOut.to_numpy(dtype=float),
+            self.HW_deltaT.to_numpy(dtype=float),
+            self.boiler_efficiency_input,
         )
-        return pd.Series(result)
 
-    @computed_field
-    @property
+    @cached_computed_field
+    def boiler_output(self) -> pd.Series:
+        return pd.Series(self.boilerDispatch[0])
+
+    @cached_computed_field
     def boiler_HWSflow(self) -> pd.Series:
-        return self.boiler_output / 500 / (self.HW_districtSTP - self.districtHWRT)
+        return pd.Series(self.boilerDispatch[1])
 
-    @computed_field
-    @property
+    @cached_computed_field
     def boiler_energy(self) -> pd.Series:
-        efficiency = pd.Series([self.boiler_efficiency_input] * 8760)
-        return (self.boiler_output / efficiency) / 3412
+        return pd.Series(self.boilerDispatch[2])
 
     ######################## HS-HS ####################
+    # water sinks x HeatUse x hours tensors, first axis indexed by HeatSink (ocean, ground, tower)
 
-    @computed_field
-    @property
+    @cached_computed_field
     def gr_returnTemp_HtExEWT(self) -> pd.Series:
-        # Find the index where month matches
-        HW_indices = np.where(self.month_to_match[:, None] == self.gr_months.values)[1]
-        # print("HW_indices",HW_indices)
-        # Get the corresponding value from hotWaterSetpoint column
-        result_series = self.grReturn_HtEx_EWT[HW_indices].reset_index(drop=True)
-
-        return result_series
+        return self.grReturn_HtEx_EWT[self.groundMonthRows].reset_index(drop=True)
 
-    @computed_field
-    @property
+    @cached_computed_field
+    def gr_temp_ENT_HeatRjt(self) -> pd.Series:
+        return self.grReturn_HtRej_EWT[self.groundMonthRows].reset_index(drop=True)
+
+    @memoized_property
+    def HSHS_sourceTemp(self) -> np.ndarray:
+        # water sinks x hours
+        return np.stack([self.oceanWaterTemp, self.gr_returnTemp, self.cooler_CWRT]).astype(float)
+
+    @memoized_property
+    def HSHS_enteringTemp(self) -> np.ndarray:
+        # ocean and tower water enter at the source temperature less/plus the HS-HS delta T,
+        # ground water at its scheduled entering temperature
+        offset = np.array([-self.HSHS_deltaT_HP, self.HSHS_deltaT_HP, self.HSHS_deltaT_CH])
+        entering = self.HSHS_sourceTemp[:, np.newaxis, :] + offset[:, np.newaxis]
+        entering[HeatSink.GROUND, HeatUse.HP_HEATING] = self.gr_returnTemp_HtExEWT
+        entering[HeatSink.GROUND, HeatUse.HP_COOLING] = self.gr_temp_ENT_HeatRjt
+        entering[HeatSink.GROUND, HeatUse.CHILLER] = self.gr_temp_ENT_HeatRjt
+        entering[HeatSink.TOWER, HeatUse.HP_HEATING] = np.nan
+        return entering
+
+    @memoized_property
+    def HSHS_deltaT(self) -> np.ndarray:
+        # positive across the heat exchanger: source - entering for extraction, entering - source for rejection
+        source = self.HSHS_sourceTemp[:, np.newaxis, :]
+        entering = self.HSHS_enteringTemp
+        deltaT = entering - source
+        deltaT[:, HeatUse.HP_HEATING] = source[:, 0] - entering[:, HeatUse.HP_HEATING]
+        return deltaT
+
+    @memoized_property
+    def HSHS_capacity(self) -> np.ndarray:
+        capacity = np.full((WATER_SINKS, len(HeatUse), len(self.chiller_output)), np.nan)
+        capacity[HeatSink.GROUND, HeatUse.HP_HEATING] = self.HP_capacity_H_only_GS
+        capacity[HeatSink.OCEAN, HeatUse.HP_HEATING] = self.HP_capacity_H_only_OS
+        capacity[:, HeatUse.HP_COOLING] = self.HP_capacity_C_only_sources.to_numpy(dtype=float)[:, :WATER_SINKS].T
+        chiller_hRjt = self.chiller_hRjt
+        for sink in CHILLER_SINKS:
+            capacity[sink, HeatUse.CHILLER] = chiller_hRjt[:, CHILLER_SINKS.index(sink)]
+        return capacity
+
+    @memoized_property
+    def HSHS_flows(self) -> tuple[np.ndarray, np.ndarray]:
+        # (gpm, Btu/h) tensors
+        return hshs_flows(self.HSHS_capacity, self.HSHS_deltaT)
+
+    def HSHS_shortfalls(self, btuh: np.ndarray) -> tuple[pd.Series, pd.Series]:
+        # heating-only and cooling/chiller demand the water sinks did not take, deducted in workbook order
+        extraction = self.HP_capacity_H_only - self.HP_capacity_H_only_AS
+        for sink in HSHS_USES[HeatUse.HP_HEATING]:
+            extraction = extraction - btuh[sink, HeatUse.HP_HEATING]
+        rejection = self.HP_capacity_C_only + self.chiller_output - self.HP_capacity_C_only_AS
+        for use in (HeatUse.HP_COOLING, HeatUse.CHILLER):
+            for sink in HSHS_USES[use]:
+                rejection = rejection - btuh[sink, use]
+        return extraction, rejection
+
+    @cached_computed_field
     def gr_HtEx_HP_Heating_gpm(self) -> pd.Series:
-        return self.HP_capacity_H_only_GS / 500 / (self.gr_returnTemp - self.gr_returnTemp_HtExEWT)
+        return pd.Series(self.HSHS_flows[0][HeatSink.GROUND, HeatUse.HP_HEATING])
 
-    @computed_field
-    @property
+    @cached_computed_field
     def gr_HtEx_HP_Heating_btuh(self) -> pd.Series:
-        return self.gr_HtEx_HP_Heating_gpm * 500 * (self.gr_returnTemp - self.gr_returnTemp_HtExEWT)
+        return pd.Series(self.HSHS_flows[1][HeatSink.GROUND, HeatUse.HP_HEATING])
 
-    @computed_field
-    @property
+    @cached_computed_field
     def oc_temp_HP_HeatEx(self) -> pd.Series:
-        return self.oceanWaterTemp - self.HSHS_deltaT_HP
+        return pd.Series(self.HSHS_enteringTemp[HeatSink.OCEAN, HeatUse.HP_HEATING])
 
-    @computed_field
-    @property
+    @cached_computed_field
     def oc_H_HP_HeatEx_gpm(self) -> pd.Series:
-        return self.HP_capacity_H_only_OS / 500 / (self.oceanWaterTemp - self.oc_temp_HP_HeatEx)
+        return pd.Series(self.HSHS_flows[0][HeatSink.OCEAN, HeatUse.HP_HEATING])
 
-    @computed_field
-    @property
+    @cached_computed_field
     def oc_H_HP_HeatEx_btuh(self) -> pd.Series:
-        return self.oc_H_HP_HeatEx_gpm * 500 * (self.oceanWaterTemp - self.oc_temp_HP_HeatEx)
+        return pd.Series(self.HSHS_flows[1][HeatSink.OCEAN, HeatUse.HP_HEATING])
 
-    @computed_field
-    @property
-    def gr_temp_ENT_HeatRjt(self) -> pd.Series:
-        # Find the index where month matches
-        HW_indices = np.where(self.month_to_match[:, None] == self.gr_months.values)[1]
-
-        # Get the corresponding value from hotWaterSetpoint column
-        result_series = self.grReturn_HtRej_EWT[HW_indices].reset_index(drop=True)
-
-        return result_series
-
-    @computed_field
-    @property
+    @cached_computed_field
     def gr_HtRjt_HP_Cooling_gpm(self) -> pd.Series:
-        return self.HP_capacity_C_only_GS / 500 / (self.gr_temp_ENT_HeatRjt - self.gr_returnTemp)
+        return pd.Series(self.HSHS_flows[0][HeatSink.GROUND, HeatUse.HP_COOLING])
 
-    @computed_field
-    @property
+    @cached_computed_field
     def gr_HtRjt_HP_Cooling_btuh(self) -> pd.Series:
-        return self.gr_HtRjt_HP_Cooling_gpm * 500 * (self.gr_temp_ENT_HeatRjt - self.gr_returnTemp)
+        return pd.Series(self.HSHS_flows[1][HeatSink.GROUND, HeatUse.HP_COOLING])
 
-    @computed_field
-    @property
+    @cached_computed_field
     def oc_temp_ENT_HeatRjt(self) -> pd.Series:
-        return self.oceanWaterTemp + self.HSHS_deltaT_HP
+        return pd.Series(self.HSHS_enteringTemp[HeatSink.OCEAN, HeatUse.HP_COOLING])
 
-    @computed_field
-    @property
+    @cached_computed_field
     def oc_HtRjt_HP_Cooling_gpm(self) -> pd.Series:
-        return self.HP_capacity_C_only_OS / 500 / (self.oc_temp_ENT_HeatRjt - self.oceanWaterTemp)
+        return pd.Series(self.HSHS_flows[0][HeatSink.OCEAN, HeatUse.HP_COOLING])
 
-    @computed_field
-    @property
+    @cached_computed_field
     def oc_HtRjt_HP_Cooling_btuh(self) -> pd.Series:
-        return self.oc_HtRjt_HP_Cooling_gpm * 500 * (self.oc_temp_ENT_HeatRjt - self.oceanWaterTemp)
+        return pd.Series(self.HSHS_flows[1][HeatSink.OCEAN, HeatUse.HP_COOLING])
 
-    @computed_field
-    @property
+    @cached_computed_field
     def ct_temp_HeatRjt(self) -> pd.Series:
-        return self.cooler_CWRT + self.HSHS_deltaT_HP
+        return pd.Series(self.HSHS_enteringTemp[HeatSink.TOWER, HeatUse.HP_COOLING])
 
-    @computed_field
-    @property
+    @cached_computed_field
     def ct_HtRjt_HP_CWR_gpm(self) -> pd.Series:
-        return self.HP_capacity_C_only_TS / 500 / (self.ct_temp_HeatRjt - self.cooler_CWRT)
+        return pd.Series(self.HSHS_flows[0][HeatSink.TOWER, HeatUse.HP_COOLING])
 
-    @computed_field
-    @property
+    @cached_computed_field
     def ct_HtRjt_HP_CWR_btuh(self) -> pd.Series:
-        return self.ct_HtRjt_HP_CWR_gpm * 500 * (self.ct_temp_HeatRjt - self.cooler_CWRT)
+        return pd.Series(self.HSHS_flows[1][HeatSink.TOWER, HeatUse.HP_COOLING])
 
-    @computed_field
-    @property
+    @cached_computed_field
     def gr_HtRjt_chiller_gpm(self) -> pd.Series:
-        return self.chiller_gr_hRjt / 500 / (self.gr_temp_ENT_HeatRjt - self.gr_returnTemp)
+        return pd.Series(self.HSHS_flows[0][HeatSink.GROUND, HeatUse.CHILLER])
 
-    @computed_field
-    @property
+    @cached_computed_field
     def gr_HtRjt_chiller_btuh(self) -> pd.Series:
-        return self.gr_HtRjt_chiller_gpm * 500 * (self.gr_temp_ENT_HeatRjt - self.gr_returnTemp)
+        return pd.Series(self.HSHS_flows[1][HeatSink.GROUND, HeatUse.CHILLER])
 
-    @computed_field
-    @property
+    @cached_computed_field
     def oc_ENT_temp_HeatRjt(self) -> pd.Series:
-        return self.oceanWaterTemp + self.HSHS_deltaT_CH
+        return pd.Series(self.HSHS_enteringTemp[HeatSink.OCEAN, HeatUse.CHILLER])
 
-    @computed_field
-    @property
+    @cached_computed_field
     def oc_HtRjt_chiller_gpm(self) -> pd.Series:
-        return self.chiller_ocean_hRjt / 500 / (self.oc_ENT_temp_HeatRjt - self.oceanWaterTemp)
+        return pd.Series(self.HSHS_flows[0][HeatSink.OCEAN, HeatUse.CHILLER])
 
-    @computed_field
-    @property
+    @cached_computed_field
     def oc_HtRjt_chiller_btuh(self) -> pd.Series:
-        return self.oc_HtRjt_chiller_gpm * 500 * (self.oc_ENT_temp_HeatRjt - self.oceanWaterTemp)
+        return pd.Series(self.HSHS_flows[1][HeatSink.OCEAN, HeatUse.CHILLER])
 
-    @computed_field
-    @property
+    @cached_computed_field
     def ct_chiller_HeatRjt(self) -> pd.Series:
-        return self.cooler_CWRT + self.HSHS_deltaT_CH
+        return pd.Series(self.HSHS_enteringTemp[HeatSink.TOWER, HeatUse.CHILLER])
 
-    @computed_field
-    @property
+    @cached_computed_field
     def ct_chiller_HeatRjt_gpm(self) -> pd.Series:
-        return self.chiller_CT_hRjt / 500 / (self.ct_chiller_HeatRjt - self.cooler_CWRT)
+        return pd.Series(self.HSHS_flows[0][HeatSink.TOWER, HeatUse.CHILLER])
 
-    @computed_field
-    @property
+    @cached_computed_field
     def ct_chiller_HeatRjt_btuh(self) -> pd.Series:
-        return self.ct_chiller_HeatRjt_gpm * 500 * (self.ct_chiller_HeatRjt - self.cooler_CWRT)
+        return pd.Series(self.HSHS_flows[1][HeatSink.TOWER, HeatUse.CHILLER])
 
-    @computed_field
-    @property
+    @cached_computed_field
     def total_WS_HeatExt_shortfall(self) -> pd.Series:
-        print(
-            "hiiiii",
-            self.HP_capacity_H_only,
-            self.HP_capacity_H_only_AS,
-            self.gr_HtEx_HP_Heating_btuh,
-            self.oc_H_HP_HeatEx_btuh,
-        )
-        return (
-            self.HP_capacity_H_only
-            - self.HP_capacity_H_only_AS
-            - self.gr_HtEx_HP_Heating_btuh
-            - self.oc_H_HP_HeatEx_btuh
-        )
+        return self.HSHS_shortfalls(self.HSHS_flows[1])[0]
 
-    @computed_field
-    @property
+    @cached_computed_field
     def total_WS_HeatRjt_shortfall(self) -> pd.Series:
-        return (
-            self.HP_capacity_C_only
-            + self.chiller_output
-            - self.HP_capacity_C_only_AS
-            - self.gr_HtRjt_HP_Cooling_btuh
-            - self.oc_HtRjt_HP_Cooling_btuh
-            - self.ct_HtRjt_HP_CWR_btuh
-            - self.gr_HtRjt_chiller_btuh
-            - self.oc_HtRjt_chiller_btuh
-            - self.ct_chiller_HeatRjt_btuh
-        )
+        return self.HSHS_shortfalls(self.HSHS_flows[1])[1]
 
-    @computed_field
-    @property
+    @cached_computed_field
     def check_1(self) -> pd.Series:
         return self.HP_capacity_H_only_GS * self.HP_capacity_C_only_GS
 
-    @computed_field
-    @property
+    @cached_computed_field
     def check_2(self) -> pd.Series:
         return self.HP_capacity_H_only_GS * self.chiller_gr_hRjt
 
     ######################## final results compute to df ###############
-    def compute(self) -> pd.DataFrame:
-        df = pd.DataFrame(
-            {
-                "HP CHWST (°F)": self.CHWST,
-                "Max Unitary Heating Output (Btu/h)": self.heatingOutput,
-                "Max Unitary Cooling Output (Btu/h)": self.coolingOutput,
-                "Heat:Cool": self.heatCoolRatio,
-                "Required Heating Output (Btu/h)": self.reqHeatingOutput,
-                "HWSFLow": self.districtHWSflow,
-                "self.HW_districtSTP": self.HW_districtSTP,
-                "self.districtHWRT": self.districtHWRT,
-                "Possible Recovered CHW (Btu/h)": self.possRecoveredCHW,
-                "Possible Recovered CHW (gpm)": self.possRecoveredCHWFLow,
-            }
-        )
+    def compute(self, columns: Optional[list] = None) -> pd.DataFrame:
+        df = pd.DataFrame(project(self, HP_COLUMNS, columns))
 
         return df
 
-    def compute2(self) -> pd.DataFrame:
-        # x,a,b,c= self.oceanWaterTemp
-        df2 = pd.DataFrame(
-            {
-                "Required Heating Output (gpm)": self.reqHeatingOutput_gpm,
-                "Required Cooling Output (Btu/h)": self.reqCoolingOutput,
-                "Required Cooling Output (gpm)": self.reqCoolingOutput_gpm,
-                "Heat Pumps Heating+Cooling Capacity_(Cooling, Btu/h)": self.HP_capacity_C,
-                "Heat Pumps Heating+Cooling Capacity_(Heating, Btu/h)": self.HP_capacity_H,
-                "Total Heat Pump Heating Only Capacity": self.HP_capacity_H_only,
-                "Ground Water Return Temp (°F)": self.gr_returnTemp,
-                "Ambient Dry-bulb Temp (°F)": self.dryBulb_temp,
-                "Ocean Water Temp (°F)": self.oceanWaterTemp,
-                "Heat Pumps Heating Only Capacity_Water-Source (Btu/h)": self.HP_capacity_H_only_WS,
-                "Heat Pumps Heating Only Capacity_Ground Source (Btu/h)": self.HP_capacity_H_only_GS,
-                "Heat Pumps Heating Only Capacity_Ocean-Source (Btu/h)": self.HP_capacity_H_only_OS,
-                "Heat Pumps Heating Only Capacity_Air-Source (Btu/h)": self.HP_capacity_H_only_AS,
-                "Total Heat Pump Cooling Only Capacity": self.HP_capacity_C_only,
-                "cooler_CWRT": self.cooler_CWRT,
-                "Ground Water Return Temp (°F) For Water-Source Heat Rejection": self.gr_returnTemp_HtRjt,
-                "Priority 1_Heat Sink": self.HS_Priority1,
-                "Priority 2_Heat Sink": self.HS_Priority2,
-                "Priority 3_Heat Sink": self.HS_Priority3,
-                "Priority 4_Heat Sink": self.HS_Priority4,
-                "Ground Source Max (Btu/h)": self.GS_max,
-                "Ocean Source Max (Btu/h)": self.OS_max,
-                "Tower Source Max (Btu/h)": self.CT_max,
-                "Air Source Max (Btu/h)": self.AS_max,
-                "Heat Pumps Cooling Only Capacity_Air-Source (Btu/h)": self.HP_capacity_C_only_AS,
-                "Heat Pumps Cooling Only Capacity_Ground-Source (Btu/h)": self.HP_capacity_C_only_GS,
-                "Heat Pumps Cooling Only Capacity_Ocean-Source (Btu/h)": self.HP_capacity_C_only_OS,
-                "Heat Pumps Cooling Only Capacity_Tower-Source (Btu/h)": self.HP_capacity_C_only_TS,
-                "Heat Pump Hot Water (gpm)": self.HP_HW_gpm,
-                "To HW District (gpm)": self.to_HW_district,
-                "Heat Pump Chilled Water (gpm)": self.HP_CHW_gpm,
-                "To CHW District (gpm)": self.to_CHW_district,
-            }
-        )
+    def compute2(self, columns: Optional[list] = None) -> pd.DataFrame:
+        df2 = pd.DataFrame(project(self, HP_COLUMNS_2, columns))
 
         return df2
 
-    def compute_chiller(self) -> pd.DataFrame:
-        chiller_df = pd.DataFrame(
-            {
-                "Chiller Output (Btu/h)": self.chiller_output,
-                "Chiller CHWS Flow (gpm)": self.chiller_CHWSflow,
-                "Chiller_Heat Rejection-Ground Source (Btu/h)": self.chiller_gr_hRjt,
-                "Chiller_Heat Rejection-Ocean Source (Btu/h)": self.chiller_ocean_hRjt,
-                "Chiller_Heat Rejection-Tower Source (Btu/h)": self.chiller_CT_hRjt,
-                "Chiller Lift (°F)": self.chiller_lift,
-                "Chiller CWS Temp (°F)": self.chiller_CWS_temp,
-            }
-        )
+    def compute_chiller(self, columns: Optional[list] = None) -> pd.DataFrame:
+        chiller_df = pd.DataFrame(project(self, CHILLER_COLUMNS, columns))
 
         return chiller_df
 
-    def compute_cooler(self) -> pd.DataFrame:
-        cooler_df = pd.DataFrame(
-            {
-                "Cooling Tower Approach (°F)": self.CTapproach,
-                "CWRT (°F)": self.cooler_CWRT,
-                "CWS Flow (gpm)": self.CT_CWSflow,
-            }
-        )
+    def compute_cooler(self, columns: Optional[list] = None) -> pd.DataFrame:
+        cooler_df = pd.DataFrame(project(self, COOLER_COLUMNS, columns))
 
         return cooler_df
 
-    def compute_boiler(self) -> pd.DataFrame:
-        boiler_df = pd.DataFrame(
-            {
-                "Boiler Output (Btu/h)": self.boiler_output,
-                "Boiler HWS Flow (gpm)": self.boiler_HWSflow,
-                "Energy Consumed (kWh)": self.boiler_energy,
-            }
-        )
+    def compute_boiler(self, columns: Optional[list] = None) -> pd.DataFrame:
+        boiler_df = pd.DataFrame(project(self, BOILER_COLUMNS, columns))
+
         return boiler_df
 
-    def compute_HS_HS(self) -> pd.DataFrame:
-        df = pd.DataFrame(
-            {
-                "Ground Water Entering Temp (°F)_Heat Extraction": self.gr_returnTemp_HtExEWT,
-                "Ground Source Heat Extraction_HP Heating (gpm)": self.gr_HtEx_HP_Heating_gpm,
-                "Ground Source Heat Extraction_HP Heating (Btu/h)": self.gr_HtEx_HP_Heating_btuh,
-                "Ocean Water Entering Temp (°F) HP Heat Extraction": self.oc_temp_HP_HeatEx,
-                "Ocean Source Heat Extraction gpm": self.oc_H_HP_HeatEx_gpm,
-                "Ocean Source Heat Extraction btu/h": self.oc_H_HP_HeatEx_btuh,
-                "Ground Water Entering Temp (°F)_Heat Rejection": self.gr_temp_ENT_HeatRjt,
-                "Ground Source Heat Rejection HP Cooling (gpm)": self.gr_HtRjt_HP_Cooling_gpm,
-                "Ground Source Heat Rejection HP Cooling (btuh)": self.gr_HtRjt_HP_Cooling_btuh,
-                "Ocean Water Entering Temp (°F)": self.oc_temp_ENT_HeatRjt,
-                "Ocean Source Heat Rejection_HP Cooling (gpm)": self.oc_HtRjt_HP_Cooling_gpm,
-                "Ocean Source Heat Rejection_HP Cooling (btu/h)": self.oc_HtRjt_HP_Cooling_btuh,
-                "Tower CWS Temp (°F) HP Heat Rejection": self.ct_temp_HeatRjt,
-                "Tower CWR Flow (gpm) HP Heat Rejection": self.ct_HtRjt_HP_CWR_gpm,
-                "Tower Source  HP Heat Rejection (Btu/h)": self.ct_HtRjt_HP_CWR_btuh,
-                "Ground Source Heat Rejection Chiller (gpm)": self.gr_HtRjt_chiller_gpm,
-                "Ground Source Heat Rejection Chiller (Btu/h)": self.gr_HtRjt_chiller_btuh,
-                "Ocean Water Entering Temp (°F) Chiller Heat Rejection": self.oc_ENT_temp_HeatRjt,
-                "Ocean Water Heat Rejection Chillers (gpm)": self.oc_HtRjt_chiller_gpm,
-                "Ocean Water Heat Rejection Chiller (Btu/h)": self.oc_HtRjt_chiller_btuh,
-                "Tower CWS Temp (°F) Chiller Heat Rejection": self.ct_chiller_HeatRjt,
-                "Tower CWR Flow (gpm) Chiller Heat Rejection": self.ct_chiller_HeatRjt_gpm,
-                "Tower Source Chiller Heat Rejection (Btu/h)": self.ct_chiller_HeatRjt_btuh,
-                "Total WS Heat Extraction Shortfall (Btu/h)": self.total_WS_HeatExt_shortfall,
-                "Total WS Heat Rejection Shortfall (Btu/h)": self.total_WS_HeatRjt_shortfall,
-                "CHECK:=Simultaneous Heat/Cool Only": self.check_1,
-                "CHECK:Simultaneous Heat Only/Chiller": self.check_2,
-            }
-        )
+    def compute_HS_HS(self, columns: Optional[list] = None) -> pd.DataFrame:
+        # every column is a slice of one evaluation of the HS-HS tensors, and only the tensors the
+        # requested columns (default: all of them) slice are evaluated
+        sources = {label: (tensor, sink, use) for label, tensor, sink, use in HSHS_COLUMNS}
+        columns = select_columns([*sources, *HSHS_SHORTFALLS, *HSHS_CHECKS], columns)
+        needed = {sources[label][0] for label in columns if label in sources}
+        shortfalls = not set(HSHS_SHORTFALLS).isdisjoint(columns)
+        checks = not set(HSHS_CHECKS).isdisjoint(columns)
+        flows = bool(needed & {"gpm", "btuh"}) or shortfalls
+        tensors = {}
+        if "entering" in needed:
+            tensors["entering"] = self.HSHS_enteringTemp
+        if flows or checks:
+            capacity = self.HSHS_capacity
+        if flows:
+            tensors["gpm"], tensors["btuh"] = hshs_flows(capacity, self.HSHS_deltaT)
+        values = {label: tensors[sources[label][0]][sources[label][1:]] for label in columns if label in sources}
+        if shortfalls:
+            values.update(zip(HSHS_SHORTFALLS, self.HSHS_shortfalls(tensors["btuh"])))
+        if checks:
+            ground = capacity[HeatSink.GROUND]
+            values[HSHS_CHECKS[0]] = ground[HeatUse.HP_HEATING] * ground[HeatUse.HP_COOLING]
+            values[HSHS_CHECKS[1]] = ground[HeatUse.HP_HEATING] * ground[HeatUse.CHILLER]
+        df = pd.DataFrame({label: values[label] for label in columns})
 
         return df
@@ -0,0 +1,809 @@
+import time
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+from pydantic import BaseModel, PrivateAttr
+
+from districtsystem.config import INPUTSDIR, OUTPUTDIR
+from districtsystem.CUP import CUP
+from districtsystem.heatPump import heatPump
+from districtsystem.TES import TES
+
+
+class Stage(BaseModel):
+    # a pipeline step: reads the named pipeline fields and upstream outputs, produces the named outputs
+    name: str
+    fields: tuple = ()
+    inputs: tuple
+    outputs: tuple
+
+
+CUP_FIELDS = ("buildingMixing_output", "dateTime_df", "hotTank_schedule", "coldTank_schedule")
+HEAT_PUMP_FIELDS = (
+    "buildingMixing_output",
+    "plantCHWRT",
+    "CUP_inputs",
+    "districtModule_inputs",
+    "weather_df",
+    "heatPump_df",
+    "groundReturn_schedule",
+    "chilledCTOcean_schedule",
+    "month_to_match",
+    "days_to_match",
+    "ocean_df",
+    "ocean_df_WS_temporary",
+)
+
+STAGES = [
+    Stage(name="cup_schedule", fields=CUP_FIELDS, inputs=(), outputs=("CUP_output_df",)),
+    Stage(
+        name="tes_hot",
+        fields=("buildingMixing_output", "TES_inputs", "CUP_inputs", "districtModule_inputs"),
+        inputs=("CUP_output_df",),
+        outputs=("TES_instance", "TES_H_output_df"),
+    ),
+    Stage(name="heat_pump_1", fields=HEAT_PUMP_FIELDS, inputs=("TES_H_output_df",), outputs=("heatPump_output_df",)),
+    Stage(
+        name="tes_cold",
+        fields=("plantCHWRT",),
+        inputs=("TES_instance", "heatPump_output_df"),
+        outputs=("TES_C_output_df", "TES_HC_output_df"),
+    ),
+    Stage(
+        name="cup_chw_return",
+        fields=CUP_FIELDS,
+        inputs=("TES_C_output_df", "TES_HC_output_df"),
+        outputs=("CUP_CHWRtemp",),
+    ),
+    Stage(
+        name="heat_pump_2",
+        fields=HEAT_PUMP_FIELDS,
+        inputs=("TES_H_output_df", "TES_C_output_df", "TES_HC_output_df"),
+        outputs=(
+            "heatPump_output_df_2",
+            "chiller_output_df",
+            "cooler_output_df",
+            "boiler_output_df",
+            "HS_HS_output_df",
+        ),
+    ),
+    Stage(
+        name="cup_energy_balance",
+        fields=(*CUP_FIELDS, "districtModule_inputs"),
+        inputs=(
+            "heatPump_output_df",
+            "TES_H_output_df",
+            "TES_C_output_df",
+            "TES_HC_output_df",
+            "heatPump_output_df_2",
+            "chiller_output_df",
+            "boiler_output_df",
+        ),
+        outputs=("CUP_output_df_two",),
+    ),
+    Stage(
+        name="key_outputs",
+        fields=("buildingMixing_output", "districtModule_inputs", "weather_df", "ocean_df_WS_temporary"),
+        inputs=(
+            "TES_H_output_df",
+            "TES_C_output_df",
+            "TES_HC_output_df",
+            "heatPump_output_df",
+            "heatPump_output_df_2",
+            "chiller_output_df",
+            "cooler_output_df",
+            "boiler_output_df",
+            "HS_HS_output_df",
+            "CUP_output_df_two",
+        ),
+        outputs=("key_outputs_df",),
+    ),
+]
+
+PRODUCERS = {output: stage for stage in STAGES for output in stage.outputs}
+
+
+class UnknownOutputError(KeyError):
+    def __init__(self, name):
+        super().__init__(f"No pipeline stage produces {name!r}, choose from {sorted(PRODUCERS)}")
+
+
+class StageOutputError(ValueError):
+    def __init__(self, stage, missing):
+        super().__init__(f"Stage {stage!r} did not produce {sorted(missing)}")
+
+
+class Pipeline(BaseModel):
+    # CUP schedule -> TES hot -> heat pump pass 1 -> TES cold/HC -> heat pump pass 2 -> CUP energy balance,
+    # each stage evaluated at most once per instance
+    buildingMixing_output: pd.DataFrame
+    CUP_inputs: dict
+    TES_inputs: dict
+    districtModule_inputs: pd.DataFrame
+    weather_df: pd.DataFrame
+    heatPump_df: pd.DataFrame
+    dateTime_df: pd.DataFrame
+    hotTank_schedule: pd.DataFrame
+    coldTank_schedule: pd.DataFrame
+    groundReturn_schedule: pd.DataFrame
+    chilledCTOcean_schedule: pd.DataFrame
+    month_to_match: np.ndarray
+    days_to_match: np.ndarray
+    ocean_df: pd.DataFrame
+    ocean_df_WS_temporary: pd.Series
+    # CHW return temperature entering the plant (heat pumps and cold tank), the district CHWRT when None
+    plantCHWRT: Optional[pd.Series] = None
+
+    _results: dict = PrivateAttr(default_factory=dict)
+    _timings: dict = PrivateAttr(default_factory=dict)
+
+    class Config:
+        arbitrary_types_allowed = True
+
+    @classmethod
+    def from_inputs(cls, buildingMixing_output: pd.DataFrame, ocean_df_WS_temporary: pd.Series) -> "Pipeline":
+        # the inputs module reads the workbooks in INPUTSDIR on import, so only load it when asked
+        from districtsystem import inputs
+
+        return cls(
+            buildingMixing_output=buildingMixing_output,
+            CUP_inputs=inputs.CUP_inputs,
+            TES_inputs=inputs.TES_inputs,
+            districtModule_inputs=inputs.districtModule_inputs,
+            weather_df=inputs.weather_df,
+            heatPump_df=inputs.heatPump_df,
+            dateTime_df=inputs.dateTime_df,
+            hotTank_schedule=inputs.hotTank_schedule1_inputs_df,
+            coldTank_schedule=inputs.coldTank_schedule2_inputs_df,
+            groundReturn_schedule=inputs.groundReturn_schedule6_inputs_df,
+            chilledCTOcean_schedule=inputs.chilledCTOcean_schedule5_inputs_df,
+            month_to_match=inputs.month_to_match,
+            days_to_match=inputs.days_to_match,
+            ocean_df=inputs.ocean_df,
+            ocean_df_WS_temporary=ocean_df_WS_temporary,
+        )
+
+    @property
+    def timings(self) -> dict:
+        # seconds spent in each stage that has run
+        return dict(self._timings)
+
+    def output(self, name: str):
+        if name not in PRODUCERS:
+            raise UnknownOutputError(name)
+        if name not in self._results:
+            self.run_stage(PRODUCERS[name])
+        return self._results[name]
+
+    def run_stage(self, stage: Stage) -> None:
+        if stage.name in self._timings:
+            return
+        # upstream stages run first (and only once) through output()
+        kwargs = {name: self.output(name) for name in stage.inputs}
+        start = time.perf_counter()
+        results = getattr(self, f"_{stage.name}")(**kwargs)
+        self._timings[stage.name] = time.perf_counter() - start
+        missing = set(stage.outputs) - set(results)
+        if missing:
+            raise StageOutputError(stage.name, missing)
+        self._results.update(results)
+
+    def run(self, outputs: Optional[list] = None) -> dict:
+        # evaluate the stages needed for `outputs` (default: every stage) and return them by name
+        names = list(PRODUCERS) if outputs is None else outputs
+        return {name: self.output(name) for name in names}
+
+    @staticmethod
+    def stages_reading(fields) -> set:
+        # names of the stages that read any of `fields`, directly or through an upstream output
+        stale = set(fields)
+        names = set()
+        for stage in STAGES:
+            if stale.intersection(stage.fields) or stale.intersection(stage.inputs):
+                stale.update(stage.outputs)
+                names.add(stage.name)
+        return names
+
+    def evolve(self, **fields) -> "Pipeline":
+        # copy with some fields replaced, keeping the results of every stage that reads none of them
+        evolved = self.model_copy(update=fields)
+        stale = self.stages_reading(fields)
+        evolved._results = {}
+        evolved._timings = {}
+        for stage in STAGES:
+            if stage.name in stale:
+                continue
+            if stage.name in self._timings:
+                evolved._results.update({name: self._results[name] for name in stage.outputs})
+                evolved._timings[stage.name] = self._timings[stage.name]
+        return evolved
+
+    ############################ shared stage inputs ############################
+
+    @property
+    def mixing(self) -> pd.DataFrame:
+        return self.buildingMixing_output
+
+    @property
+    def CHWRT(self) -> pd.Series:
+        if self.plantCHWRT is None:
+            return self.mixing["District CHWRT (°F)"]
+        return self.plantCHWRT
+
+    def _cup_kwargs(self) -> dict:
+        return {
+            "timeStamp": self.dateTime_df,
+            "hotTank_schedule": self.hotTank_schedule,
+            "coldTank_schedule": self.coldTank_schedule,
+            "totalHeating_load": self.mixing["Total Heating Load (Btu/h)"],
+            "totalCooling_load": self.mixing["Total Cooling Load (Btu/h)"],
+        }
+
+    def _heatPump_kwargs(self) -> dict:
+        CUP_inputs = self.CUP_inputs
+        CT = self.chilledCTOcean_schedule
+        CT_approach = CT["Schedules Category"] == "Cooling Tower Approach"
+        return {
+            "districtHWRT": self.mixing["District HWRT (°F)"],
+            "districtCHWRT": self.CHWRT,
+            "districtHWSflow": self.mixing["District HWS Flow (gpm)"],
+            "districtCHWSflow": self.mixing["District CHWS Flow (gpm)"],
+            "HW_districtSTP": self.districtModule_inputs["Loop HW STP (°F)"],
+            "HP_leavingHW": self.heatPump_df["Leaving Hot Water (°F)"],
+            "HP_enteringHW": self.heatPump_df["Entering Hot Water (°F)"],
+            "HP_enteringCHW": self.heatPump_df["Entering Cold Water (°F)"],
+            "HP_leavingCHW": self.heatPump_df["Leaving Cold Water (°F)"],
+            "HP_maxHeating": self.heatPump_df["Max Heating Output (Btu/h)"],
+            "HP_maxCooling": self.heatPump_df["Max Cooling Output (Btu/h)"],
+            "HP_heatingCapacity": CUP_inputs["Heat Pumps"]["Heating Capacity"],
+            "HP_coolingCapacity": CUP_inputs["Heat Pumps"]["Cooling Capacity"],
+            "HP_waterSource": CUP_inputs["Heat Pumps"]["Water-Source Only %"],
+            "HP_airWaterSource": CUP_inputs["Heat Pumps"]["Air-Source + Water Source %"],
+            "dryBulb_temp": self.weather_df["Dry Bulb Temp (°F)"],
+            "wetBulb_temp": self.weather_df["Wet Bulb Temp (°F)"],
+            "grReturn_D_LWT": self.groundReturn_schedule["Ht Ex - LWT*"],
+            "grReturn_HtRej_LWT": self.groundReturn_schedule["Ht Rej - LWT*"],
+            "gr_months": self.groundReturn_schedule["Schedules Month"],
+            "grReturn_HtEx_EWT": self.groundReturn_schedule["Ht Ex - EWT"],
+            "grReturn_HtRej_EWT": self.groundReturn_schedule["Ht Rej - EWT"],
+            "month_to_match": self.month_to_match,
+            "HP_grSource_capacity": CUP_inputs["Heat Source/Sink"]["Ground-source Capacity"],
+            "HP_ocean_capacity": CUP_inputs["Heat Source/Sink"]["Ocean Capacity"],
+            "HP_CT_capacity": CUP_inputs["Heat Source/Sink"]["Cooling Tower Capacity"],
+            "HSHS_deltaT_HP": CUP_inputs["Heat Source/Sink"]["Delta T (for HPs; CT & Ocean Only)"],
+            "HSHS_deltaT_CH": CUP_inputs["Heat Source/Sink"]["Delta T (for Cent. Chillers; CT & Ocean Only)"],
+            "ocean_df": self.ocean_df,
+            "days_to_match": self.days_to_match,
+            "ocean_df_WS_temporary": self.ocean_df_WS_temporary,
+            "chiller_maxCapacity": CUP_inputs["Electric Chillers"]["Max Capacity"],
+            "CT_CUP_value": CT.loc[CT_approach, "CUP"],
+            "CT_CUP_month": CT.loc[CT_approach, "Month"],
+            "CHW_districtSTP": self.districtModule_inputs["District CHW STP (°F)"],
+            "Electric_Chiller_maxLift_input": CUP_inputs["Electric Chillers"]["Max Lift"],
+            "Electric_Chiller_minLift_input": CUP_inputs["Electric Chillers"]["Min Lift"],
+            "Electric_Chiller_capacity_minLift_input": CUP_inputs["Electric Chillers"]["Capacity for Min Lift"],
+            "boiler_maxCapacity_input": CUP_inputs["Electric Boilers"]["Max Capacity"],
+            "boiler_efficiency_input": CUP_inputs["Electric Boilers"]["Boiler Efficiency"],
+        }
+
+    ################################## stages ##################################
+
+    def _cup_schedule(self) -> dict:
+        return {"CUP_output_df": CUP(**self._cup_kwargs()).compute_CUP()}
+
+    def _tes_hot(self, CUP_output_df) -> dict:
+        TES_inputs = self.TES_inputs
+        initial = TES_inputs["Initial Conditions"]
+        tank = TES_inputs["Tank Properties"]
+        charging = TES_inputs["Tank Charging Characteristics"]
+        tes = TES(
+            HW_upperTankVol=initial["TES Hot Tank Upper Tank Volume"],
+            HW_lowerTankVol=initial["TES Hot Tank Lower Tank Volume"],
+            HW_TankVol=tank["TES Hot Tank Volume"],
+            HW_wallLoss=tank["TES Hot Wall-Losses"],
+            HW_ThermocloneLoss=tank["TES Hot Thermocline/other-Losses"],
+            CHW_upperTankVol=initial["TES Cold Tank Upper Tank Volume"],
+            CHW_lowerTankVol=initial["TES Cold Tank Lower Tank Volume"],
+            CHW_TankVol=tank["TES Cold Tank Volume"],
+            CHW_wallLoss=tank["TES Cold Wall-Losses"],
+            CHW_ThermocloneLoss=tank["TES Cold Thermocline/other-Losses"],
+            HP_heatingCapacity=self.CUP_inputs["Heat Pumps"]["Heating Capacity"],
+            thermoclineDischarge=charging["Fraction of Thermocline to discharge"],
+            stopCharging=charging["Stop Charging tank at ____ Capacity"],
+            CUP_output_df=CUP_output_df,
+            totalHeating_load=self.mixing["Total Heating Load (Btu/h)"],
+            HW_districtSTP=self.districtModule_inputs["Loop HW STP (°F)"],
+            districtHWRT=self.mixing["District HWRT (°F)"],
+            hotMaxflow=charging["TES Hot Max Flow"],
+            coldMaxflow=charging["TES Cold Max Flow"],
+            HW_upperTankTemp=initial["TES Hot Tank Upper Tank Temp"],
+            HW_lowerTankTemp=initial["TES Hot Tank Lower Tank Temp"],
+            totalCooling_load=self.mixing["Total Cooling Load (Btu/h)"],
+            districtCHWRT=self.mixing["District CHWRT (°F)"],
+            CHW_lowerTankTemp=initial["TES Cold Tank Lower Tank Temp"],
+            CHW_upperTankTemp=initial["TES Cold Tank Upper Tank Temp"],
+            conversion_galToLbs=TES_inputs["Conversion Rates"]["GAL to Lbs"],
+        )
+        # hot_df caches on the instance, so the HC stage reuses this run
+        return {"TES_instance": tes, "TES_H_output_df": tes.hot_df}
+
+    def _heat_pump_1(self, TES_H_output_df) -> dict:
+        hp = heatPump(
+            TES_H_shiftChargeRate=TES_H_output_df["Hot Load-Shift Charge Rate (gpm)"],
+            TES_H_flowOut=TES_H_output_df["Flow out of TES Hot Th (gpm)"],
+            **self._heatPump_kwargs(),
+        )
+        return {"heatPump_output_df": hp.compute()}
+
+    def _tes_cold(self, TES_instance, heatPump_output_df) -> dict:
+        # the cold tank only adds cold-side series to the hot-stage TES; the hot plan reads none of them,
+        # so the copy's hot_df reuses the stored hot run without stepping the tank again and the hot-stage
+        # instance stays reusable
+        tes = TES_instance.model_copy(
+            update={
+                "districtCHWRT": self.CHWRT,
+                "HP_possRecCHW": heatPump_output_df["Possible Recovered CHW (gpm)"],
+                "HP_CHWST": heatPump_output_df["HP CHWST (°F)"],
+                "TES_hotCapacityHr": TES_instance.hot_df["TES Hot Capacity hr-1 (%)"],
+            }
+        )
+        return {"TES_C_output_df": tes.cold_df, "TES_HC_output_df": tes.TES_HC_calculate()}
+
+    def _cup_chw_return(self, TES_C_output_df, TES_HC_output_df) -> dict:
+        # district return mixed with the cold-tank outflow, as in CUP.CUP_CHWRtemp
+        cup = CUP(
+            districtCHWRT=self.mixing["District CHWRT (°F)"],
+            districtCHWSflow=self.mixing["District CHWS Flow (gpm)"],
+            TES_C_tempOut=TES_HC_output_df["Temp out of Cold Tank (°F)"],
+            TES_C_flowinto=TES_C_output_df["Flow into TES Cold Tc (gpm)"],
+            **self._cup_kwargs(),
+        )
+        return {"CUP_CHWRtemp": cup.CUP_CHWRtemp}
+
+    def _heat_pump_2(self, TES_H_output_df, TES_C_output_df, TES_HC_output_df) -> dict:
+        hp = heatPump(
+            TES_H_shiftChargeRate=TES_H_output_df["Hot Load-Shift Charge Rate (gpm)"],
+            TES_H_flowOut=TES_H_output_df["Flow out of TES Hot Th (gpm)"],
+            TES_C_shiftChargeRate=TES_C_output_df["Cold Load-Shift Charge Rate (gpm)"],
+            TES_C_flowOut=TES_C_output_df["Flow out of TES Cold Tc (gpm)"],
+            TES_H_tempOut=TES_HC_output_df["Temp out of Hot Tank (°F)"],
+            TES_C_tempOut=TES_HC_output_df["Temp out of Cold Tank (°F)"],
+            **self._heatPump_kwargs(),
+        )
+        return {
+            "heatPump_output_df_2": hp.compute2(),
+            "chiller_output_df": hp.compute_chiller(),
+            "cooler_output_df": hp.compute_cooler(),
+            "boiler_output_df": hp.compute_boiler(),
+            "HS_HS_output_df": hp.compute_HS_HS(),
+        }
+
+    def _cup_energy_balance(
+        self,
+        heatPump_output_df,
+        TES_H_output_df,
+        TES_C_output_df,
+        TES_HC_output_df,
+        heatPump_output_df_2,
+        chiller_output_df,
+        boiler_output_df,
+    ) -> dict:
+        cup = CUP(
+            districtHWRT=self.mixing["District HWRT (°F)"],
+            districtCHWRT=self.mixing["District CHWRT (°F)"],
+            districtHWSflow=self.mixing["District HWS Flow (gpm)"],
+            districtCHWSflow=self.mixing["District CHWS Flow (gpm)"],
+            HW_districtSTP=self.districtModule_inputs["Loop HW STP (°F)"],
+            CHW_districtSTP=self.districtModule_inputs["District CHW STP (°F)"],
+            HP_HW_gpm=heatPump_output_df_2["Heat Pump Hot Water (gpm)"],
+            HP_CHWST=heatPump_output_df["HP CHWST (°F)"],
+            HP_CHW_gpm=heatPump_output_df_2["Heat Pump Chilled Water (gpm)"],
+            TES_H_tempOut=TES_HC_output_df["Temp out of Hot Tank (°F)"],
+            TES_H_flowOut=TES_H_output_df["Flow out of TES Hot Th (gpm)"],
+            TES_C_flowOut=TES_C_output_df["Flow out of TES Cold Tc (gpm)"],
+            TES_C_tempOut=TES_HC_output_df["Temp out of Cold Tank (°F)"],
+            TES_C_flowinto=TES_C_output_df["Flow into TES Cold Tc (gpm)"],
+            TES_H_flowinto=TES_H_output_df["Flow into TES Hot Th (gpm)"],
+            boiler_HWflow_gpm=boiler_output_df["Boiler HWS Flow (gpm)"],
+            chiller_CHWSflow_gpm=chiller_output_df["Chiller CHWS Flow (gpm)"],
+            **self._cup_kwargs(),
+        )
+        return {"CUP_output_df_two": cup.compute_CUP_two()}
+
+    def _key_outputs(self, **frames) -> dict:
+        return {
+            "key_outputs_df": key_outputs(
+                buildingMixing_output=self.mixing,
+                districtModule_inputs=self.districtModule_inputs,
+                weather_df=self.weather_df,
+                ocean_df_WS_temporary=self.ocean_df_WS_temporary,
+                **frames,
+            )
+        }
+
+
+def key_outputs(
+    buildingMixing_output: pd.DataFrame,
+    districtModule_inputs: pd.DataFrame,
+    weather_df: pd.DataFrame,
+    ocean_df_WS_temporary: pd.Series,
+    TES_H_output_df: pd.DataFrame,
+    TES_C_output_df: pd.DataFrame,
+    TES_HC_output_df: pd.DataFrame,
+    heatPump_output_df: pd.DataFrame,
+    heatPump_output_df_2: pd.DataFrame,
+    chiller_output_df: pd.DataFrame,
+    cooler_output_df: pd.DataFrame,
+    boiler_output_df: pd.DataFrame,
+    HS_HS_output_df: pd.DataFrame,
+    CUP_output_df_two: pd.DataFrame,
+) -> pd.DataFrame:
+    # final output dataframe
+    key_outputs = pd.DataFrame()
+    key_outputs["Dry Bulb Temp (°F)"] = weather_df["Dry Bulb Temp (°F)"]
+    key_outputs["CUP-HHW Entering (F)"] = CUP_output_df_two["CUP HWR Temperature (°F)"]
+    key_outputs["CUP-HHW Leaving (F)"] = CUP_output_df_two["CUP HWST (°F)"]
+    key_outputs["CUP-HHW Flow (gpm)"] = CUP_output_df_two["CUP HWR Flow (gpm)"]
+    key_outputs["CUP-HHW Load (btu)"] = (
+        (key_outputs["CUP-HHW Leaving (F)"] - key_outputs["CUP-HHW Entering (F)"])
+        * 500
+        * key_outputs["CUP-HHW Flow (gpm)"]
+    )
+
+    key_outputs["CUP-CHW Entering (F)"] = CUP_output_df_two["CUP CHWR Temperature (°F)"]
+    key_outputs["CUP-CHW Leaving (F)"] = CUP_output_df_two["CUP CHWST (°F)"]
+    key_outputs["CUP-CHW Flow (gpm)"] = CUP_output_df_two["CUP CHWR Flow (gpm)"]
+    key_outputs["CUP-CHW Load (btu)"] = (
+        (key_outputs["CUP-CHW Entering (F)"] - key_outputs["CUP-CHW Leaving (F)"])
+        * 500
+        * key_outputs["CUP-CHW Flow (gpm)"]
+    )
+
+    key_outputs["District-HHW Entering (F)"] = buildingMixing_output["District HWRT (°F)"]
+    key_outputs["District-HHW Leaving (F)"] = districtModule_inputs["Loop HW STP (°F)"]
+    key_outputs["District-HHW Flow (gpm)"] = buildingMixing_output["District HWS Flow (gpm)"]
+    key_outputs["District-HHW Load (btu)"] = buildingMixing_output["Total Heating Load (Btu/h)"]
+
+    key_outputs["District-CHW Entering (F)"] = buildingMixing_output["District CHWRT (°F)"]
+    key_outputs["District-CHW Leaving (F)"] = districtModule_inputs["Loop CHW STP (°F)"]
+    key_outputs["District-CHW Flow (gpm)"] = buildingMixing_output["District CHWS Flow (gpm)"]
+    key_outputs["District-CHW Load (btu)"] = buildingMixing_output["Total Cooling Load (Btu/h)"]
+
+    key_outputs["Hot tank-HHW Entering (F)"] = pd.Series(
+        np.where(
+            TES_H_output_df["TES Hot Status"] == "Charge",
+            districtModule_inputs["Loop HW STP (°F)"],
+            buildingMixing_output["District HWRT (°F)"],
+        )
+    )
+    key_outputs["Hot tank-HHW Leaving (F)"] = TES_HC_output_df["Temp out of Hot Tank (°F)"]
+    key_outputs["Hot tank-HHW Flow (gpm)"] = pd.Series(
+        np.where(
+            TES_H_output_df["TES Hot Status"] == "Charge",
+            TES_H_output_df["Flow into TES Hot Th (gpm)"],
+            TES_H_output_df["Flow out of TES Hot Th (gpm)"],
+        )
+    )
+    key_outputs["Hot tank-HHW Load (btu)"] = (
+        (key_outputs["Hot tank-HHW Entering (F)"] - key_outputs["Hot tank-HHW Leaving (F)"])
+        * 500
+        * key_outputs["Hot tank-HHW Flow (gpm)"]
+    )
+    key_outputs["Hot tank-% Hot Charged"] = TES_H_output_df["TES Hot Capacity (%)"]
+
+    key_outputs["Cold tank-CHW Entering (F)"] = pd.Series(
+        np.where(
+            TES_C_output_df["TES Cold Status"] == "Charge",
+            districtModule_inputs["Loop CHW STP (°F)"],
+            buildingMixing_output["District CHWRT (°F)"],
+        )
+    )
+    key_outputs["Cold tank-CHW Leaving (F)"] = TES_HC_output_df["Temp out of Cold Tank (°F)"]
+    key_outputs["Cold tank-CHW Flow (gpm)"] = pd.Series(
+        np.where(
+            TES_C_output_df["TES Cold Status"] == "Charge",
+            TES_C_output_df["Flow into TES Cold Tc (gpm)"],
+            TES_C_output_df["Flow out of TES Cold Tc (gpm)"],
+        )
+    )
+    key_outputs["Cold tank-CHW Load (btu)"] = (
+        (key_outputs["Cold tank-CHW Leaving (F)"] - key_outputs["Cold tank-CHW Entering (F)"])
+        * 500
+        * key_outputs["Cold tank-CHW Flow (gpm)"]
+    )
+    key_outputs["Cold tank-% Cold Charged"] = TES_C_output_df["TES Cold Capacity (%)"]
+
+    key_outputs["HP_HC-HHW Entering (F)"] = buildingMixing_output["District HWRT (°F)"]
+    key_outputs["HP_HC-HHW Leaving (F)"] = districtModule_inputs["Loop HW STP (°F)"]
+    key_outputs["HP_HC-HHW Load (btu)"] = heatPump_output_df_2["Heat Pumps Heating+Cooling Capacity_(Heating, Btu/h)"]
+    key_outputs["HP_HC-HHW Flow (gpm)"] = (
+        key_outputs["HP_HC-HHW Load (btu)"]
+        / 500
+        / (key_outputs["HP_HC-HHW Leaving (F)"] - key_outputs["HP_HC-HHW Entering (F)"])
+    )
+    key_outputs["HP_HC-CHW Entering (F)"] = buildingMixing_output["District CHWRT (°F)"]
+    key_outputs["HP_HC-CHW Leaving (F)"] = districtModule_inputs["Loop CHW STP (°F)"]
+    key_outputs["HP_HC-CHW Load (btu)"] = heatPump_output_df_2["Heat Pumps Heating+Cooling Capacity_(Cooling, Btu/h)"]
+    key_outputs["HP_HC-CHW Flow (gpm)"] = (
+        key_outputs["HP_HC-CHW Load (btu)"]
+        / 500
+        / (key_outputs["HP_HC-CHW Entering (F)"] - key_outputs["HP_HC-CHW Leaving (F)"])
+    )
+
+    key_outputs["HP_H-AirS-HHW Entering (F)"] = buildingMixing_output["District HWRT (°F)"]
+    key_outputs["HP_H-AirS-HHW Leaving (F)"] = districtModule_inputs["Loop HW STP (°F)"]
+    key_outputs["HP_H-AirS-HHW Load (btu)"] = heatPump_output_df_2[
+        "Heat Pumps Heating Only Capacity_Air-Source (Btu/h)"
+    ]
+    key_outputs["HP_H-AirS-HHW Flow (gpm)"] = (
+        key_outputs["HP_H-AirS-HHW Load (btu)"]
+        / 500
+        / (key_outputs["HP_H-AirS-HHW Leaving (F)"] - key_outputs["HP_H-AirS-HHW Entering (F)"])
+    )
+    key_outputs["HP_H-AirS-Ambient (F)"] = weather_df["Dry Bulb Temp (°F)"]
+
+    key_outputs["HP_C-AirS-CHW Entering (F)"] = buildingMixing_output["District CHWRT (°F)"]
+    key_outputs["HP_C-AirS-CHW Leaving (F)"] = heatPump_output_df["HP CHWST (°F)"]
+    key_outputs["HP_C-AirS-CHW Load (btu)"] = heatPump_output_df_2[
+        "Heat Pumps Cooling Only Capacity_Air-Source (Btu/h)"
+    ]
+    key_outputs["HP_C-AirS-CHW Flow (gpm)"] = (
+        key_outputs["HP_C-AirS-CHW Load (btu)"]
+        / 500
+        / (key_outputs["HP_C-AirS-CHW Entering (F)"] - key_outputs["HP_C-AirS-CHW Leaving (F)"])
+    )
+    key_outputs["HP_C-AirS-Ambient (F)"] = weather_df["Dry Bulb Temp (°F)"]
+
+    key_outputs["HP_H-GrS-HHW Entering (F)"] = buildingMixing_output["District HWRT (°F)"]
+    key_outputs["HP_H-GrS-HHW Leaving (F)"] = districtModule_inputs["Loop HW STP (°F)"]
+    key_outputs["HP_H-GrS-HHW Load (btu)"] = heatPump_output_df_2[
+        "Heat Pumps Heating Only Capacity_Ground Source (Btu/h)"
+    ]
+    key_outputs["HP_H-GrS-HHW Flow (gpm)"] = (
+        key_outputs["HP_H-GrS-HHW Load (btu)"]
+        / 500
+        / (key_outputs["HP_H-GrS-HHW Leaving (F)"] - key_outputs["HP_H-GrS-HHW Entering (F)"])
+    )
+    key_outputs["HP_H-GrS-Water-Source Entering (F)"] = HS_HS_output_df[
+        "Ground Water Entering Temp (°F)_Heat Extraction"
+    ]
+    key_outputs["HP_H-GrS-Water-Source Leaving (F)"] = heatPump_output_df_2["Ground Water Return Temp (°F)"]
+    key_outputs["HP_H-GrS-Water-Source Flow (gpm)"] = HS_HS_output_df["Ground Source Heat Extraction_HP Heating (gpm)"]
+    key_outputs["HP_H-GrS-Water-Source Load (btu)"] = HS_HS_output_df[
+        "Ground Source Heat Extraction_HP Heating (Btu/h)"
+    ]
+
+    key_outputs["HP_H-OcS-HHW Entering (F)"] = buildingMixing_output["District HWRT (°F)"]
+    key_outputs["HP_H-OcS-HHW Leaving (F)"] = districtModule_inputs["Loop HW STP (°F)"]
+    key_outputs["HP_H-OcS-HHW Load (btu)"] = heatPump_output_df_2[
+        "Heat Pumps Heating Only Capacity_Ocean-Source (Btu/h)"
+    ]
+    key_outputs["HP_H-OcS-HHW Flow (gpm)"] = (
+        key_outputs["HP_H-OcS-HHW Load (btu)"]
+        / 500
+        / (key_outputs["HP_H-OcS-HHW Leaving (F)"] - key_outputs["HP_H-OcS-HHW Entering (F)"])
+    )
+    key_outputs["HP_H-OcS-Water-Source Entering (F)"] = HS_HS_output_df[
+        "Ocean Water Entering Temp (°F) HP Heat Extraction"
+    ]
+    key_outputs["HP_H-OcS-Water-Source Leaving (F)"] = ocean_df_WS_temporary
+    key_outputs["HP_H-OcS-Water-Source Flow (gpm)"] = HS_HS_output_df["Ocean Source Heat Extraction gpm"]
+    key_outputs["HP_H-OcS-Water-Source Load (btu)"] = HS_HS_output_df["Ocean Source Heat Extraction btu/h"]
+
+    key_outputs["HP_C-GrS-CHW Entering (F)"] = buildingMixing_output["District CHWRT (°F)"]
+    key_outputs["HP_C-GrS-CHW Leaving (F)"] = heatPump_output_df["HP CHWST (°F)"]
+    key_outputs["HP_C-GrS-CHW Load (btu)"] = heatPump_output_df_2[
+        "Heat Pumps Cooling Only Capacity_Ground-Source (Btu/h)"
+    ]
+    key_outputs["HP_C-GrS-CHW Flow (gpm)"] = (
+        key_outputs["HP_C-GrS-CHW Load (btu)"]
+        / 500
+        / (key_outputs["HP_C-GrS-CHW Entering (F)"] - key_outputs["HP_C-GrS-CHW Leaving (F)"])
+    )
+    key_outputs["HP_C-GrS-Water-Source Entering (F)"] = HS_HS_output_df[
+        "Ground Water Entering Temp (°F)_Heat Rejection"
+    ]
+    key_outputs["HP_C-GrS-Water-Source Leaving (F)"] = heatPump_output_df_2[
+        "Ground Water Return Temp (°F) For Water-Source Heat Rejection"
+    ]
+    key_outputs["HP_C-GrS-Water-Source Flow (gpm)"] = HS_HS_output_df["Ground Source Heat Rejection HP Cooling (gpm)"]
+    key_outputs["HP_C-GrS-Water-Source Load (btu)"] = HS_HS_output_df["Ground Source Heat Rejection HP Cooling (btuh)"]
+
+    key_outputs["HP_C-OcS-CHW Entering (F)"] = buildingMixing_output["District CHWRT (°F)"]
+    key_outputs["HP_C-OcS-CHW Leaving (F)"] = heatPump_output_df["HP CHWST (°F)"]
+    key_outputs["HP_C-OcS-CHW Load (btu)"] = heatPump_output_df_2[
+        "Heat Pumps Cooling Only Capacity_Ocean-Source (Btu/h)"
+    ]
+    key_outputs["HP_C-OcS-CHW Flow (gpm)"] = (
+        key_outputs["HP_C-OcS-CHW Load (btu)"]
+        / 500
+        / (key_outputs["HP_C-OcS-CHW Entering (F)"] - key_outputs["HP_C-OcS-CHW Leaving (F)"])
+    )
+    key_outputs["HP_C-OcS-Water-Source Entering (F)"] = HS_HS_output_df["Ocean Water Entering Temp (°F)"]
+    key_outputs["HP_C-OcS-Water-Source Leaving (F)"] = ocean_df_WS_temporary
+    key_outputs["HP_C-OcS-Water-Source Flow (gpm)"] = HS_HS_output_df["Ocean Source Heat Rejection_HP Cooling (gpm)"]
+    key_outputs["HP_C-OcS-Water-Source Load (btu)"] = HS_HS_output_df["Ocean Source Heat Rejection_HP Cooling (btu/h)"]
+
+    key_outputs["HP_C-TS-CHW Entering (F)"] = buildingMixing_output["District CHWRT (°F)"]
+    key_outputs["HP_C-TS-CHW Leaving (F)"] = heatPump_output_df["HP CHWST (°F)"]
+    key_outputs["HP_C-TS-CHW Load (btu)"] = heatPump_output_df_2[
+        "Heat Pumps Cooling Only Capacity_Tower-Source (Btu/h)"
+    ]
+    key_outputs["HP_C-TS-CHW Flow (gpm)"] = (
+        key_outputs["HP_C-TS-CHW Load (btu)"]
+        / 500
+        / (key_outputs["HP_C-TS-CHW Entering (F)"] - key_outputs["HP_C-TS-CHW Leaving (F)"])
+    )
+    key_outputs["HP_C-TS-Water-Source Entering (F)"] = HS_HS_output_df["Tower CWS Temp (°F) HP Heat Rejection"]
+    key_outputs["HP_C-TS-Water-Source Leaving (F)"] = cooler_output_df["CWRT (°F)"]
+    key_outputs["HP_C-TS-Water-Source Flow (gpm)"] = HS_HS_output_df["Tower CWR Flow (gpm) HP Heat Rejection"]
+    key_outputs["HP_C-TS-Water-Source Load (btu)"] = HS_HS_output_df["Tower Source  HP Heat Rejection (Btu/h)"]
+
+    key_outputs["Chiller-GrS-CHW Entering (F)"] = buildingMixing_output["District CHWRT (°F)"]
+    key_outputs["Chiller-GrS-CHW Leaving (F)"] = heatPump_output_df["HP CHWST (°F)"]
+    key_outputs["Chiller-GrS-CHW Load (btu)"] = chiller_output_df["Chiller_Heat Rejection-Ground Source (Btu/h)"]
+    key_outputs["Chiller-GrS-CHW Flow (gpm)"] = (
+        key_outputs["Chiller-GrS-CHW Load (btu)"]
+        / 500
+        / (key_outputs["Chiller-GrS-CHW Entering (F)"] - key_outputs["Chiller-GrS-CHW Leaving (F)"])
+    )
+    key_outputs["Chiller-GrS-Water-Source Entering (F)"] = heatPump_output_df_2[
+        "Ground Water Return Temp (°F) For Water-Source Heat Rejection"
+    ]
+    key_outputs["Chiller-GrS-Water-Source Leaving (F)"] = chiller_output_df["Chiller CWS Temp (°F)"]
+    key_outputs["Chiller-GrS-Water-Source Load (btu)"] = chiller_output_df[
+        "Chiller_Heat Rejection-Ground Source (Btu/h)"
+    ]
+    key_outputs["Chiller-GrS-Water-Source Flow (gpm)"] = (
+        key_outputs["Chiller-GrS-Water-Source Load (btu)"]
+        / 500
+        / (key_outputs["Chiller-GrS-Water-Source Leaving (F)"] - key_outputs["Chiller-GrS-Water-Source Entering (F)"])
+    )
+
+    key_outputs["Chiller-OcS-CHW Entering (F)"] = buildingMixing_output["District CHWRT (°F)"]
+    key_outputs["Chiller-OcS-CHW Leaving (F)"] = heatPump_output_df["HP CHWST (°F)"]
+    key_outputs["Chiller-OcS-CHW Load (btu)"] = chiller_output_df["Chiller_Heat Rejection-Ocean Source (Btu/h)"]
+    key_outputs["Chiller-OcS-CHW Flow (gpm)"] = (
+        key_outputs["Chiller-OcS-CHW Load (btu)"]
+        / 500
+        / (key_outputs["Chiller-OcS-CHW Entering (F)"] - key_outputs["Chiller-OcS-CHW Leaving (F)"])
+    )
+    key_outputs["Chiller-OcS-Water-Source Entering (F)"] = ocean_df_WS_temporary
+    key_outputs["Chiller-OcS-Water-Source Leaving (F)"] = chiller_output_df["Chiller CWS Temp (°F)"]
+    key_outputs["Chiller-OcS-Water-Source Load (btu)"] = chiller_output_df[
+        "Chiller_Heat Rejection-Ocean Source (Btu/h)"
+    ]
+    key_outputs["Chiller-OcS-Water-Source Flow (gpm)"] = (
+        key_outputs["Chiller-OcS-Water-Source Load (btu)"]
+        / 500
+        / (key_outputs["Chiller-OcS-Water-Source Leaving (F)"] - key_outputs["Chiller-OcS-Water-Source Entering (F)"])
+    )
+
+    key_outputs_2 = pd.DataFrame()
+
+    key_outputs_2["Chiller-TS-CHW Entering (F)"] = buildingMixing_output["District CHWRT (°F)"]
+    key_outputs_2["Chiller-TS-CHW Leaving (F)"] = heatPump_output_df["HP CHWST (°F)"]
+    key_outputs_2["Chiller-TS-CHW Load (btu)"] = chiller_output_df["Chiller_Heat Rejection-Tower Source (Btu/h)"]
+    key_outputs_2["Chiller-TS-CHW Flow (gpm)"] = (
+        key_outputs_2["Chiller-TS-CHW Load (btu)"]
+        / 500
+        / (key_outputs_2["Chiller-TS-CHW Entering (F)"] - key_outputs_2["Chiller-TS-CHW Leaving (F)"])
+    )
+    key_outputs_2["Chiller-TS-Water-Source Entering (F)"] = cooler_output_df["CWRT (°F)"]
+    key_outputs_2["Chiller-TS-Water-Source Leaving (F)"] = chiller_output_df["Chiller CWS Temp (°F)"]
+    key_outputs_2["Chiller-TS-Water-Source Load (btu)"] = chiller_output_df[
+        "Chiller_Heat Rejection-Tower Source (Btu/h)"
+    ]
+    key_outputs_2["Chiller-TS-Water-Source Flow (gpm)"] = (
+        key_outputs_2["Chiller-TS-Water-Source Load (btu)"]
+        / 500
+        / (key_outputs_2["Chiller-TS-Water-Source Leaving (F)"] - key_outputs_2["Chiller-TS-Water-Source Entering (F)"])
+    )
+
+    key_outputs_2["Boiler-HHW Entering (F)"] = buildingMixing_output["District HWRT (°F)"]
+    key_outputs_2["Boiler-HHW Leaving (F)"] = districtModule_inputs["Loop HW STP (°F)"]
+    key_outputs_2["Boiler-HHW Load (btu)"] = boiler_output_df["Boiler Output (Btu/h)"]
+    key_outputs_2["Boiler-HHW Flow (gpm)"] = boiler_output_df["Boiler HWS Flow (gpm)"]
+
+    key_outputs_2["CoolingT-Heat Rejection Leaving (F)"] = cooler_output_df["CWRT (°F)"]
+    key_outputs_2["CoolingT-Heat Rejection Flow (gpm)"] = cooler_output_df["CWS Flow (gpm)"]
+    key_outputs_2["CoolingT-Heat Rejection Load (btu)"] = (
+        chiller_output_df["Chiller_Heat Rejection-Tower Source (Btu/h)"]
+        + heatPump_output_df_2["Heat Pumps Cooling Only Capacity_Tower-Source (Btu/h)"]
+    )
+    # Ensure all relevant columns are numeric to avoid type issues
+    key_outputs_2["CoolingT-Heat Rejection Flow (gpm)"] = pd.to_numeric(
+        key_outputs_2["CoolingT-Heat Rejection Flow (gpm)"], errors="coerce"
+    )
+    key_outputs_2["CoolingT-Heat Rejection Load (btu)"] = pd.to_numeric(
+        key_outputs_2["CoolingT-Heat Rejection Load (btu)"], errors="coerce"
+    )
+    key_outputs_2["CoolingT-Heat Rejection Leaving (F)"] = pd.to_numeric(
+        key_outputs_2["CoolingT-Heat Rejection Leaving (F)"], errors="coerce"
+    )
+    key_outputs_2["CoolingT-Heat Rejection Entering (F)"] = np.where(
+        key_outputs_2["CoolingT-Heat Rejection Flow (gpm)"] == 0,
+        0,
+        (
+            key_outputs_2["CoolingT-Heat Rejection Load (btu)"]
+            / 500
+            / key_outputs_2["CoolingT-Heat Rejection Flow (gpm)"]
+        )
+        - key_outputs_2["CoolingT-Heat Rejection Leaving (F)"],
+    )
+
+    key_outputs_2["Geo-Heat Rejection Entering (F)"] = HS_HS_output_df["Ground Water Entering Temp (°F)_Heat Rejection"]
+    key_outputs_2["Geo-Heat Rejection Leaving (F)"] = heatPump_output_df_2[
+        "Ground Water Return Temp (°F) For Water-Source Heat Rejection"
+    ]
+    key_outputs_2["Geo-Heat Rejection Flow (gpm)"] = (
+        HS_HS_output_df["Ground Source Heat Rejection HP Cooling (gpm)"]
+        + HS_HS_output_df["Ground Source Heat Rejection Chiller (gpm)"]
+    )
+    key_outputs_2["Geo-Heat Rejection Load (btu)"] = (
+        HS_HS_output_df["Ground Source Heat Rejection HP Cooling (btuh)"]
+        + HS_HS_output_df["Ground Source Heat Rejection Chiller (Btu/h)"]
+    )
+    key_outputs_2["Geo-Heat Extraction Entering (F)"] = HS_HS_output_df[
+        "Ground Water Entering Temp (°F)_Heat Extraction"
+    ]
+    key_outputs_2["Geo-Heat Extraction Leaving (F)"] = heatPump_output_df_2["Ground Water Return Temp (°F)"]
+    key_outputs_2["Geo-Heat Extraction Flow (gpm)"] = HS_HS_output_df["Ground Source Heat Extraction_HP Heating (gpm)"]
+    key_outputs_2["Geo-Heat Extraction Load (btu)"] = HS_HS_output_df[
+        "Ground Source Heat Extraction_HP Heating (Btu/h)"
+    ]
+
+    key_outputs_2["Sea-Heat Rejection Flow (gpm)"] = (
+        HS_HS_output_df["Ocean Source Heat Rejection_HP Cooling (gpm)"]
+        + HS_HS_output_df["Ocean Water Heat Rejection Chillers (gpm)"]
+    )
+    key_outputs_2["Sea-Heat Rejection Flow (gpm)"] = pd.to_numeric(
+        key_outputs_2["Sea-Heat Rejection Flow (gpm)"], errors="coerce"
+    )
+    key_outputs_2["Sea-Heat Rejection Entering (F)"] = np.where(
+        key_outputs_2["Sea-Heat Rejection Flow (gpm)"] == 0,
+        0,
+        HS_HS_output_df["Ocean Water Entering Temp (°F)"]
+        * HS_HS_output_df["Ocean Source Heat Rejection_HP Cooling (gpm)"]
+        + HS_HS_output_df["Ocean Water Entering Temp (°F) Chiller Heat Rejection"]
+        * HS_HS_output_df["Ocean Water Heat Rejection Chillers (gpm)"],
+    )
+    key_outputs_2["Sea-Heat Rejection Leaving (F)"] = ocean_df_WS_temporary
+    key_outputs_2["Sea-Heat Rejection Load (btu)"] = (
+        HS_HS_output_df["Ocean Source Heat Rejection_HP Cooling (btu/h)"]
+        + HS_HS_output_df["Ocean Water Heat Rejection Chiller (Btu/h)"]
+    )
+
+    key_outputs_2["Sea-Heat Extraction Entering (F)"] = HS_HS_output_df[
+        "Ocean Water Entering Temp (°F) HP Heat Extraction"
+    ]
+    key_outputs_2["Sea-Heat Extraction Leaving (F)"] = ocean_df_WS_temporary
+    key_outputs_2["Sea-Heat Extraction Flow (gpm)"] = HS_HS_output_df["Ocean Source Heat Extraction gpm"]
+    key_outputs_2["Sea-Heat Extraction Load (btu)"] = HS_HS_output_df["Ocean Source Heat Extraction btu/h"]
+
+    key_outputs_2["Central Plant-HHW Shortfall (btu)"] = CUP_output_df_two["Heating Shortfall (Btu/h)"]
+    key_outputs_2["Central Plant-CHW Shortfall (btu)"] = CUP_output_df_two["Cooling Shortfall (Btu/h)"]
+    key_outputs_2["Central Plant-Heat Rejection Shortfall(btu)"] = HS_HS_output_df[
+        "Total WS Heat Rejection Shortfall (Btu/h)"
+    ]
+    key_outputs_2["Central Plant-Heat Extraction Shortfall(btu)"] = HS_HS_output_df[
+        "Total WS Heat Extraction Shortfall (Btu/h)"
+    ]
+    return pd.concat([key_outputs, key_outputs_2], axis=1)
+
+
+def main() -> pd.DataFrame:
+    # headless annual run of the notebook flow: building mixing pickle in, key outputs pickle out
+    buildingMixing_output = pd.read_pickle(OUTPUTDIR / "buildingMixing_output.pkl")  # noqa: S301
+    ocean_df_WS = pd.read_excel(INPUTSDIR / "Ocean temp_WS.xlsx")
+    pipeline = Pipeline.from_inputs(buildingMixing_output, ocean_df_WS["Ocean Water Temp (°F) For Water-Source"])
+    key_outputs_df = pipeline.output("key_outputs_df")
+    key_outputs_df.to_pickle(OUTPUTDIR / "key_outputs.pkl")
+    for stage, seconds in pipeline.timings.items():
+        print(f"{stage:20s} {seconds:8.2f} s")
+    return key_outputs_df
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+import numpy as np
+import pandas as pd
+from pydantic import BaseModel
+
+HOURS = list(range(24))
+
+
+class ScheduleMonthError(KeyError):
+    def __init__(self, months):
+        super().__init__(f"Schedule has no row for month(s) {sorted(set(months))}")
+
+
+class CompiledSchedule(BaseModel):
+    # dense (month, hour) view of a tank schedule sheet, row m - 1 holds month m
+    on: np.ndarray
+    totals: np.ndarray
+    defined: np.ndarray
+
+    class Config:
+        arbitrary_types_allowed = True
+
+    @classmethod
+    def from_frame(cls, tank_schedule: pd.DataFrame) -> "CompiledSchedule":
+        on = np.zeros((12, 24), dtype=bool)
+        totals = np.zeros(12, dtype=tank_schedule["Total"].dtype)
+        defined = np.zeros(12, dtype=bool)
+        # like .loc[...].iloc[0], the first row listed for a month wins
+        months = tank_schedule["Month"].to_numpy()
+        for month in range(1, 13):
+            rows = np.flatnonzero(months == month)
+            if len(rows) == 0:
+                continue
+            row = tank_schedule.iloc[rows[0]]
+            on[month - 1] = row[HOURS].to_numpy() == 1
+            totals[month - 1] = row["Total"]
+            defined[month - 1] = True
+        return cls(on=on, totals=totals, defined=defined)
+
+    def _rows(self, month: np.ndarray) -> np.ndarray:
+        rows = np.asarray(month) - 1
+        missing = ~self.defined[rows]
+        if missing.any():
+            raise ScheduleMonthError(np.asarray(month)[missing].tolist())
+        return rows
+
+    def charging(self, month: np.ndarray, hour: np.ndarray) -> np.ndarray:
+        return self.on[self._rows(month), hour]
+
+    def shift_hours(self, month: np.ndarray) -> np.ndarray:
+        return self.totals[self._rows(month)]
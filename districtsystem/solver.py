@@ -0,0 +1,80 @@
+import time
+from typing import Literal
+
+import numpy as np
+import pandas as pd
+from pydantic import BaseModel
+
+from districtsystem.pipeline import STAGES, Pipeline
+
+
+class SolverResult(BaseModel):
+    # plantCHWRT is the converged (or last) iterate, pipeline is evolved to it for the downstream stages
+    plantCHWRT: pd.Series
+    converged: bool
+    history: pd.DataFrame
+    pipeline: Pipeline
+
+    class Config:
+        arbitrary_types_allowed = True
+
+
+class CoupledSolver(BaseModel):
+    # fixed point of the CHW return loop: the CHWRT fed to the heat pumps and cold tank must equal
+    # the CUP CHWR temperature they produce (CUP.max_diff is the residual of the first pass)
+    pipeline: Pipeline
+    tol: float = 0.05  # °F
+    norm: Literal["rms", "max"] = "rms"
+    max_iter: int = 25
+    memory: int = 2  # Anderson depth, 0 for plain fixed-point iteration
+    relaxation: float = 1.0
+
+    class Config:
+        arbitrary_types_allowed = True
+
+    def evaluate(self, x: np.ndarray) -> tuple[np.ndarray, Pipeline]:
+        pipeline = self.pipeline.evolve(plantCHWRT=pd.Series(x, index=self.pipeline.CHWRT.index))
+        g = pipeline.output("CUP_CHWRtemp").to_numpy(dtype=float)
+        # hours with no flow into the CUP have no return temperature, leave them where they are
+        return np.where(np.isfinite(g), g, x), pipeline
+
+    def solve(self) -> SolverResult:
+        # run the stages that do not read plantCHWRT once on the base pipeline, every iterate evolved from it
+        # then reuses their results
+        iterated = Pipeline.stages_reading(["plantCHWRT"])
+        for stage in STAGES:
+            if stage.name not in iterated:
+                self.pipeline.run_stage(stage)
+        x = self.pipeline.CHWRT.to_numpy(dtype=float)
+        history = []
+        dX, dF = [], []
+        previous = None
+        best = None
+        for iteration in range(self.max_iter + 1):
+            start = time.perf_counter()
+            g, pipeline = self.evaluate(x)
+            f = g - x
+            residual = {"residual_max": np.abs(f).max(), "residual_rms": np.sqrt(np.mean(f**2))}
+            history.append({"iteration": iteration, "seconds": time.perf_counter() - start, **residual})
+            # tank status switches make the map discontinuous, so a few hours can cycle between two
+            # states; keep the best iterate rather than the last one
+            if best is None or residual[f"residual_{self.norm}"] < best[0]:
+                best = (residual[f"residual_{self.norm}"], pipeline)
+            if best[0] < self.tol:
+                break
+            if previous is not None and self.memory:
+                dX = [*dX, x - previous[0]][-self.memory :]
+                dF = [*dF, f - previous[1]][-self.memory :]
+            previous = (x, f)
+            x = x + self.relaxation * f
+            if self.memory and dF:
+                # type-II Anderson mixing: least-squares combination of the last residual differences
+                F = np.column_stack(dF)
+                gamma = np.linalg.lstsq(F, f, rcond=None)[0]
+                x = x - (np.column_stack(dX) + self.relaxation * F) @ gamma
+        return SolverResult(
+            plantCHWRT=best[1].plantCHWRT,
+            converged=bool(best[0] < self.tol),
+            history=pd.DataFrame(history),
+            pipeline=best[1],
+        )
@@ -0,0 +1,273 @@
+import itertools
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+from pydantic import BaseModel, PrivateAttr
+
+from districtsystem.heatPump import (
+    CHILLER_SINKS,
+    CHILLER_STRICT,
+    SINK_CAPACITY,
+    HeatSink,
+    allocate_by_cost,
+    boiler_dispatch,
+    capacity_left,
+    chiller_dispatch,
+    chiller_lift_temps,
+    dispatch_by_priority,
+    heat_recovery_capacity,
+    heating_only_split,
+    heatPump,
+    recoverable_cooling,
+    sink_max,
+    water_flow,
+)
+
+# heatPump fields a sweep may vary; everything else is held at the plant's values
+CAPACITIES = (
+    "HP_heatingCapacity",
+    "HP_coolingCapacity",
+    "chiller_maxCapacity",
+    "boiler_maxCapacity_input",
+    "HP_grSource_capacity",
+    "HP_ocean_capacity",
+    "HP_CT_capacity",
+)
+
+# capacity-dependent heatPump outputs the sweep evaluates, named as on heatPump
+SWEEP_OUTPUTS = (
+    "reqHeatingOutput",
+    "possRecoveredCHW",
+    "HP_capacity_C",
+    "HP_capacity_H",
+    "HP_capacity_H_only",
+    "HP_capacity_H_only_WS",
+    "HP_capacity_H_only_GS",
+    "HP_capacity_H_only_OS",
+    "HP_capacity_H_only_AS",
+    "chiller_output",
+    "chiller_gr_hRjt",
+    "chiller_ocean_hRjt",
+    "chiller_CT_hRjt",
+    "chiller_lift",
+    "chiller_CWS_temp",
+    "HP_capacity_C_only",
+    "GS_max",
+    "OS_max",
+    "CT_max",
+    "AS_max",
+    "HP_capacity_C_only_AS",
+    "HP_capacity_C_only_GS",
+    "HP_capacity_C_only_OS",
+    "HP_capacity_C_only_TS",
+    "HP_HW_gpm",
+    "to_HW_district",
+    "HP_CHW_gpm",
+    "to_CHW_district",
+    "CT_CWSflow",
+    "boiler_output",
+    "boiler_HWSflow",
+    "boiler_energy",
+)
+# kept by default; every hourly output costs plants x 8760 floats
+DEFAULT_OUTPUTS = (
+    "HP_capacity_H",
+    "HP_capacity_H_only",
+    "HP_capacity_C",
+    "HP_capacity_C_only",
+    "chiller_output",
+    "boiler_output",
+)
+
+
+class UnknownCapacityError(KeyError):
+    def __init__(self, names):
+        super().__init__(f"Cannot sweep {sorted(names)}, choose from {list(CAPACITIES)}")
+
+
+class UnknownSweepOutputError(KeyError):
+    def __init__(self, names):
+        super().__init__(f"Sweep does not evaluate {sorted(names)}, choose from {list(SWEEP_OUTPUTS)}")
+
+
+class SweepResult(BaseModel):
+    grid: pd.DataFrame  # one row per plant, one column per capacity
+    outputs: tuple
+    cube: np.ndarray  # plants x outputs x hours
+
+    class Config:
+        arbitrary_types_allowed = True
+
+    def output(self, name: str) -> pd.DataFrame:
+        # hours x plants
+        if name not in self.outputs:
+            raise UnknownSweepOutputError([name])
+        return pd.DataFrame(self.cube[:, self.outputs.index(name)].T, columns=self.grid.index)
+
+    def totals(self) -> pd.DataFrame:
+        # annual total of each output per plant, next to its capacities
+        totals = pd.DataFrame(np.nansum(self.cube, axis=2), index=self.grid.index, columns=list(self.outputs))
+        return self.grid.join(totals)
+
+    def to_frame(self) -> pd.DataFrame:
+        # long form: one row per (plant, hour), capacities then outputs as columns
+        plants, _, hours = self.cube.shape
+        index = pd.MultiIndex.from_product([self.grid.index, range(hours)], names=["plant", "hour"])
+        values = pd.DataFrame(
+            self.cube.transpose(0, 2, 1).reshape(plants * hours, -1), index=index, columns=list(self.outputs)
+        )
+        return self.grid.reindex(index, level="plant").join(values)
+
+
+class CapacitySweep(BaseModel):
+    # evaluates one heatPump for many plant capacities: the load- and temperature-dependent vectors
+    # (performance-map match, heat/cool ratio, source temperatures, sink ranking) are taken from the
+    # plant once, and only the capacity-dependent allocations are computed, for a chunk of plants at a time
+    plant: heatPump
+    chunk: int = 64
+
+    _fixed: Optional[dict] = PrivateAttr(default=None)
+
+    class Config:
+        arbitrary_types_allowed = True
+
+    @staticmethod
+    def grid(**values) -> pd.DataFrame:
+        # full factorial grid, e.g. grid(HP_heatingCapacity=[...], HP_coolingCapacity=[...])
+        return pd.DataFrame(list(itertools.product(*values.values())), columns=list(values))
+
+    @property
+    def fixed(self) -> dict:
+        if self._fixed is None:
+            plant = self.plant
+            series = {
+                "heatDemand": plant.heatDemand,
+                "heatCoolRatio": plant.heatCoolRatio,
+                "reqCoolingOutput": plant.reqCoolingOutput,
+                "HW_deltaT": plant.HW_deltaT,
+                "CHW_deltaT": plant.CHW_deltaT,
+                "CT_deltaT": plant.CT_deltaT,
+                "gr_returnTemp": plant.gr_returnTemp,
+                "oceanWaterTemp": plant.oceanWaterTemp,
+                "dryBulb_temp": plant.dryBulb_temp,
+                "districtHWSflow": plant.districtHWSflow,
+                "TES_H_shiftChargeRate": plant.TES_H_shiftChargeRate,
+                "TES_H_flowOut": plant.TES_H_flowOut,
+                "TES_C_shiftChargeRate": plant.TES_C_shiftChargeRate,
+                "CHW_districtSTP": plant.CHW_districtSTP,
+            }
+            self._fixed = {name: value.to_numpy(dtype=float) for name, value in series.items()}
+            self._fixed.update(
+                heatCoolRatio0=plant.heatCoolRatio[0],
+                priority=plant.HS_priority,
+                chillerSinkTemps=plant.chillerSinkTemps,
+            )
+        return self._fixed
+
+    def evaluate(self, capacities: pd.DataFrame) -> dict:
+        # every SWEEP_OUTPUTS entry as plants x hours, one plant per row of `capacities`
+        plant, f = self.plant, self.fixed
+        cap = {name: np.full((len(capacities), 1), float(getattr(plant, name))) for name in CAPACITIES}
+        cap.update({name: capacities[[name]].to_numpy(dtype=float) for name in capacities.columns})
+        HP_H, HP_C = cap["HP_heatingCapacity"], cap["HP_coolingCapacity"]
+        chiller_max = cap["chiller_maxCapacity"]
+        GS_cap, OS_cap = cap["HP_grSource_capacity"], cap["HP_ocean_capacity"]
+        out = {}
+
+        out["reqHeatingOutput"], out["possRecoveredCHW"] = recoverable_cooling(
+            f["heatDemand"], f["heatCoolRatio0"], HP_H, HP_C
+        )
+        out["HP_capacity_C"], out["HP_capacity_H"], out["HP_capacity_H_only"] = heat_recovery_capacity(
+            f["reqCoolingOutput"], out["possRecoveredCHW"], out["reqHeatingOutput"], f["heatCoolRatio"], HP_H
+        )
+        C, H, H_only = out["HP_capacity_C"], out["HP_capacity_H"], out["HP_capacity_H_only"]
+
+        # heating-only split over water and air sources
+        (
+            out["HP_capacity_H_only_WS"],
+            out["HP_capacity_H_only_GS"],
+            out["HP_capacity_H_only_OS"],
+            out["HP_capacity_H_only_AS"],
+        ) = heating_only_split(
+            H_only,
+            HP_H,
+            plant.HP_waterSource,
+            plant.HP_airWaterSource,
+            f["dryBulb_temp"],
+            f["gr_returnTemp"],
+            f["oceanWaterTemp"],
+            GS_cap,
+            OS_cap,
+        )
+
+        # chiller
+        out["chiller_output"], out["HP_capacity_C_only"] = chiller_dispatch(f["reqCoolingOutput"], C, chiller_max, HP_C)
+        chiller, C_only = out["chiller_output"], out["HP_capacity_C_only"]
+        sinkCap = np.stack([cap[SINK_CAPACITY[sink]] for sink in CHILLER_SINKS], axis=-1)
+        hRjt = allocate_by_cost(f["chillerSinkTemps"], sinkCap, chiller, CHILLER_STRICT)
+        chiller_hRjt = {sink: hRjt[..., CHILLER_SINKS.index(sink)] for sink in CHILLER_SINKS}
+        out["chiller_gr_hRjt"] = chiller_hRjt[HeatSink.GROUND]
+        out["chiller_ocean_hRjt"] = chiller_hRjt[HeatSink.OCEAN]
+        out["chiller_CT_hRjt"] = chiller_hRjt[HeatSink.TOWER]
+        out["chiller_lift"], out["chiller_CWS_temp"] = chiller_lift_temps(
+            chiller,
+            chiller_max,
+            plant.Electric_Chiller_maxLift_input,
+            plant.Electric_Chiller_minLift_input,
+            plant.Electric_Chiller_capacity_minLift_input,
+            f["CHW_districtSTP"],
+        )
+
+        # cooling-only split over the heat sinks in each hour's priority order
+        sinkMax = {sink: sink_max(HP_C, cap[SINK_CAPACITY[sink]], chiller_hRjt[sink]) for sink in CHILLER_SINKS}
+        out["GS_max"], out["OS_max"], out["CT_max"] = (
+            sinkMax[HeatSink.GROUND],
+            sinkMax[HeatSink.OCEAN],
+            sinkMax[HeatSink.TOWER],
+        )
+        caps = np.stack(
+            [sinkMax[HeatSink.OCEAN], sinkMax[HeatSink.GROUND], sinkMax[HeatSink.TOWER], np.zeros_like(chiller)],
+            axis=-1,
+        )
+        out["AS_max"] = AS_max = capacity_left(f["priority"], caps, HeatSink.AIR, HP_C * plant.HP_airWaterSource)
+        caps[..., HeatSink.AIR] = AS_max
+        sources = dispatch_by_priority(f["priority"], caps, C_only, first_cap=AS_max)
+        out["HP_capacity_C_only_AS"] = sources[..., HeatSink.AIR]
+        out["HP_capacity_C_only_GS"] = sources[..., HeatSink.GROUND]
+        out["HP_capacity_C_only_OS"] = sources[..., HeatSink.OCEAN]
+        out["HP_capacity_C_only_TS"] = sources[..., HeatSink.TOWER]
+
+        # flows and boiler
+        out["HP_HW_gpm"] = water_flow(H + H_only, f["HW_deltaT"])
+        out["to_HW_district"] = out["HP_HW_gpm"] - f["TES_H_shiftChargeRate"]
+        out["HP_CHW_gpm"] = water_flow(C + C_only, f["CHW_deltaT"])
+        out["to_CHW_district"] = out["HP_CHW_gpm"] - f["TES_C_shiftChargeRate"]
+        out["CT_CWSflow"] = water_flow(chiller_hRjt[HeatSink.TOWER] + out["HP_capacity_C_only_TS"], f["CT_deltaT"])
+        out["boiler_output"], out["boiler_HWSflow"], out["boiler_energy"] = boiler_dispatch(
+            cap["boiler_maxCapacity_input"],
+            f["districtHWSflow"],
+            out["to_HW_district"],
+            f["TES_H_flowOut"],
+            f["HW_deltaT"],
+            plant.boiler_efficiency_input,
+        )
+        return out
+
+    def run(self, grid: pd.DataFrame, outputs: Optional[list] = None) -> SweepResult:
+        unknown = set(grid.columns) - set(CAPACITIES)
+        if unknown:
+            raise UnknownCapacityError(unknown)
+        outputs = tuple(DEFAULT_OUTPUTS if outputs is None else outputs)
+        unknown = set(outputs) - set(SWEEP_OUTPUTS)
+        if unknown:
+            raise UnknownSweepOutputError(unknown)
+
+        hours = len(self.fixed["heatDemand"])
+        cube = np.empty((len(grid), len(outputs), hours))
+        for start in range(0, len(grid), self.chunk):
+            chunk = grid.iloc[start : start + self.chunk]
+            results = self.evaluate(chunk)
+            for position, name in enumerate(outputs):
+                cube[start : start + len(chunk), position] = np.broadcast_to(results[name], (len(chunk), hours))
+        return SweepResult(grid=grid, outputs=outputs, cube=cube)
@@ -0,0 +1,71 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import districtsystem.building_loads_store as store_module
+from districtsystem.building_loads_store import LOAD_COLUMNS, BuildingLoadStore
+
+HOURS = 24
+
+
+def write_loads(folder, simulation_id, value, mtime_ns):
+    # every load column of the building is `value`; the modification time is set so the change is seen
+    path = os.path.join(folder, f"in_{simulation_id}.csv")
+    pd.DataFrame({column: np.full(HOURS, value) for column in LOAD_COLUMNS}).to_csv(path, index=False)
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+def assert_loads(store, expected):
+    loads = store.array(list(expected))
+    for i, value in enumerate(expected.values()):
+        np.testing.assert_array_equal(loads[i], value)
+
+
+def cache_files(folder):
+    return sorted(name for name in os.listdir(folder) if name.startswith(".building_loads_cache"))
+
+
+def test_changed_csv_is_parsed_again(tmp_path):
+    write_loads(tmp_path, "A", 1.0, 10**18)
+    write_loads(tmp_path, "B", 100.0, 10**18)
+    assert_loads(BuildingLoadStore(folder=str(tmp_path)), {"A": 1.0, "B": 100.0})
+
+    write_loads(tmp_path, "A", 2.0, 2 * 10**18)
+    assert_loads(BuildingLoadStore(folder=str(tmp_path)), {"A": 2.0, "B": 100.0})
+
+
+def test_rows_are_remapped_when_an_earlier_building_changes(tmp_path):
+    write_loads(tmp_path, "A", 1.0, 10**18)
+    write_loads(tmp_path, "B", 100.0, 10**18)
+    BuildingLoadStore(folder=str(tmp_path)).array(["A", "B"])
+
+    # A moves behind B in the rewritten cache
+    write_loads(tmp_path, "A", 2.0, 2 * 10**18)
+    BuildingLoadStore(folder=str(tmp_path)).array(["A"])
+    assert_loads(BuildingLoadStore(folder=str(tmp_path)), {"B": 100.0})
+    assert_loads(BuildingLoadStore(folder=str(tmp_path)), {"B": 100.0, "A": 2.0})
+    assert len(cache_files(tmp_path)) == 2
+
+
+def test_interrupted_write_keeps_the_previous_cache(tmp_path, monkeypatch):
+    write_loads(tmp_path, "A", 1.0, 10**18)
+    write_loads(tmp_path, "B", 100.0, 10**18)
+    BuildingLoadStore(folder=str(tmp_path)).array(["A", "B"])
+
+    # the run stops once the new values are written, before the index naming them is swapped in
+    replace = os.replace
+
+    def interrupted(source, destination):
+        if destination.endswith(".json"):
+            raise KeyboardInterrupt
+        replace(source, destination)
+
+    write_loads(tmp_path, "A", 2.0, 2 * 10**18)
+    with monkeypatch.context() as patch:
+        patch.setattr(store_module.os, "replace", interrupted)
+        with pytest.raises(KeyboardInterrupt):
+            BuildingLoadStore(folder=str(tmp_path)).array(["A"])
+    assert_loads(BuildingLoadStore(folder=str(tmp_path)), {"B": 100.0, "A": 2.0})
+    assert len(cache_files(tmp_path)) == 2
@@ -0,0 +1,34 @@
+import numpy as np
+import pandas as pd
+
+from districtsystem.CUP import CUP
+
+
+def tank_schedule(hours) -> pd.DataFrame:
+    # the tank charges in `hours` of every month
+    schedule = pd.DataFrame({"Month": np.arange(1, 13)})
+    for hour in range(24):
+        schedule[hour] = int(hour in hours)
+    schedule["Total"] = len(hours)
+    return schedule
+
+
+def test_clear_cache_recompiles_edited_schedule():
+    timeStamp = pd.DataFrame({"Date and Time": pd.date_range("2022-01-01", periods=8760, freq="h")})
+    load = pd.Series(np.ones(8760))
+    cup = CUP(
+        timeStamp=timeStamp,
+        hotTank_schedule=tank_schedule(range(10, 16)),
+        coldTank_schedule=tank_schedule(range(0, 6)),
+        totalHeating_load=load,
+        totalCooling_load=load,
+    )
+    assert cup.HW_charging.sum() == 365 * 6
+    assert cup.HL_totalShiftHours[0] == 6
+
+    # edited in place, then cleared as CachedModel asks
+    cup.hotTank_schedule.loc[:, list(range(24))] = 0
+    cup.hotTank_schedule["Total"] = 0
+    cup.clear_cache()
+    assert cup.HW_charging.sum() == 0
+    assert cup.HL_totalShiftHours[0] == 0
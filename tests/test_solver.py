@@ -0,0 +1,67 @@
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from districtsystem.pipeline import Pipeline
+from districtsystem.solver import CoupledSolver
+
+calls = Counter()
+
+
+class StubPipeline(Pipeline):
+    # the stage graph of Pipeline with trivial stages; the CUP CHWR temperature is 0.5 * plantCHWRT + 27,
+    # so the loop converges to 54 °F
+    def _cup_schedule(self) -> dict:
+        calls["cup_schedule"] += 1
+        return {"CUP_output_df": None}
+
+    def _tes_hot(self, CUP_output_df) -> dict:
+        calls["tes_hot"] += 1
+        return {"TES_instance": None, "TES_H_output_df": None}
+
+    def _heat_pump_1(self, TES_H_output_df) -> dict:
+        calls["heat_pump_1"] += 1
+        return {"heatPump_output_df": self.CHWRT}
+
+    def _tes_cold(self, TES_instance, heatPump_output_df) -> dict:
+        calls["tes_cold"] += 1
+        return {"TES_C_output_df": heatPump_output_df, "TES_HC_output_df": None}
+
+    def _cup_chw_return(self, TES_C_output_df, TES_HC_output_df) -> dict:
+        calls["cup_chw_return"] += 1
+        return {"CUP_CHWRtemp": 0.5 * TES_C_output_df + 27}
+
+
+def stub_pipeline() -> StubPipeline:
+    empty = pd.DataFrame()
+    return StubPipeline(
+        buildingMixing_output=pd.DataFrame({"District CHWRT (°F)": np.full(24, 60.0)}),
+        CUP_inputs={},
+        TES_inputs={},
+        districtModule_inputs=empty,
+        weather_df=empty,
+        heatPump_df=empty,
+        dateTime_df=empty,
+        hotTank_schedule=empty,
+        coldTank_schedule=empty,
+        groundReturn_schedule=empty,
+        chilledCTOcean_schedule=empty,
+        month_to_match=np.array([]),
+        days_to_match=np.array([]),
+        ocean_df=empty,
+        ocean_df_WS_temporary=pd.Series(dtype=float),
+    )
+
+
+@pytest.mark.parametrize("memory", [0, 2])
+def test_solver_runs_shared_stages_once(memory):
+    calls.clear()
+    result = CoupledSolver(pipeline=stub_pipeline(), memory=memory, tol=1e-6).solve()
+    iterations = len(result.history)
+    assert result.converged
+    assert np.allclose(result.plantCHWRT, 54)
+    assert calls["cup_schedule"] == 1
+    assert calls["tes_hot"] == 1
+    assert calls["heat_pump_1"] == calls["tes_cold"] == calls["cup_chw_return"] == iterations
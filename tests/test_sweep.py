@@ -0,0 +1,92 @@
+import numpy as np
+import pandas as pd
+
+from districtsystem.heatPump import heatPump
+from districtsystem.sweep import SWEEP_OUTPUTS, CapacitySweep
+
+HOURS = 96
+
+
+def synthetic_plant() -> heatPump:
+    rng = np.random.default_rng(0)
+
+    def hourly(low, high):
+        return pd.Series(rng.uniform(low, high, HOURS))
+
+    def monthly(low, high):
+        return pd.Series(rng.uniform(low, high, 12))
+
+    # performance map over every (entering HW, entering CHW, leaving HW) combination
+    enteringHW, enteringCHW, leavingHW = (
+        pd.Series(values, dtype=float)
+        for values in zip(*[(hw, chw, lhw) for hw in (90, 100, 110) for chw in (50, 55, 60) for lhw in (140, 150, 160)])
+    )
+    rows = len(enteringHW)
+    months = pd.Series(np.arange(1, 13))
+    return heatPump(
+        districtHWRT=hourly(95, 115),
+        districtCHWRT=hourly(55, 62),
+        districtHWSflow=hourly(500, 3000),
+        HW_districtSTP=pd.Series(np.full(HOURS, 150.0)),
+        HP_leavingHW=leavingHW,
+        HP_enteringHW=enteringHW,
+        HP_enteringCHW=enteringCHW,
+        HP_leavingCHW=pd.Series(rng.uniform(40, 45, rows)),
+        HP_maxHeating=pd.Series(rng.uniform(1.5e6, 2.5e6, rows)),
+        HP_maxCooling=pd.Series(rng.uniform(1.0e6, 1.6e6, rows)),
+        TES_H_shiftChargeRate=hourly(0, 200),
+        TES_H_flowOut=hourly(0, 200),
+        HP_heatingCapacity=2.0e7,
+        HP_coolingCapacity=1.5e7,
+        TES_C_shiftChargeRate=hourly(0, 300),
+        TES_C_flowOut=hourly(0, 300),
+        TES_H_tempOut=hourly(140, 150),
+        TES_C_tempOut=hourly(40, 45),
+        districtCHWSflow=hourly(1000, 5000),
+        dryBulb_temp=hourly(40, 90),
+        wetBulb_temp=hourly(35, 70),
+        HP_waterSource=0.6,
+        HP_airWaterSource=0.2,
+        grReturn_D_LWT=monthly(55, 65),
+        gr_months=months,
+        month_to_match=np.repeat(np.arange(1, 13), HOURS // 12),
+        ocean_df=pd.DataFrame(),
+        days_to_match=np.tile(np.arange(1, HOURS // 12 + 1), 12),
+        ocean_df_WS_temporary=hourly(55, 65),
+        HP_grSource_capacity=6.0e6,
+        HP_ocean_capacity=4.0e6,
+        HP_CT_capacity=8.0e6,
+        chiller_maxCapacity=1.0e7,
+        grReturn_HtRej_LWT=monthly(60, 70),
+        CT_CUP_value=monthly(5, 10),
+        CT_CUP_month=months,
+        CHW_districtSTP=pd.Series(np.full(HOURS, 42.0)),
+        Electric_Chiller_maxLift_input=50.0,
+        Electric_Chiller_minLift_input=30.0,
+        Electric_Chiller_capacity_minLift_input=2.0e6,
+        boiler_maxCapacity_input=1.2e7,
+        boiler_efficiency_input=0.85,
+        grReturn_HtEx_EWT=monthly(50, 60),
+        grReturn_HtRej_EWT=monthly(60, 70),
+        HSHS_deltaT_HP=10.0,
+        HSHS_deltaT_CH=10.0,
+    )
+
+
+def test_sweep_matches_heatPump_properties():
+    plant = synthetic_plant()
+    grid = CapacitySweep.grid(
+        HP_heatingCapacity=[5.0e5, 2.0e7],
+        HP_coolingCapacity=[4.0e5, 1.5e7],
+        chiller_maxCapacity=[0.0, 1.0e7],
+        HP_grSource_capacity=[0.0, 6.0e6],
+        HP_ocean_capacity=[1.0e5, 4.0e6],
+        boiler_maxCapacity_input=[1.0e5, 1.2e7],
+    )
+    result = CapacitySweep(plant=plant, chunk=16).run(grid, outputs=SWEEP_OUTPUTS)
+    for i, capacities in grid.iterrows():
+        instance = plant.model_copy(update={name: float(value) for name, value in capacities.items()})
+        for name in SWEEP_OUTPUTS:
+            expected = np.asarray(getattr(instance, name), dtype=float)
+            swept = result.cube[i, SWEEP_OUTPUTS.index(name)]
+            np.testing.assert_array_equal(swept, expected, err_msg=f"{name} of plant {i}")